@@ -2,73 +2,103 @@ import sys
 import os
 import json
 import pandas as pd
-from datetime import datetime
+from datetime import datetime, timedelta
 
 # Add project root to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app_review_insights import config
-from app_review_insights.scraping.google_play_scraper import fetch_reviews, save_raw_reviews
-from app_review_insights.processing.filters import filter_reviews
-from app_review_insights.processing.theming import theme_reviews
-from app_review_insights.reporting.weekly_note import generate_weekly_note
+from app_review_insights.context import RunContext
+from app_review_insights.scraping.engine import make_target, scrape_target
+from app_review_insights.scraping.fetch_control import FetchError
+from app_review_insights.storage.review_store import ReviewStore, week_start
+from app_review_insights.storage import columnar_store
+from app_review_insights.storage.atomic import atomic_write, write_json
+from app_review_insights.processing.theming import theme_reviews, known_groups
+from app_review_insights.processing.theme_discovery import discover_themes
+from app_review_insights.reporting.trends import detect_trends
+from app_review_insights.reporting.weekly_note import generate_weekly_note_from_aggregates, write_weekly_note
+from app_review_insights.streaming import run_streaming_pipeline
 from app_review_insights.reporting.email_draft import generate_email_draft
 
-def scrape_reviews_action(app_url):
-    """ACTION A: SCRAPE_REVIEWS"""
-    # Extract app_id from URL (simple parsing)
-    try:
-        app_id = app_url.split("id=")[1].split("&")[0]
-    except IndexError:
-        return {"status": "error", "message": "Invalid URL format"}
-
-    # Update config (runtime override)
-    config.APP_ID = app_id
-    
-    raw_reviews = fetch_reviews(app_id=app_id, count=500)
-    save_raw_reviews(raw_reviews)
+def scrape_reviews_action(app_url=None, ctx=None):
+    """
+    ACTION A: SCRAPE_REVIEWS
+    Takes the app's Play Store URL, or a RunContext for it. Every other
+    action takes the same context (default: config.APP_ID).
+    """
+    if ctx is None:
+        try:
+            ctx = RunContext.from_url(app_url or "")
+        except ValueError as e:
+            return {"status": "error", "message": str(e)}
     
-    filtered_reviews = filter_reviews(raw_reviews)
-    os.makedirs(os.path.dirname(config.FILTERED_REVIEWS_FILE), exist_ok=True)
-    with open(config.FILTERED_REVIEWS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(filtered_reviews, f, indent=2)
-        
-    # Save to CSV
-    df = pd.DataFrame(filtered_reviews)
     try:
-        os.makedirs(config.OUTPUT_DIR, exist_ok=True)
-    except Exception as e:
-        print(f"DEBUG: Failed to create CSV output dir: {e}")
-        
-    csv_path = os.path.join(config.OUTPUT_DIR, "reviews_latest.csv")
-    print(f"DEBUG: Saving CSV to {csv_path}")
-    df.to_csv(csv_path, index=False)
+        result = scrape_target(make_target(ctx.app_id, ctx.lang, ctx.country), weeks_back=ctx.weeks_back)
+    except FetchError as e:
+        return {"status": "error", "message": f"Fetching reviews failed: {e}"}
+    filtered_reviews = result["reviews"]
+
+    write_json(ctx.filtered_reviews_file, filtered_reviews, indent=2)
         
+    data_preview = {
+        "review_count": len(filtered_reviews),
+        "new_review_count": result["new_review_count"],
+        "app_id": ctx.app_id,
+        "debug_info": "Directory checks applied."
+    }
+
+    if columnar_store.is_enabled():
+        # Parquet replaces the CSV copy; readers pull only the columns they need
+        columnar_store.write_reviews(filtered_reviews)
+        data_preview["columnar_path"] = config.COLUMNAR_DIR
+    else:
+        # Save to CSV
+        df = pd.DataFrame(filtered_reviews)
+        try:
+            os.makedirs(ctx.output_dir, exist_ok=True)
+        except Exception as e:
+            print(f"DEBUG: Failed to create CSV output dir: {e}")
+
+        csv_path = ctx.reviews_csv_file
+        print(f"DEBUG: Saving CSV to {csv_path}")
+        with atomic_write(csv_path, newline='') as f:
+            df.to_csv(f, index=False)
+        data_preview["csv_path"] = csv_path
+
     return {
         "action_performed": "SCRAPE_REVIEWS",
         "status": "success",
         "next_available_actions": ["CATEGORIZE_REVIEWS"],
-        "data_preview": {
-            "review_count": len(filtered_reviews),
-            "app_id": app_id,
-            "csv_path": csv_path,
-            "debug_info": "Directory checks applied."
-        }
+        "data_preview": data_preview
     }
 
-def categorize_reviews_action():
+def categorize_reviews_action(ctx=None):
     """ACTION B: CATEGORIZE_REVIEWS"""
-    if not os.path.exists(config.FILTERED_REVIEWS_FILE):
-        return {"status": "error", "message": "No filtered reviews found. Run scrape first."}
-        
-    with open(config.FILTERED_REVIEWS_FILE, 'r', encoding='utf-8') as f:
-        filtered_reviews = json.load(f)
-        
-    tagged_reviews = theme_reviews(filtered_reviews)
-    
-    os.makedirs(os.path.dirname(config.TAGGED_REVIEWS_FILE), exist_ok=True)
-    with open(config.TAGGED_REVIEWS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(tagged_reviews, f, indent=2)
+    ctx = ctx or RunContext.default()
+    since = ctx.window_start()
+    with ReviewStore() as store:
+        if not store.count_reviews(app_name=ctx.app_id, locale=ctx.locale, since=since):
+            return {"status": "error", "message": "No filtered reviews found. Run scrape first."}
+
+        # Only reviews the store hasn't tagged yet go through the classifier;
+        # copies of the window's tagged representatives are grouped with them
+        window_reviews = store.query_reviews(app_name=ctx.app_id, locale=ctx.locale, since=since)
+        untagged_reviews = [r for r in window_reviews if r['theme'] is None]
+        if untagged_reviews:
+            try:
+                tagged = theme_reviews(untagged_reviews, known=known_groups(window_reviews))
+            except FetchError as e:
+                # The LLM provider's retries ran out or its circuit breaker is open
+                return {"status": "error", "message": f"Categorizing reviews failed: {e}"}
+            store.set_themes(tagged)
+        tagged_reviews = store.query_reviews(app_name=ctx.app_id, locale=ctx.locale, since=since)
+
+    if columnar_store.is_enabled():
+        columnar_store.write_reviews(tagged_reviews)
+
+    # Window snapshot for the frontend
+    write_json(ctx.tagged_reviews_file, tagged_reviews, indent=2)
         
     themes = list(set(r['theme'] for r in tagged_reviews))
     
@@ -78,21 +108,37 @@ def categorize_reviews_action():
         "next_available_actions": ["GENERATE_WEEKLY_NOTE"],
         "data_preview": {
             "themes": themes,
-            "tagged_count": len(tagged_reviews)
+            "tagged_count": len(tagged_reviews),
+            "newly_tagged_count": len(untagged_reviews)
         }
     }
 
-def generate_weekly_note_action():
+def generate_weekly_note_action(ctx=None):
     """ACTION C: GENERATE_WEEKLY_NOTE"""
-    if not os.path.exists(config.TAGGED_REVIEWS_FILE):
+    ctx = ctx or RunContext.default()
+    # Read the materialized weekly aggregates instead of the tagged reviews;
+    # near-duplicates are already counted once, through their representative
+    now = datetime.now()
+    with ReviewStore() as store:
+        theme_totals = store.theme_totals(app_name=ctx.app_id, locale=ctx.locale, since=ctx.window_start(now))
+        # Trends compare complete weeks only; the current week is still filling up
+        weekly_rows = store.weekly_theme_stats(
+            app_name=ctx.app_id,
+            locale=ctx.locale,
+            since=(now - timedelta(weeks=config.TREND_HISTORY_WEEKS)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            until=now.strftime("%Y-%m-%dT%H:%M:%SZ")
+        )
+    if not theme_totals:
         return {"status": "error", "message": "No tagged reviews found. Run categorize first."}
-        
-    with open(config.TAGGED_REVIEWS_FILE, 'r', encoding='utf-8') as f:
-        tagged_reviews = json.load(f)
-        
-    generate_weekly_note(tagged_reviews)
+
+    # The last complete week, even if it has no reviews: alerts are labelled
+    # with it, and a theme that fell to zero there still counts as a drop
+    last_week = (datetime.strptime(week_start(now.strftime("%Y-%m-%dT%H:%M:%SZ")), "%Y-%m-%d")
+                 - timedelta(weeks=1)).strftime("%Y-%m-%d")
+    trend_alerts = detect_trends(weekly_rows, last_week=last_week)
+    generate_weekly_note_from_aggregates(theme_totals, trend_alerts=trend_alerts, ctx=ctx)
     
-    with open(config.WEEKLY_REPORT_FILE, 'r', encoding='utf-8') as f:
+    with open(ctx.weekly_report_file, 'r', encoding='utf-8') as f:
         report_content = f.read()
         
     return {
@@ -100,21 +146,24 @@ def generate_weekly_note_action():
         "status": "success",
         "next_available_actions": ["CREATE_EMAIL_DRAFT"],
         "data_preview": {
-            "report_preview": report_content[:500] + "..."
+            "report_preview": report_content[:500] + "...",
+            "trend_alerts": trend_alerts
         }
     }
 
-def create_email_draft_action():
+def create_email_draft_action(ctx=None):
     """ACTION D: CREATE_EMAIL_DRAFT"""
-    if not os.path.exists(config.TAGGED_REVIEWS_FILE):
-        return {"status": "error", "message": "No tagged reviews found."}
-        
-    with open(config.TAGGED_REVIEWS_FILE, 'r', encoding='utf-8') as f:
-        tagged_reviews = json.load(f)
-        
-    generate_email_draft(tagged_reviews)
+    ctx = ctx or RunContext.default()
+    # The draft is built from the weekly report, so there is no need to
+    # load the tagged reviews (which a streaming run never materializes)
+    if not os.path.exists(ctx.weekly_report_file):
+        return {"status": "error", "message": "No weekly report found. Run report first."}
+
+    with ReviewStore() as store:
+        theme_totals = store.theme_totals(app_name=ctx.app_id, locale=ctx.locale, since=ctx.window_start())
+    generate_email_draft([], weekly_totals=theme_totals, ctx=ctx)
     
-    with open(config.EMAIL_DRAFT_FILE, 'r', encoding='utf-8') as f:
+    with open(ctx.email_draft_file, 'r', encoding='utf-8') as f:
         email_content = f.read()
         
     # Parse subject/body roughly for preview (or update generate_email_draft to return structured)
@@ -132,9 +181,70 @@ def create_email_draft_action():
         }
     }
 
-def send_email_action(to_address):
+def stream_pipeline_action(app_url=None, ctx=None):
+    """ACTION A-C (streaming): SCRAPE, CATEGORIZE and GENERATE_WEEKLY_NOTE in one pass"""
+    if ctx is None:
+        try:
+            ctx = RunContext.from_url(app_url or "")
+        except ValueError as e:
+            return {"status": "error", "message": str(e)}
+
+    try:
+        aggregates = run_streaming_pipeline(app_id=ctx.app_id, lang=ctx.lang, country=ctx.country,
+                                            sink_file=ctx.stream_sink_file, weeks_back=ctx.weeks_back)
+    except FetchError as e:
+        return {"status": "error", "message": f"Fetching reviews failed: {e}"}
+
+    # The report is built from aggregates only; reviews stay in the sink
+    write_weekly_note(dict(aggregates.counts.most_common()), theme_sentiment=aggregates.sentiment_distribution(),
+                      ctx=ctx)
+
+    return {
+        "action_performed": "STREAM_PIPELINE",
+        "status": "success",
+        "next_available_actions": ["CREATE_EMAIL_DRAFT"],
+        "data_preview": {
+            "app_id": ctx.app_id,
+            "tagged_count": aggregates.total,
+            "themes": list(aggregates.counts),
+            "sink_path": ctx.stream_sink_file
+        }
+    }
+
+def discover_themes_action(ctx=None):
+    """ACTION F: DISCOVER_THEMES (clusters recent reviews to spot issues THEME_LIST misses)"""
+    ctx = ctx or RunContext.default()
+    since = (datetime.now() - timedelta(weeks=config.DISCOVERY_WEEKS)).strftime("%Y-%m-%dT%H:%M:%SZ")
+    with ReviewStore() as store:
+        texts = [r["text"] for r in store.query_reviews(app_name=ctx.app_id, locale=ctx.locale, since=since,
+                                                             columns=["text"])]
+    if not texts:
+        return {"status": "error", "message": "No recent reviews found. Run scrape first."}
+
+    try:
+        clusters = discover_themes(texts)
+    except RuntimeError as e:
+        return {"status": "error", "message": str(e)}
+
+    write_json(ctx.theme_discovery_file, clusters, indent=2)
+
+    emerging = [c for c in clusters if c["is_emerging"]]
+    return {
+        "action_performed": "DISCOVER_THEMES",
+        "status": "success",
+        "next_available_actions": ["CATEGORIZE_REVIEWS"],
+        "data_preview": {
+            "review_count": len(texts),
+            "cluster_count": len(clusters),
+            "emerging_clusters": [{"size": c["size"], "top_terms": c["top_terms"]} for c in emerging],
+            "discovery_path": ctx.theme_discovery_file
+        }
+    }
+
+def send_email_action(to_address, ctx=None):
     """ACTION E: SEND_EMAIL"""
-    if not os.path.exists(config.EMAIL_DRAFT_FILE):
+    ctx = ctx or RunContext.default()
+    if not os.path.exists(ctx.email_draft_file):
         return {"status": "error", "message": "No email draft found."}
         
     # Placeholder for actual email sending logic
@@ -154,19 +264,24 @@ if __name__ == "__main__":
     # Simple CLI for testing actions
     import argparse
     parser = argparse.ArgumentParser()
-    parser.add_argument("action", choices=["scrape", "categorize", "report", "draft", "send"])
-    parser.add_argument("--url", help="App URL for scrape")
+    parser.add_argument("action", choices=["scrape", "categorize", "report", "draft", "send", "stream", "discover"])
+    parser.add_argument("--url", help="App URL (every action runs for this app)")
     parser.add_argument("--email", help="Email address for send")
     
     args = parser.parse_args()
+    ctx = RunContext.from_url(args.url or "https://play.google.com/store/apps/details?id=com.nextbillion.groww")
     
     if args.action == "scrape":
-        print(json.dumps(scrape_reviews_action(args.url or "https://play.google.com/store/apps/details?id=com.nextbillion.groww"), indent=2))
+        print(json.dumps(scrape_reviews_action(ctx=ctx), indent=2))
     elif args.action == "categorize":
-        print(json.dumps(categorize_reviews_action(), indent=2))
+        print(json.dumps(categorize_reviews_action(ctx), indent=2))
     elif args.action == "report":
-        print(json.dumps(generate_weekly_note_action(), indent=2))
+        print(json.dumps(generate_weekly_note_action(ctx), indent=2))
     elif args.action == "draft":
-        print(json.dumps(create_email_draft_action(), indent=2))
+        print(json.dumps(create_email_draft_action(ctx), indent=2))
+    elif args.action == "stream":
+        print(json.dumps(stream_pipeline_action(ctx=ctx), indent=2))
+    elif args.action == "discover":
+        print(json.dumps(discover_themes_action(ctx), indent=2))
     elif args.action == "send":
-        print(json.dumps(send_email_action(args.email or "test@example.com"), indent=2))
+        print(json.dumps(send_email_action(args.email or "test@example.com", ctx), indent=2))
@@ -1,7 +1,7 @@
 import os
 from datetime import datetime, timedelta
 
-# App Configuration
+# App Configuration (defaults; each run carries its own context.RunContext)
 APP_ID = "com.nextbillion.groww"
 LANG = "en"
 COUNTRY = "in"
@@ -21,18 +21,138 @@ THEME_LIST = [
     "User Experience"
 ]
 
+# Keyword theme engine: theme -> {keyword or phrase: weight}. Matching is
+# whole-word and case-insensitive; on equal scores the earlier theme wins.
+# It replaced a first-hit substring check of 22 keywords and costs more per
+# review: about 1.3-1.6x the old check's time on output/reviews_latest.csv
+# (scripts/bench_theming.py), a few seconds per million reviews. It also
+# changes the theme of 39 of those 194 reviews; see the README.
+THEME_FALLBACK = "User Experience"
+THEME_KEYWORDS = {
+    "Customer Support": {
+        "support": 2, "customer": 1, "service": 1, "reply": 2, "replied": 2, "response": 1,
+        "customer care": 3, "customer support": 3, "customer service": 3, "helpline": 2,
+        "ticket": 1, "chat": 1, "agent": 1, "executive": 1, "complaint": 1, "no response": 3
+    },
+    "Pricing & Charges": {
+        "charge": 2, "charges": 2, "charged": 2, "fee": 2, "fees": 2, "money": 1, "cost": 1,
+        "costs": 1, "brokerage": 3, "commission": 2, "hidden charges": 3, "expensive": 2,
+        "dp charges": 3, "deducted": 2, "refund": 1
+    },
+    "App Performance & Bugs": {
+        "bug": 2, "bugs": 2, "crash": 3, "crashes": 3, "crashed": 3, "crashing": 3, "slow": 2,
+        "lag": 2, "lags": 2, "lagging": 2, "install": 1, "error": 2, "errors": 2, "glitch": 2,
+        "hang": 2, "hangs": 2, "freeze": 2, "stuck": 2, "not working": 3, "not loading": 3,
+        "server down": 3, "loading": 1, "otp": 1, "login": 1
+    },
+    "Trading & Features": {
+        "feature": 2, "features": 2, "option": 1, "options": 1, "trade": 2, "trades": 2,
+        "trading": 2, "stock": 2, "stocks": 2, "f&o": 3, "ipo": 3, "mutual fund": 2,
+        "mutual funds": 2, "sip": 2, "intraday": 2, "order": 1, "orders": 1, "portfolio": 1
+    },
+    "User Experience": {
+        "ui": 2, "interface": 2, "design": 1, "easy": 1, "simple": 1, "user friendly": 3,
+        "navigation": 2, "experience": 1, "smooth": 1, "clean": 1, "confusing": 2, "dark mode": 3
+    }
+}
+
 # Paths
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DATA_DIR = os.path.join(BASE_DIR, "data")
 OUTPUT_DIR = os.path.join(BASE_DIR, "output")
 
 RAW_REVIEWS_FILE = os.path.join(DATA_DIR, "reviews_raw.json")
-FILTERED_REVIEWS_FILE = os.path.join(DATA_DIR, "reviews_filtered.json")
-TAGGED_REVIEWS_FILE = os.path.join(DATA_DIR, "reviews_tagged.json")
+REVIEW_STORE_FILE = os.path.join(DATA_DIR, "reviews.db")  # SQLite history of all apps
+
+# Optional Parquet dataset (needs pyarrow), partitioned by app and ISO week.
+# When enabled it replaces the CSV export and feeds the report and frontend.
+COLUMNAR_BACKEND = False
+COLUMNAR_DIR = os.path.join(DATA_DIR, "columnar")
+
+# Per-run files (filtered/tagged snapshots, report, draft, ...) live in a
+# directory per app and locale under DATA_DIR/apps and OUTPUT_DIR; see
+# context.RunContext
+
+# Scraping Configuration
+PAGE_SIZE = 200  # Reviews requested per continuation-token page
+CHECKPOINT_DIR = os.path.join(DATA_DIR, "checkpoints")
+CHECKPOINT_MAX_AGE_HOURS = 6  # Older checkpoints are discarded; the NEWEST-sorted token has drifted
+HIGH_WATER_MARK_FILE = os.path.join(DATA_DIR, "high_water_marks.json")
+SCRAPE_MAX_WORKERS = 8  # Concurrent (app, lang, country) targets
+
+# iOS App Store RSS feed (50 reviews per page, at most 10 pages)
+IOS_RSS_URL = "https://itunes.apple.com/{country}/rss/customerreviews/page={page}/id={app_id}/sortby=mostrecent/json"
+IOS_RSS_PAGES = 10
+IOS_RSS_MAX_WORKERS = 10
+
+# Streaming pipeline: reviews flow through filter/theme in chunks into a JSONL sink
+STREAM_CHUNK_SIZE = 200
+
+# Pipeline executor (memoized stage DAG; state is kept per app)
+PIPELINE_MAX_WORKERS = 4  # Independent stages run concurrently
+SCRAPE_FRESHNESS_HOURS = 6  # A pipeline run reuses a scrape younger than this
+PIPELINE_RESUME_HOURS = 24  # A crashed run younger than this is resumed, not restarted
+
+# Job service (HTTP front end for the api actions; python main.py --serve)
+SERVICE_HOST = os.getenv("SERVICE_HOST", "127.0.0.1")
+SERVICE_PORT = int(os.getenv("SERVICE_PORT", "8080"))
+SERVICE_WORKERS = 4  # Jobs running at once; jobs for the same app run one at a time
+SERVICE_MAX_QUEUE = 1000  # Queued jobs beyond this are refused with 503
+SERVICE_JOB_HISTORY = 1000  # Finished jobs kept for status lookups
+
+# Scheduler (recurring runs for many apps; python main.py --schedule)
+SCHEDULE_FILE = os.path.join(BASE_DIR, "schedule.json")  # Apps and cadences, see scheduler.py
+SCHEDULE_DEFAULT_HOUR = 9  # Local hour for daily/weekly runs without an "hour"
+SCHEDULE_STAGGER_MINUTES = 30  # Apps' start times spread over this window
+
+# Fetch Control (per store host)
+FETCH_RATE_LIMIT = 5.0  # Requests per second; halves on throttling, recovers on success
+FETCH_BURST = 10
+FETCH_MAX_RETRIES = 4
+FETCH_BACKOFF_BASE = 1.0  # Seconds; doubles per attempt, with full jitter
+FETCH_BACKOFF_MAX = 30.0
+CIRCUIT_FAILURE_THRESHOLD = 5  # Consecutive failures before the host is paused
+CIRCUIT_RESET_SECONDS = 60
+
+# LLM Configuration
+LLM_PROVIDER = "mock" # or "tfidf" (local model), "openai" (any OpenAI-compatible chat-completions endpoint)
+LLM_API_BASE = os.getenv("LLM_API_BASE", "https://api.openai.com/v1")
+LLM_MODEL = os.getenv("LLM_MODEL", "gpt-4o-mini")
+LLM_TIMEOUT = 60  # Seconds per request
+LLM_BATCH_SIZE = 25  # Reviews packed into one prompt
+LLM_MAX_CONCURRENCY = 4  # Batches in flight at once
+TFIDF_MODEL_FILE = os.path.join(DATA_DIR, "tfidf_theme_model.pkl")  # Written by scripts/train_theme_model.py
+
+# Near-duplicate detection (MinHash + LSH); duplicates share their representative's theme
+DEDUP_ENABLED = True
+DEDUP_SHINGLE_SIZE = 3  # Words per shingle
+DEDUP_NUM_PERM = 64  # MinHash signature length
+DEDUP_BANDS = 16  # LSH bands (DEDUP_NUM_PERM / DEDUP_BANDS rows each)
+DEDUP_THRESHOLD = 0.7  # Estimated Jaccard similarity to count as a duplicate
+
+# Sentiment (lexicon scores in (-1, 1), assigned during theming)
+SENTIMENT_POSITIVE_THRESHOLD = 0.05
+SENTIMENT_NEGATIVE_THRESHOLD = -0.05
+
+# Trend alerts (week-over-week changes in the per-theme weekly series)
+TREND_HISTORY_WEEKS = 12  # Complete weeks loaded for the series
+TREND_WINDOW_WEEKS = 4  # Rolling baseline for z-scores
+TREND_Z_THRESHOLD = 2.0  # |z| at which a week counts as a spike or drop
+TREND_MIN_COUNT = 5  # Ignore themes with fewer reviews than this in the week
+
+# Emerging-theme discovery (clusters recent reviews independently of THEME_LIST)
+DISCOVERY_WEEKS = 1  # How many recent weeks to cluster
+DISCOVERY_CLUSTERS = 12
+DISCOVERY_TOP_TERMS = 8  # Terms shown per cluster
 
-WEEKLY_REPORT_FILE = os.path.join(OUTPUT_DIR, "weekly_pulse_groww.md")
-EMAIL_DRAFT_FILE = os.path.join(OUTPUT_DIR, "email_draft_groww.txt")
-THEME_LEGEND_FILE = os.path.join(OUTPUT_DIR, "theme_legend_groww.md")
+# Parallel theming for local (CPU-bound) classifiers
+THEMING_WORKERS = None  # Worker processes; None = one per CPU
+THEMING_CHUNK_SIZE = 500  # Reviews per task sent to a worker
+THEMING_PARALLEL_MIN_REVIEWS = 10000  # Below this, process startup costs more than it saves
 
-# LLM Configuration (Placeholder for future use)
-LLM_PROVIDER = "mock" # or "openai", "gemini"
+# Classification cache (reused across runs for reviews seen before)
+CLASSIFICATION_CACHE_ENABLED = True  # Only consulted for network providers
+CLASSIFICATION_CACHE_FILE = os.path.join(DATA_DIR, "classification_cache.db")
+CLASSIFICATION_CACHE_MEMORY_SIZE = 10000  # In-memory LRU entries
+CLASSIFICATION_CACHE_MAX_ENTRIES = 200000  # On-disk entries, least recently used evicted first
+CLASSIFICATION_CACHE_TTL_DAYS = 90  # 0 disables expiry
@@ -0,0 +1,92 @@
+"""
+Per-run context: which app and locale a run is for, its reporting window,
+and where its files go.
+
+Every api action and stage takes a RunContext instead of reading (or
+overwriting) config.APP_ID, so one process can serve several apps at once
+without their runs clobbering each other. Per-run files live in a
+directory per app and locale under config.DATA_DIR / config.OUTPUT_DIR.
+The review store (and its weekly aggregates) and the scrape high-water
+marks are shared, keyed by app and locale, so runs for two locales of one
+app never see each other's reviews; the classification cache is shared
+by content.
+"""
+import os
+from collections import namedtuple
+from datetime import datetime, timedelta
+from . import config
+from .storage.review_store import locale_key
+
+class RunContext(namedtuple("RunContext", ["app_id", "lang", "country", "weeks_back", "data_dir", "output_dir"])):
+    __slots__ = ()
+
+    @classmethod
+    def for_app(cls, app_id, lang=None, country=None, weeks_back=None, data_dir=None, output_dir=None):
+        """Context for one app; anything left out comes from config."""
+        lang = lang or config.LANG
+        country = country or config.COUNTRY
+        key = f"{app_id}_{lang}_{country}"
+        return cls(
+            app_id=app_id,
+            lang=lang,
+            country=country,
+            weeks_back=weeks_back or config.WEEKS_BACK,
+            data_dir=data_dir or os.path.join(config.DATA_DIR, "apps", key),
+            output_dir=output_dir or os.path.join(config.OUTPUT_DIR, key),
+        )
+
+    @classmethod
+    def from_url(cls, app_url, **kwargs):
+        """Context for a Google Play URL (...details?id=<app_id>); ValueError if it has no id."""
+        try:
+            app_id = app_url.split("id=")[1].split("&")[0]
+        except IndexError:
+            raise ValueError("Invalid URL format")
+        if not app_id:
+            raise ValueError("Invalid URL format")
+        return cls.for_app(app_id, **kwargs)
+
+    @classmethod
+    def default(cls):
+        return cls.for_app(config.APP_ID)
+
+    @property
+    def locale(self):
+        """The review store's locale key for this run."""
+        return locale_key(self.lang, self.country)
+
+    def window_start(self, now=None):
+        """Start of the reporting window, in the stored date format."""
+        return ((now or datetime.now()) - timedelta(weeks=self.weeks_back)).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    @property
+    def filtered_reviews_file(self):
+        return os.path.join(self.data_dir, "reviews_filtered.json")
+
+    @property
+    def tagged_reviews_file(self):
+        return os.path.join(self.data_dir, "reviews_tagged.json")
+
+    @property
+    def stream_sink_file(self):
+        return os.path.join(self.data_dir, "reviews_stream.jsonl")
+
+    @property
+    def pipeline_state_file(self):
+        return os.path.join(self.data_dir, "pipeline_state.json")
+
+    @property
+    def reviews_csv_file(self):
+        return os.path.join(self.output_dir, "reviews_latest.csv")
+
+    @property
+    def weekly_report_file(self):
+        return os.path.join(self.output_dir, "weekly_pulse.md")
+
+    @property
+    def email_draft_file(self):
+        return os.path.join(self.output_dir, "email_draft.txt")
+
+    @property
+    def theme_discovery_file(self):
+        return os.path.join(self.output_dir, "theme_discovery.json")
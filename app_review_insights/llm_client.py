@@ -1,10 +1,53 @@
-import random
+import atexit
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import List
+from urllib.parse import urlparse
+import requests
 from . import config
+from .processing.keyword_themes import get_default_engine
+from .processing import tfidf_classifier
+from .scraping.fetch_control import get_controller
+from .storage.classification_cache import ClassificationCache, cache_key
+
+# Providers that classify in-process; worth spreading across CPU cores
+LOCAL_PROVIDERS = {"mock", "tfidf"}
+
+SYSTEM_PROMPT = (
+    "You categorize app store reviews. Answer with JSON only, "
+    "using exactly one of the given themes per review."
+)
+
+class _KeywordTheme(str):
+    """A keyword-fallback theme standing in for an unusable LLM answer; never cached."""
 
 class LLMClient:
-    def __init__(self, provider=config.LLM_PROVIDER):
-        self.provider = provider
+    def __init__(self, provider=None, api_base=None, model=None, api_key=None, cache=None):
+        self.provider = provider or config.LLM_PROVIDER
+        # Non-mock providers speak the OpenAI-compatible chat-completions API,
+        # so pointing api_base at a local stand-in server works for testing
+        self.api_base = (api_base or config.LLM_API_BASE).rstrip("/")
+        self.model = model or config.LLM_MODEL
+        self.api_key = api_key or os.getenv("LLM_API_KEY")
+        self._local = threading.local()
+        self.cache = cache
+        if self.cache is None and not self.is_local and config.CLASSIFICATION_CACHE_ENABLED:
+            self.cache = ClassificationCache()
+
+    def close(self):
+        if self.cache is not None:
+            self.cache.close()
+
+    @property
+    def is_local(self):
+        return self.provider in LOCAL_PROVIDERS
+
+    @property
+    def classifier_id(self):
+        """Identifies the classifier in cache keys; a model change invalidates old entries."""
+        return f"{self.provider}:{self.model}"
 
     def categorize_review(self, text: str, themes: List[str]) -> str:
         """
@@ -13,26 +56,158 @@ class LLMClient:
         """
         if self.provider == "mock":
             return self._mock_categorize(text, themes)
+        if self.provider == "tfidf":
+            return self._tfidf_categorize([text], themes)[0]
+
+        prompt = (
+            f"Themes: {json.dumps(themes)}\n"
+            'Reply as {"theme": "<theme>"}.\n\n'
+            f"Review: {text}"
+        )
+        try:
+            theme = json.loads(self._chat(prompt)).get("theme")
+        except (ValueError, AttributeError):
+            theme = None
+        if theme not in themes:
+            print("WARNING: Unusable LLM answer, using keyword theme instead.")
+            return _KeywordTheme(self._mock_categorize(text, themes))
+        return theme
+
+    def categorize_batch(self, texts: List[str], themes: List[str],
+                         batch_size=None, max_concurrency=None) -> List[str]:
+        """
+        Categorizes many reviews, `batch_size` per request with up to
+        `max_concurrency` requests in flight. Returns themes in input order.
+        A batch whose answer can't be parsed is retried one review at a time.
+        Reviews already in the classification cache skip the provider.
+        """
+        texts = list(texts)
+        if self.provider == "mock":
+            return [self._mock_categorize(t, themes) for t in texts]
+        if self.provider == "tfidf":
+            return self._tfidf_categorize(texts, themes)
+        if self.cache is None:
+            return self._categorize_uncached(texts, themes, batch_size, max_concurrency)
+
+        keys = [cache_key(t, themes, self.classifier_id) for t in texts]
+        known = self.cache.get_many(keys)
+        # Only unseen reviews go to the provider, each distinct text once
+        pending = {k: t for k, t in zip(keys, texts) if k not in known}
+        if pending:
+            fresh = dict(zip(pending, self._categorize_uncached(list(pending.values()), themes,
+                                                                batch_size, max_concurrency)))
+            # Caching a keyword fallback under the LLM's id would pin it for the TTL
+            self.cache.put_many({k: t for k, t in fresh.items() if not isinstance(t, _KeywordTheme)})
+            known.update(fresh)
+        print(f"Classification cache: {len(pending)} of {len(texts)} reviews sent to {self.provider} "
+              f"(hit rate {self.cache.hit_rate():.0%})")
+        return [str(known[k]) for k in keys]
+
+    def _categorize_uncached(self, texts, themes, batch_size, max_concurrency):
+        batch_size = batch_size or config.LLM_BATCH_SIZE
+        max_concurrency = max_concurrency or config.LLM_MAX_CONCURRENCY
+        batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+        if len(batches) <= 1 or max_concurrency <= 1:
+            results = [self._categorize_chunk(b, themes) for b in batches]
         else:
-            # Implement actual LLM call here (e.g., OpenAI API)
-            return self._mock_categorize(text, themes)
+            with ThreadPoolExecutor(max_workers=min(max_concurrency, len(batches))) as executor:
+                # map keeps batch order regardless of completion order
+                results = list(executor.map(lambda b: self._categorize_chunk(b, themes), batches))
+        return [theme for batch in results for theme in batch]
+
+    def _categorize_chunk(self, texts, themes):
+        numbered = "\n".join(f"{i}. {json.dumps(t)}" for i, t in enumerate(texts, 1))
+        prompt = (
+            f"Themes: {json.dumps(themes)}\n"
+            'Reply as {"results": [{"id": <review number>, "theme": "<theme>"}, ...]} '
+            "with one entry per review.\n\n"
+            f"Reviews:\n{numbered}"
+        )
+        try:
+            return self._parse_batch(self._chat(prompt), len(texts), themes)
+        except ValueError as e:
+            print(f"WARNING: Could not parse batch answer ({e}), falling back to per-review calls.")
+            return [self.categorize_review(t, themes) for t in texts]
+
+    def _parse_batch(self, content, count, themes):
+        data = json.loads(content)
+        if isinstance(data, dict):
+            data = data.get("results")
+        if not isinstance(data, list):
+            raise ValueError("no results list")
+
+        by_id = {}
+        for item in data:
+            if not isinstance(item, dict) or item.get("theme") not in themes:
+                raise ValueError(f"bad entry {item!r}")
+            try:
+                by_id[int(item.get("id"))] = item["theme"]
+            except (TypeError, ValueError):
+                raise ValueError(f"bad id in {item!r}")
+        if sorted(by_id) != list(range(1, count + 1)):
+            raise ValueError(f"expected ids 1..{count}, got {sorted(by_id)}")
+        return [by_id[i] for i in range(1, count + 1)]
+
+    def _session(self):
+        # requests.Session isn't safe to share across threads
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            self._local.session = session
+        return session
+
+    def _post(self, payload):
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        response = self._session().post(f"{self.api_base}/chat/completions", json=payload,
+                                        headers=headers, timeout=config.LLM_TIMEOUT)
+        response.raise_for_status()
+        return response.json()
+
+    def _chat(self, prompt):
+        """One chat-completions round-trip; returns the message content."""
+        payload = {
+            "model": self.model,
+            "temperature": 0,
+            "response_format": {"type": "json_object"},
+            "messages": [
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": prompt},
+            ],
+        }
+        # Same rate limiting, retry/backoff and circuit breaking as the scrapers
+        body = get_controller(urlparse(self.api_base).netloc).call(self._post, payload)
+        try:
+            return body["choices"][0]["message"]["content"] or ""
+        except (KeyError, IndexError, TypeError):
+            raise ValueError("unexpected chat-completions response")
+
+    def _tfidf_categorize(self, texts, themes):
+        classifier = tfidf_classifier.get_classifier()
+        if classifier is None or not set(themes) & set(classifier.themes):
+            return [self._mock_categorize(t, themes) for t in texts]
+        return classifier.predict(texts, themes)
 
     def _mock_categorize(self, text: str, themes: List[str]) -> str:
-        text_lower = text.lower()
-        
-        # Simple keyword matching for mock implementation
-        if any(w in text_lower for w in ['support', 'customer', 'service', 'reply']):
-            return "Customer Support"
-        if any(w in text_lower for w in ['charge', 'fee', 'money', 'cost', 'brokerage']):
-            return "Pricing & Charges"
-        if any(w in text_lower for w in ['bug', 'crash', 'slow', 'lag', 'install', 'error']):
-            return "App Performance & Bugs"
-        if any(w in text_lower for w in ['feature', 'option', 'trade', 'stock', 'f&o', 'ipo']):
-            return "Trading & Features"
-        
-        # Default fallback
-        return "User Experience"
+        # Keyword engine: all config.THEME_KEYWORDS hits in one pass, best-scoring theme wins
+        return get_default_engine().classify(text, themes)
 
     def generate_summary(self, reviews: List[dict]) -> str:
         """Generates a summary of the reviews."""
         return f"Analyzed {len(reviews)} reviews. Users are discussing various topics ranging from performance to pricing."
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+def get_default_client():
+    """
+    Process-wide client for the configured provider, so every run in the
+    process shares one classification cache (and its in-memory tier).
+    """
+    key = (config.LLM_PROVIDER, config.LLM_API_BASE, config.LLM_MODEL)
+    with _clients_lock:
+        if key not in _clients:
+            _clients[key] = LLMClient()
+            atexit.register(_clients[key].close)
+        return _clients[key]
@@ -0,0 +1,310 @@
+"""
+Stage DAG executor with memoized, fingerprinted stage outputs.
+
+A stage declares the stages it depends on, the files it produces, the
+config values and source modules that shape its output, and optionally a
+`reads` callable summarizing non-file state it reads (e.g. its slice of
+the review store). Its fingerprint hashes all of those plus the current
+content hashes of its dependencies' outputs; when the fingerprint matches
+the last successful run, the outputs are still on disk unchanged and the
+run is younger than the stage's `max_age` (if any), the stage is skipped. Stages whose
+dependencies are done run concurrently, and every stage is timed.
+
+The state file also holds a manifest of the current run: which stages
+completed, with which input hashes, and the per-run `extra` values the
+fingerprints used. It is rewritten atomically after every stage, so a run
+that crashed part-way resumes from its completed stages (with the same
+`extra` values) instead of starting over. A run that finished with a failed stage is not resumed: the next
+run starts fresh, so a stage that keeps failing can't pin old extras.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from collections import namedtuple
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from . import config
+from .storage.atomic import write_json
+
+# fn() returns an api-style result dict ({"status": ..., ...});
+# optional stages may fail without stopping the stages that don't need them.
+# reads() is evaluated once the dependencies are done; max_age is in seconds
+Stage = namedtuple("Stage", ["name", "fn", "deps", "outputs", "config_keys", "modules", "extra", "optional",
+                             "reads", "max_age"],
+                   defaults=((), (), (), (), None, False, None, None))
+StageRun = namedtuple("StageRun", ["name", "status", "seconds", "result"])
+
+# Config every stage's output depends on; the run's own parameters (app,
+# locale, window) come in through Pipeline's `params`
+COMMON_CONFIG_KEYS = ("THEME_LIST", "LLM_PROVIDER", "LLM_MODEL")
+
+def file_hash(path):
+    if not os.path.exists(path):
+        return None
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _code_hash(modules):
+    digest = hashlib.sha256()
+    for module in modules:
+        with open(module.__file__, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+class Pipeline:
+    def __init__(self, stages, state_file, max_workers=None, params=None):
+        self.stages = {s.name: s for s in stages}
+        for s in stages:
+            missing = set(s.deps) - set(self.stages)
+            if missing:
+                raise ValueError(f"Stage {s.name} depends on unknown stages {sorted(missing)}")
+        self.state_file = state_file
+        self.params = params or {}
+        self.max_workers = max_workers or config.PIPELINE_MAX_WORKERS
+        self.lock = threading.Lock()
+        saved = self._load_state()
+        # Files from before the run manifest hold just the stages
+        self.state = saved.get("stages", {}) if "run" in saved else {}
+        self.manifest = saved.get("run")
+        self.extras = {}
+        self._check_acyclic()
+
+    def _check_acyclic(self):
+        visiting, done = set(), set()
+        def visit(name):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"Stage graph has a cycle through {name}")
+            visiting.add(name)
+            for dep in self.stages[name].deps:
+                visit(dep)
+            visiting.discard(name)
+            done.add(name)
+        for name in self.stages:
+            visit(name)
+
+    def _load_state(self):
+        if not os.path.exists(self.state_file):
+            return {}
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            print(f"WARNING: Ignoring unreadable pipeline state {self.state_file}")
+            return {}
+
+    def _save_state(self):
+        write_json(self.state_file, {"run": self.manifest, "stages": self.state}, indent=2, default=str)
+
+    def _resumable(self):
+        """The previous run's manifest if it crashed (never finished) recently enough to pick up."""
+        run = self.manifest
+        # "failed" runs finished; only a run still marked "running" was cut short
+        if not run or run.get("status") != "running":
+            return None
+        if time.time() - run.get("started_at_ts", 0) > config.PIPELINE_RESUME_HOURS * 3600:
+            return None
+        return run
+
+    def _start_run(self, force):
+        previous = None if force is True else self._resumable()
+        if previous:
+            done = [name for name in previous.get("completed", {}) if name in self.stages]
+            print(f"Resuming pipeline run {previous['run_id']} ({', '.join(done) or 'no stages'} already done).")
+            self.extras = {name: previous.get("extras", {}).get(name) for name in self.stages}
+            self.manifest = previous
+            self.manifest["status"] = "running"
+            self.manifest["resumed"] = self.manifest.get("resumed", 0) + 1
+        else:
+            self.extras = {name: s.extra() if callable(s.extra) else s.extra for name, s in self.stages.items()}
+            self.manifest = {
+                "run_id": uuid.uuid4().hex[:12],
+                "status": "running",
+                "started_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "started_at_ts": time.time(),
+                "extras": self.extras,
+                "completed": {},
+            }
+        with self.lock:
+            self._save_state()
+
+    def fingerprint(self, stage):
+        parts = {
+            "stage": stage.name,
+            "params": self.params,
+            "config": {key: getattr(config, key, None) for key in COMMON_CONFIG_KEYS + tuple(stage.config_keys)},
+            "code": _code_hash(stage.modules),
+            "extra": self.extras[stage.name] if stage.name in self.extras else (
+                stage.extra() if callable(stage.extra) else stage.extra),
+            # What the dependencies actually produced, not just whether they ran
+            "inputs": {dep: {path: file_hash(path) for path in self.stages[dep].outputs} for dep in stage.deps},
+            "reads": stage.reads() if stage.reads else None,
+        }
+        return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    def _is_fresh(self, stage, fingerprint):
+        previous = self.state.get(stage.name)
+        if not previous or previous.get("fingerprint") != fingerprint:
+            return False
+        if stage.max_age is not None and time.time() - previous.get("finished_at_ts", 0) > stage.max_age:
+            return False
+        # Outputs deleted or edited since the last run invalidate it too
+        return all(file_hash(path) == digest for path, digest in previous.get("outputs", {}).items())
+
+    def _input_hashes(self, stage):
+        return {path: file_hash(path) for dep in stage.deps for path in self.stages[dep].outputs}
+
+    def _complete(self, stage, status, fingerprint, inputs):
+        # Caller holds self.lock
+        self.manifest["completed"][stage.name] = {
+            "status": status,
+            "fingerprint": fingerprint,
+            "inputs": inputs,
+            "finished_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        self._save_state()
+
+    def _run_stage(self, stage, force):
+        start = time.perf_counter()
+        inputs = self._input_hashes(stage)
+        fingerprint = self.fingerprint(stage)
+        if not force and self._is_fresh(stage, fingerprint):
+            with self.lock:
+                self._complete(stage, "cached", fingerprint, inputs)
+            return StageRun(stage.name, "cached", time.perf_counter() - start, self.state[stage.name].get("result"))
+
+        try:
+            result = stage.fn()
+        except Exception as e:
+            result = {"status": "error", "message": f"{type(e).__name__}: {e}"}
+        seconds = time.perf_counter() - start
+        if result.get("status") != "success":
+            return StageRun(stage.name, "failed", seconds, result)
+
+        with self.lock:
+            self.state[stage.name] = {
+                "fingerprint": fingerprint,
+                "outputs": {path: file_hash(path) for path in stage.outputs},
+                "result": result,
+                "finished_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "finished_at_ts": time.time(),
+                "seconds": round(seconds, 3),
+            }
+            self._complete(stage, "ran", fingerprint, inputs)
+        return StageRun(stage.name, "ran", seconds, result)
+
+    def run(self, force=False, on_stage_done=None):
+        """
+        Runs every stage whose fingerprint changed (all stages with `force`,
+        or just the named ones if `force` is a collection of names).
+        A previous run that crashed is resumed unless everything is forced.
+        Returns {name: StageRun}; stages behind a failed required stage end
+        up "blocked".
+        """
+        self._start_run(force)
+        runs = {}
+        pending = dict(self.stages)
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while pending or running:
+                for name, stage in list(pending.items()):
+                    if any(runs.get(dep) and runs[dep].status in ("failed", "blocked") for dep in stage.deps):
+                        runs[name] = StageRun(name, "blocked", 0.0, None)
+                        del pending[name]
+                    elif all(dep in runs for dep in stage.deps):
+                        force_stage = force is True or (not isinstance(force, bool) and name in force)
+                        running[executor.submit(self._run_stage, stage, force_stage)] = name
+                        del pending[name]
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    run = future.result()
+                    del running[future]
+                    stage = self.stages[run.name]
+                    if run.status == "failed" and stage.optional:
+                        print(f"WARNING: Optional stage {run.name} failed: {run.result.get('message')}")
+                    runs[run.name] = run
+                    if on_stage_done:
+                        on_stage_done(run)
+
+        runs = {name: runs[name] for name in self.stages}
+        with self.lock:
+            # Completed stages stay cached through self.state either way
+            self.manifest["status"] = "complete" if self.succeeded(runs) else "failed"
+            self.manifest["finished_at"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+            self._save_state()
+        return runs
+
+    def succeeded(self, runs):
+        """True when every required stage ran or was reused."""
+        return all(run.status in ("ran", "cached") for name, run in runs.items() if not self.stages[name].optional)
+
+def format_timings(runs):
+    """One line per stage: status and wall time."""
+    return "\n".join(f"  {run.name:<12} {run.status:<8} {run.seconds:8.3f}s" for run in runs.values())
+
+def build_review_pipeline(ctx, state_file=None):
+    """
+    The review pipeline for one app (a context.RunContext) as a DAG:
+
+        scrape -> categorize -> report -> draft
+              \\-> discover (optional, runs alongside categorize)
+    """
+    from . import api
+    from .scraping import engine, google_play_scraper
+    from .processing import filters, redaction, theming, keyword_themes, dedup, sentiment, theme_discovery
+    from .reporting import weekly_note, trends, email_draft
+    from . import llm_client
+    from .storage.review_store import ReviewStore, week_start
+
+    def store_slice(since):
+        # categorize and discover read the review store, not the scrape's
+        # JSON snapshot, so their fingerprints cover the rows they query
+        def reads():
+            with ReviewStore() as store:
+                return store.slice_state(app_name=ctx.app_id, locale=ctx.locale, since=since())
+        return reads
+
+    def report_week():
+        # The trend alerts end on the last complete week, so a week rollover
+        # changes the report even when no review did
+        return week_start(datetime.now().strftime("%Y-%m-%dT%H:%M:%SZ"))
+
+    def discovery_since():
+        return (datetime.now() - timedelta(weeks=config.DISCOVERY_WEEKS)).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    stages = [
+        # Scrapes are only repeated once the last one is this old, so
+        # re-running downstream stages never refetches
+        Stage("scrape", lambda: api.scrape_reviews_action(ctx=ctx),
+              outputs=(ctx.filtered_reviews_file,),
+              modules=(engine, google_play_scraper, filters, redaction),
+              max_age=config.SCRAPE_FRESHNESS_HOURS * 3600),
+        Stage("categorize", lambda: api.categorize_reviews_action(ctx), deps=("scrape",),
+              outputs=(ctx.tagged_reviews_file,),
+              config_keys=("THEME_KEYWORDS", "DEDUP_ENABLED", "DEDUP_THRESHOLD"),
+              modules=(theming, llm_client, keyword_themes, dedup, sentiment),
+              reads=store_slice(ctx.window_start)),
+        Stage("discover", lambda: api.discover_themes_action(ctx), deps=("scrape",),
+              outputs=(ctx.theme_discovery_file,),
+              config_keys=("DISCOVERY_WEEKS", "DISCOVERY_CLUSTERS"),
+              modules=(theme_discovery,), optional=True,
+              reads=store_slice(discovery_since)),
+        Stage("report", lambda: api.generate_weekly_note_action(ctx), deps=("categorize",),
+              outputs=(ctx.weekly_report_file,),
+              config_keys=("TREND_WINDOW_WEEKS", "TREND_Z_THRESHOLD", "TREND_MIN_COUNT", "TREND_HISTORY_WEEKS"),
+              modules=(weekly_note, trends),
+              reads=report_week),
+        Stage("draft", lambda: api.create_email_draft_action(ctx), deps=("report",),
+              outputs=(ctx.email_draft_file,),
+              modules=(email_draft,)),
+    ]
+    return Pipeline(stages, state_file or ctx.pipeline_state_file, params=ctx._asdict())
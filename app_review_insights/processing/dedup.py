@@ -0,0 +1,122 @@
+"""
+Near-duplicate review detection with MinHash signatures and LSH banding.
+
+Each review becomes a set of word shingles, summarized by a MinHash
+signature whose per-position agreement estimates Jaccard similarity.
+Signatures are cut into bands; reviews sharing any band land in the same
+bucket and become candidates, so only bucket-mates are ever compared
+(no all-pairs pass). Candidates are confirmed against the bucket's first
+member and merged with union-find, giving one group per templated or
+copy-pasted complaint. Signatures of already-grouped texts can be put in
+front of new ones (group_signatures), so new copies join the old groups.
+"""
+import re
+import zlib
+import numpy as np
+import pandas as pd
+from .. import config
+
+_WORD = re.compile(r"\w+")
+
+def _word_hashes(words):
+    """crc32 of each word; factorizing first means each distinct word is hashed once."""
+    codes, uniques = pd.factorize(np.array(words, dtype=object))
+    hashes = np.fromiter((zlib.crc32(w.encode("utf-8")) for w in uniques), dtype=np.uint64, count=len(uniques))
+    return hashes[codes]
+
+def shingle_hashes(texts, size=None):
+    """
+    Hashed word n-grams for a batch of texts, as (flat_hashes, offsets):
+    text i owns flat_hashes[offsets[i]:offsets[i + 1]]. Texts of `size`
+    words or fewer shingle as a whole, so every text has at least one.
+    """
+    size = size or config.DEDUP_SHINGLE_SIZE
+    tokenized = [_WORD.findall((t or "").lower()) or [""] for t in texts]
+    lengths = np.fromiter((len(w) for w in tokenized), dtype=np.int64, count=len(tokenized))
+    starts = np.r_[0, np.cumsum(lengths)[:-1]]
+    words = _word_hashes([w for ws in tokenized for w in ws])
+    doc = np.repeat(np.arange(len(texts)), lengths)
+    total = len(words)
+
+    # Window hash = sum of word_hash * weight over the next `size` words of the same text
+    weights = np.random.default_rng(11).integers(1, 1 << 62, size=size, dtype=np.uint64)
+    padded_words = np.r_[words, np.zeros(size - 1, dtype=np.uint64)]
+    padded_doc = np.r_[doc, np.full(size - 1, -1)]
+    grams = np.zeros(total, dtype=np.uint64)
+    for j in range(size):
+        same_text = padded_doc[j:j + total] == doc
+        grams += np.where(same_text, padded_words[j:j + total] * weights[j], np.uint64(0))
+
+    # Keep windows that start early enough to fit (or the single window of a short text)
+    position = np.arange(total) - starts[doc]
+    grams = grams[position <= np.maximum(lengths - size, 0)[doc]]
+    counts = np.maximum(lengths - size + 1, 1)
+    return grams, np.r_[0, np.cumsum(counts)]
+
+def minhash_signatures(texts, num_perm=None, seed=42, chunk_size=2000):
+    """(len(texts), num_perm) uint32 MinHash signatures."""
+    num_perm = num_perm or config.DEDUP_NUM_PERM
+    rng = np.random.default_rng(seed)
+    # Multiply-shift hashes h(x) = (a*x + b) >> 32 with wrapping 64-bit
+    # arithmetic: one permutation per row, and no modulo in the hot loop
+    a = (rng.integers(0, 1 << 63, size=num_perm, dtype=np.uint64) | np.uint64(1))[:, None]
+    b = rng.integers(0, 1 << 63, size=num_perm, dtype=np.uint64)[:, None]
+
+    signatures = np.empty((len(texts), num_perm), dtype=np.uint32)
+    for start in range(0, len(texts), chunk_size):
+        grams, offsets = shingle_hashes(texts[start:start + chunk_size])
+        permuted = ((a * grams + b) >> np.uint64(32)).astype(np.uint32)
+        # Every text has at least one shingle, so reduceat segments are never empty
+        signatures[start:start + len(offsets) - 1] = np.minimum.reduceat(permuted, offsets[:-1], axis=1).T
+    return signatures
+
+def _find(parent, i):
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+def group_signatures(signatures, threshold=None, bands=None):
+    """
+    Group label per signature row: the index of the group's first row, so a
+    row is a representative exactly when its label equals its own index.
+    """
+    threshold = threshold if threshold is not None else config.DEDUP_THRESHOLD
+    bands = bands or config.DEDUP_BANDS
+    n = len(signatures)
+    if n < 2:
+        return np.arange(n)
+
+    rows = signatures.shape[1] // bands
+    mixers = np.random.default_rng(7).integers(1, 1 << 62, size=rows, dtype=np.uint64)
+    parent = list(range(n))
+    index = np.arange(n)
+
+    for band in range(bands):
+        # Collapse the band to one key; a rare key collision only adds a candidate
+        keys = (signatures[:, band * rows:(band + 1) * rows].astype(np.uint64) * mixers).sum(axis=1)
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        starts = np.r_[True, sorted_keys[1:] != sorted_keys[:-1]]
+        heads = order[np.maximum.accumulate(np.where(starts, index, 0))]
+        members = order[~starts]
+        if not len(members):
+            continue
+        heads = heads[~starts]
+        similar = (signatures[members] == signatures[heads]).mean(axis=1) >= threshold
+        for i, j in zip(members[similar].tolist(), heads[similar].tolist()):
+            ri, rj = _find(parent, i), _find(parent, j)
+            if ri != rj:
+                # The earlier row stays the root, so it becomes the representative
+                parent[max(ri, rj)] = min(ri, rj)
+
+    return np.array([_find(parent, i) for i in range(n)])
+
+def near_duplicate_groups(texts, threshold=None, bands=None):
+    """
+    Group label per text: the index of the group's first text, so a text
+    is a representative exactly when its label equals its own index.
+    """
+    if len(texts) < 2:
+        return np.arange(len(texts))
+    return group_signatures(minhash_signatures(texts), threshold, bands)
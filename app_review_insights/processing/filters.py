@@ -1,76 +1,132 @@
+import pandas as pd
 from datetime import datetime, timedelta
 from .. import config
-
-import re
+from .redaction import DEFAULT_ENGINE
+from ..storage.review_store import locale_key
 
 def sanitize_review_text(text):
     """
     Redacts PII from text:
-    - Emails
+    - Emails and UPI handles
+    - PAN and Aadhaar-style IDs
     - Phone numbers (7+ digits)
-    - Names (e.g., "- Name", "by Name")
+    - Names (e.g., "- Name", "by Name", but not "by Monday")
+    Runs every detector in a single pass; see processing/redaction.py.
+    """
+    return DEFAULT_ENGINE.redact_text(text)
+
+def normalize_review(r, app_id, cutoff_date, locale=None):
     """
-    if not text:
-        return ""
-        
-    # Redact Emails
-    text = re.sub(r'[\w\.-]+@[\w\.-]+\.\w+', '[EMAIL REDACTED]', text)
-    
-    # Redact Phone Numbers (7+ digits)
-    text = re.sub(r'\b\d{7,}\b', '[PHONE REDACTED]', text)
-    
-    # Redact Names (Simple heuristic for "- Name", "~ Name", "by Name")
-    # Matches hyphen/tilde/by followed by capitalized words
-    text = re.sub(r'(?:-|~|by)\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)', '[NAME REDACTED]', text)
-    
-    return text
-
-def filter_reviews(reviews_data):
+    Applies the date/length filter and PII redaction to one raw review.
+    Returns the normalized review, or None if it is filtered out.
+    `locale` is the store locale it was scraped for (default from config).
+    """
+    # Parse date
+    review_date_str = r.get('at') or r.get('date')
+    if not review_date_str:
+        return None
+
+    try:
+        review_date = datetime.strptime(review_date_str, "%Y-%m-%dT%H:%M:%SZ")
+    except ValueError:
+        # Try alternative format if needed, or skip
+        return None
+
+    if review_date < cutoff_date:
+        return None
+
+    # Length check
+    content = r.get('content') or r.get('text', '')
+    word_count = len(content.split())
+    char_count = len(content)
+
+    if word_count < config.MIN_WORD_COUNT and char_count < config.MIN_CHAR_COUNT:
+        return None
+
+    # PII Redaction
+    sanitized_text = sanitize_review_text(content.replace("\n", " "))
+
+    # Normalize structure
+    return {
+        "platform": "Google Play",
+        "app_name": app_id,
+        "locale": locale or locale_key(),
+        "review_id": r.get('reviewId'),
+        "date": review_date_str,
+        "rating": r.get('score') or r.get('rating'),
+        # Drop reviewer identity as requested
+        "title": "",
+        "text": sanitized_text
+    }
+
+def review_filter_mask(dates, contents, cutoff_date=None):
     """
-    Filters reviews based on date (last 8-10 weeks) and length.
+    Vectorized date and length filter shared by both platforms.
+    `dates` and `contents` are equal-length sequences (lists or Series);
+    returns a boolean array that is True for reviews to keep.
     """
-    filtered = []
-    cutoff_date = datetime.now() - timedelta(weeks=config.WEEKS_BACK)
-    
+    if cutoff_date is None:
+        cutoff_date = datetime.now() - timedelta(weeks=config.WEEKS_BACK)
+
+    parsed = pd.to_datetime(pd.Series(dates, dtype=object), format="%Y-%m-%dT%H:%M:%SZ", errors="coerce")
+    keep = (parsed.notna() & (parsed >= cutoff_date)).to_numpy(copy=True)
+
+    # A review passes on length alone once it has MIN_CHAR_COUNT chars, so
+    # only the short ones need their words counted
+    contents = pd.Series(contents, dtype=object).fillna("").astype(str)
+    short = keep & (contents.str.len() < config.MIN_CHAR_COUNT).to_numpy()
+    if short.any():
+        word_counts = contents[short].str.split().str.len().to_numpy()
+        keep[short] = word_counts >= config.MIN_WORD_COUNT
+    return keep
+
+def filter_reviews(reviews_data, app_id=None, weeks_back=None, locale=None):
+    """
+    Filters reviews based on date (last `weeks_back` weeks, default
+    config.WEEKS_BACK) and length.
+    `app_id` and `locale` label the normalized reviews (defaults from config).
+    Gives the same output as applying normalize_review to each review,
+    with the date parsing and length checks done column-wise.
+    """
+    app_id = app_id or config.APP_ID
+    locale = locale or locale_key()
+    cutoff_date = datetime.now() - timedelta(weeks=weeks_back or config.WEEKS_BACK)
+
     print(f"Filtering reviews since {cutoff_date.date()}...")
-    
-    for r in reviews_data:
-        # Parse date
-        review_date_str = r.get('at') or r.get('date')
-        if not review_date_str:
-            continue
-            
-        try:
-            review_date = datetime.strptime(review_date_str, "%Y-%m-%dT%H:%M:%SZ")
-        except ValueError:
-            # Try alternative format if needed, or skip
-            continue
-            
-        if review_date < cutoff_date:
-            continue
-            
-        # Length check
-        content = r.get('content') or r.get('text', '')
-        word_count = len(content.split())
-        char_count = len(content)
-        
-        if word_count < config.MIN_WORD_COUNT and char_count < config.MIN_CHAR_COUNT:
-            continue
-            
-        # PII Redaction
-        sanitized_text = sanitize_review_text(content.replace("\n", " "))
-
-        # Normalize structure
-        normalized_review = {
+
+    if not reviews_data:
+        return []
+
+    dates = [r.get('at') or r.get('date') for r in reviews_data]
+    contents = [r.get('content') or r.get('text', '') for r in reviews_data]
+    keep = review_filter_mask(dates, contents, cutoff_date)
+
+    kept = keep.nonzero()[0].tolist()
+    # PII Redaction
+    sanitized_texts = DEFAULT_ENGINE.redact_batch([contents[i].replace("\n", " ") for i in kept])
+
+    # Normalize structure
+    return [
+        {
             "platform": "Google Play",
-            "app_name": config.APP_ID,
-            "date": review_date_str,
-            "rating": r.get('score') or r.get('rating'),
+            "app_name": app_id,
+            "locale": locale,
+            "review_id": reviews_data[i].get('reviewId'),
+            "date": dates[i],
+            "rating": reviews_data[i].get('score') or reviews_data[i].get('rating'),
             # Drop reviewer identity as requested
-            "title": "", 
-            "text": sanitized_text
+            "title": "",
+            "text": text
         }
-        
-        filtered.append(normalized_review)
-        
-    return filtered
+        for i, text in zip(kept, sanitized_texts)
+    ]
+
+def iter_filter_reviews(reviews_iter, app_id=None, weeks_back=None, locale=None):
+    """Streaming filter_reviews: yields normalized reviews one at a time."""
+    app_id = app_id or config.APP_ID
+    cutoff_date = datetime.now() - timedelta(weeks=weeks_back or config.WEEKS_BACK)
+
+    for r in reviews_iter:
+        normalized_review = normalize_review(r, app_id, cutoff_date, locale)
+        if normalized_review is not None:
+            yield normalized_review
@@ -0,0 +1,108 @@
+"""
+Keyword theme engine built on an Aho-Corasick automaton over word tokens.
+
+Keywords and phrases from config.THEME_KEYWORDS are compiled once into a
+token-level automaton whose failure links are folded into a full transition
+table, so each review costs one tokenization plus one table lookup per
+token. Every keyword occurrence is found in a single pass (overlapping
+phrases included), themes are scored by summed weight and returned ranked.
+Because the alphabet is whole tokens, matches always fall on word boundaries.
+"""
+from collections import deque
+from .. import config
+
+# Byte table that lowercases A-Z and turns everything outside [a-z0-9&] into
+# a space, so tokenizing is encode + translate + split, all in C
+_TOKEN_BYTES = b"abcdefghijklmnopqrstuvwxyz0123456789&"
+_TOKEN_TABLE = bytes(
+    c + 32 if 65 <= c <= 90 else c if c in _TOKEN_BYTES else 32
+    for c in range(256)
+)
+
+def tokenize(text):
+    """Lowercase [a-z0-9&]+ runs of `text` as bytes; other characters separate tokens."""
+    # Non-ASCII characters become "?" and so act as separators
+    return text.encode("ascii", "replace").translate(_TOKEN_TABLE).split()
+
+class KeywordThemeEngine:
+    def __init__(self, theme_keywords=None, fallback=None):
+        theme_keywords = theme_keywords if theme_keywords is not None else config.THEME_KEYWORDS
+        self.themes = list(theme_keywords)
+        self.fallback = fallback or config.THEME_FALLBACK
+
+        # Trie over token sequences: goto[state][token] -> state
+        goto = [{}]
+        outputs = [[]]
+        for theme_index, keywords in enumerate(theme_keywords.values()):
+            for keyword, weight in keywords.items():
+                state = 0
+                for token in tokenize(keyword):
+                    if token not in goto[state]:
+                        goto.append({})
+                        outputs.append([])
+                        goto[state][token] = len(goto) - 1
+                    state = goto[state][token]
+                outputs[state].append((theme_index, weight))
+
+        # Breadth-first failure links, folded into a complete transition
+        # table so scanning never has to walk failure chains
+        self.vocabulary = frozenset(goto[0])
+        fail = [0] * len(goto)
+        delta = [dict(goto[0])] + [None] * (len(goto) - 1)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            delta[state] = dict(delta[fail[state]])
+            for token, child in goto[state].items():
+                fail[child] = delta[fail[state]].get(token, 0) if state else 0
+                outputs[child] = outputs[child] + outputs[fail[child]]
+                delta[state][token] = child
+                queue.append(child)
+        self.delta = delta
+        self.outputs = [tuple(o) for o in outputs]
+
+    def scores(self, text):
+        """Returns a list of per-theme scores, aligned with self.themes."""
+        scores = [0] * len(self.themes)
+        tokens = tokenize(text)
+        if self.vocabulary.isdisjoint(tokens):
+            return scores
+
+        delta, outputs = self.delta, self.outputs
+        state = 0
+        for token in tokens:
+            # Tokens outside the vocabulary can't continue any keyword
+            state = delta[state].get(token, 0)
+            for theme_index, weight in outputs[state]:
+                scores[theme_index] += weight
+        return scores
+
+    def rank(self, text, themes=None):
+        """
+        Returns [(theme, score)] for every theme with a hit, best first;
+        ties keep config order. `themes` restricts the candidates.
+        """
+        ranked = [
+            (theme, score) for theme, score in zip(self.themes, self.scores(text))
+            if score and (themes is None or theme in themes)
+        ]
+        ranked.sort(key=lambda item: item[1], reverse=True)
+        return ranked
+
+    def classify(self, text, themes=None):
+        """The top-ranked theme, or the fallback theme when nothing matches."""
+        ranked = self.rank(text, themes)
+        if ranked:
+            return ranked[0][0]
+        if themes is None or self.fallback in themes:
+            return self.fallback
+        return themes[-1]
+
+_default_engine = None
+
+def get_default_engine():
+    """Shared engine built from config, compiled on first use."""
+    global _default_engine
+    if _default_engine is None:
+        _default_engine = KeywordThemeEngine()
+    return _default_engine
@@ -0,0 +1,207 @@
+"""
+Single-pass PII redaction. Detector patterns are combined into one
+alternation of named groups, so each text is scanned by the regex engine
+at most once however many detectors are registered; at a given position
+the first matching detector in list order wins.
+
+Each detector also lists literal trigger substrings it cannot match
+without (an "@", a digit, ...). Cheap C-level `in` checks pick the
+detectors that can possibly fire, and texts with no triggers skip the
+regex entirely. Combined patterns are compiled once per detector subset.
+
+A detector may also carry a `validate` check (e.g. a checksum) that the
+regex can't express. A match it rejects isn't redacted; the detectors
+after it in the list are tried on the same span instead.
+"""
+import re
+from collections import namedtuple
+
+_DIGITS = tuple("0123456789")
+
+# pattern is a regex string (use scoped flags such as (?i:...) if needed;
+# name any inner groups, prefixed with the detector name);
+# triggers are substrings the text must contain for the detector to run,
+# an empty tuple means it always runs; validate, if set, takes the matched
+# text and returns False for a match that should not be redacted
+Detector = namedtuple("Detector", ["name", "pattern", "replacement", "triggers", "validate"],
+                      defaults=((), None))
+Redaction = namedtuple("Redaction", ["detector", "start", "end", "replacement"])
+RedactionResult = namedtuple("RedactionResult", ["text", "redactions"])
+
+# Capitalized words that follow "by"/"-" without being anyone's name
+_NOT_NAMES = (
+    "Monday|Tuesday|Wednesday|Thursday|Friday|Saturday|Sunday|"
+    "January|February|March|April|May|June|July|August|September|October|November|December|"
+    "Today|Tomorrow|Yesterday|Tonight|Morning|Evening|Night|Noon|Midnight|"
+    "The|This|That|These|Those|Far|Default|Design|Mistake|Chance|Accident"
+)
+
+# Verhoeff dihedral-group tables; the last Aadhaar digit is this checksum
+_VERHOEFF_MULTIPLY = [
+    [0, 1, 2, 3, 4, 5, 6, 7, 8, 9], [1, 2, 3, 4, 0, 6, 7, 8, 9, 5],
+    [2, 3, 4, 0, 1, 7, 8, 9, 5, 6], [3, 4, 0, 1, 2, 8, 9, 5, 6, 7],
+    [4, 0, 1, 2, 3, 9, 5, 6, 7, 8], [5, 9, 8, 7, 6, 0, 4, 3, 2, 1],
+    [6, 5, 9, 8, 7, 1, 0, 4, 3, 2], [7, 6, 5, 9, 8, 2, 1, 0, 4, 3],
+    [8, 7, 6, 5, 9, 3, 2, 1, 0, 4], [9, 8, 7, 6, 5, 4, 3, 2, 1, 0],
+]
+_VERHOEFF_PERMUTE = [
+    [0, 1, 2, 3, 4, 5, 6, 7, 8, 9], [1, 5, 7, 6, 2, 8, 3, 0, 9, 4],
+    [5, 8, 0, 3, 7, 9, 6, 1, 4, 2], [8, 9, 1, 6, 0, 4, 3, 5, 2, 7],
+    [9, 4, 5, 3, 1, 2, 7, 6, 8, 0], [4, 2, 8, 6, 5, 7, 3, 9, 0, 1],
+    [2, 7, 9, 3, 8, 0, 6, 4, 1, 5], [7, 0, 4, 6, 9, 1, 3, 2, 5, 8],
+]
+
+def verhoeff_valid(number):
+    """True when the digits of `number` (separators ignored) pass the Verhoeff check."""
+    check = 0
+    for i, digit in enumerate(reversed([int(c) for c in number if c.isdigit()])):
+        check = _VERHOEFF_MULTIPLY[check][_VERHOEFF_PERMUTE[i % 8][digit]]
+    return check == 0
+
+_YEAR_RUN = re.compile(r"(?:19|20)\d\d([ -])(?:19|20)\d\d\1(?:19|20)\d\d")
+
+def _is_aadhaar(number):
+    # One in ten digit runs passes the checksum by chance; three separated
+    # years ("2023 2024 2025") are read as years even then
+    return verhoeff_valid(number) and not _YEAR_RUN.fullmatch(number)
+
+DEFAULT_DETECTORS = [
+    Detector("email", r"[\w\.-]+@[\w\.-]+\.\w+", "[EMAIL REDACTED]", ("@",)),
+    # Dotless handle@bank, e.g. name@okaxis; dotted domains are caught as emails above
+    Detector("upi", r"\b[\w.-]{2,}@[A-Za-z]{2,}\b", "[UPI REDACTED]", ("@",)),
+    Detector("pan", r"\b[A-Z]{5}\d{4}[A-Z]\b", "[PAN REDACTED]", _DIGITS),
+    # 12 digits, optionally grouped 4-4-4 with one separator throughout; Aadhaar
+    # numbers never start with 0 or 1 and end in a Verhoeff check digit, so
+    # runs like "2023 2024 2025" are left alone. Must precede the phone detector
+    Detector(
+        "aadhaar",
+        r"\b[2-9]\d{3}(?P<aadhaar_sep>[ -]?)\d{4}(?P=aadhaar_sep)\d{4}\b",
+        "[AADHAAR REDACTED]",
+        _DIGITS,
+        _is_aadhaar
+    ),
+    Detector("phone", r"(?:\+91[ -]?)?\b[6-9]\d{4}[ -]\d{5}\b|\b\d{7,}\b", "[PHONE REDACTED]", _DIGITS),
+    # "- Name", "~ Name", "by Name", skipping dates and other non-names
+    Detector(
+        "name",
+        rf"(?:-|~|\bby)\s+(?!(?:{_NOT_NAMES})\b)[A-Z][a-z]+(?:\s+(?!(?:{_NOT_NAMES})\b)[A-Z][a-z]+)*",
+        "[NAME REDACTED]",
+        ("-", "~", "by")
+    ),
+]
+
+class RedactionEngine:
+    """Redacts all registered detectors in one scan per text."""
+
+    def __init__(self, detectors=None):
+        self.detectors = list(detectors or DEFAULT_DETECTORS)
+        self.replacements = {d.name: d.replacement for d in self.detectors}
+        if len(self.replacements) != len(self.detectors):
+            raise ValueError("Detector names must be unique.")
+        self.positions = {d.name: i for i, d in enumerate(self.detectors)}
+        self.validators = {d.name: d.validate for d in self.detectors}
+        # All detectors share one trigger test per distinct trigger tuple
+        self.trigger_groups = {}
+        for i, d in enumerate(self.detectors):
+            self.trigger_groups.setdefault(tuple(d.triggers), []).append(i)
+        self.patterns = {}
+        self.actives = {}
+        # Compile the full set up front so a bad pattern fails at construction
+        self._compile(tuple(range(len(self.detectors))))
+
+    def _compile(self, active):
+        pattern = self.patterns.get(active)
+        if pattern is None:
+            pattern = re.compile("|".join(
+                f"(?P<{self.detectors[i].name}>{self.detectors[i].pattern})" for i in active
+            ))
+            self.patterns[active] = pattern
+            self.actives[pattern] = active
+        return pattern
+
+    def _pattern_for(self, text):
+        """The combined pattern of the detectors whose triggers occur in `text`, or None."""
+        active = []
+        for triggers, indices in self.trigger_groups.items():
+            if not triggers or any(t in text for t in triggers):
+                active.extend(indices)
+        if not active:
+            return None
+        # Keep list order so detector priority is unchanged
+        return self._compile(tuple(sorted(active)))
+
+    def _hits(self, match):
+        """
+        (detector name, start, end) for `match`: the match itself, or when
+        its detector's validate rejects it, whatever the later active
+        detectors find within the same span.
+        """
+        name = match.lastgroup
+        validate = self.validators[name]
+        if validate is None or validate(match.group()):
+            return [(name, match.start(), match.end())]
+        later = tuple(i for i in self.actives[match.re] if i > self.positions[name])
+        if not later:
+            return []
+        hits = []
+        for inner in self._compile(later).finditer(match.string, match.start(), match.end()):
+            hits.extend(self._hits(inner))
+        return hits
+
+    def _replace(self, match):
+        if self.validators[match.lastgroup] is None:
+            return self.replacements[match.lastgroup]
+        parts = []
+        last = match.start()
+        for name, start, end in self._hits(match):
+            parts.append(match.string[last:start])
+            parts.append(self.replacements[name])
+            last = end
+        parts.append(match.string[last:match.end()])
+        return "".join(parts)
+
+    def redact_text(self, text):
+        """Returns the redacted text only (fast path, no span bookkeeping)."""
+        if not isinstance(text, str) or not text:
+            return ""
+        pattern = self._pattern_for(text)
+        return pattern.sub(self._replace, text) if pattern else text
+
+    def redact(self, text):
+        """
+        Returns a RedactionResult: the redacted text plus one Redaction per
+        hit, with start/end offsets into the original text.
+        """
+        if not isinstance(text, str) or not text:
+            return RedactionResult("", [])
+
+        pattern = self._pattern_for(text)
+        if pattern is None:
+            return RedactionResult(text, [])
+
+        redactions = []
+        parts = []
+        last = 0
+        for match in pattern.finditer(text):
+            for name, start, end in self._hits(match):
+                replacement = self.replacements[name]
+                redactions.append(Redaction(name, start, end, replacement))
+                parts.append(text[last:start])
+                parts.append(replacement)
+                last = end
+        parts.append(text[last:])
+        return RedactionResult("".join(parts), redactions)
+
+    def redact_batch(self, texts, with_spans=False):
+        """
+        Redacts a list or pandas Series of texts. Returns redacted strings
+        (or RedactionResults with `with_spans`) in the same container type;
+        a Series keeps its index.
+        """
+        redact = self.redact if with_spans else self.redact_text
+        results = [redact(t) for t in texts]
+        if hasattr(texts, "index") and hasattr(texts, "name") and not isinstance(texts, (list, tuple)):
+            return type(texts)(results, index=texts.index, name=texts.name)
+        return results
+
+DEFAULT_ENGINE = RedactionEngine()
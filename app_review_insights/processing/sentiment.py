@@ -0,0 +1,107 @@
+"""
+Lexicon-based sentiment scoring, vectorized over whole batches.
+
+The lexicon is compiled once into a token -> index map and parallel NumPy
+arrays of weights and negator/booster flags. A batch is tokenized, every
+token is looked up once, a negator flips the weight of the next token (or
+the one after a booster such as "very") within the same review, and the
+per-review sums come from a single np.add.reduceat. Sums are squashed into
+(-1, 1) as in VADER: s / sqrt(s^2 + 15).
+"""
+import re
+import numpy as np
+from .. import config
+
+_TOKEN = re.compile(r"[a-z']+")
+
+# Valence per word; tuned for app store reviews of a trading/investing app
+DEFAULT_LEXICON = {
+    # Positive
+    "good": 1.9, "great": 3.1, "excellent": 3.2, "awesome": 3.1, "amazing": 3.1, "nice": 1.8,
+    "best": 3.2, "better": 1.9, "love": 3.2, "loved": 2.9, "like": 1.2, "easy": 1.9,
+    "simple": 1.2, "smooth": 2.0, "fast": 1.5, "quick": 1.3, "helpful": 1.9, "useful": 1.9,
+    "reliable": 1.9, "superb": 3.1, "perfect": 2.7, "fantastic": 2.6, "wonderful": 2.7,
+    "brilliant": 2.8, "happy": 2.7, "satisfied": 2.0, "recommend": 1.5, "recommended": 1.5,
+    "friendly": 2.2, "transparent": 1.6, "clean": 1.7, "intuitive": 1.8, "convenient": 1.8,
+    "seamless": 2.0, "secure": 1.4, "safe": 1.9, "trusted": 2.0, "trust": 1.6, "thanks": 1.9,
+    "thank": 1.5, "cool": 1.3, "wow": 2.8, "impressive": 2.3, "responsive": 1.5,
+    "resolved": 1.5, "stable": 1.4, "lightweight": 1.2, "beginner": 0.5, "zero": 0.3,
+    # Negative
+    "bad": -2.5, "worst": -3.1, "poor": -2.1, "terrible": -2.9, "horrible": -2.9, "pathetic": -2.9,
+    "useless": -2.7, "waste": -2.2, "slow": -1.6, "lag": -1.7, "lags": -1.7, "lagging": -1.8,
+    "crash": -2.1, "crashes": -2.1, "crashed": -2.1, "crashing": -2.2, "bug": -1.6, "bugs": -1.6,
+    "buggy": -2.1, "glitch": -1.6, "glitches": -1.6, "hang": -1.6, "hangs": -1.6, "stuck": -1.9,
+    "freeze": -1.8, "freezes": -1.8, "error": -1.5, "errors": -1.5, "fail": -2.0, "failed": -2.0,
+    "fails": -2.0, "failure": -2.1, "issue": -1.1, "issues": -1.1, "problem": -1.5, "problems": -1.5,
+    "fraud": -3.2, "scam": -3.2, "cheat": -3.0, "cheating": -3.0, "hidden": -1.3, "disappointed": -2.2,
+    "disappointing": -2.2, "annoying": -2.1, "frustrating": -2.3, "rude": -2.3, "delay": -1.3,
+    "delayed": -1.4, "unable": -1.6, "cannot": -1.0, "can't": -1.0, "loss": -1.6, "lost": -1.6,
+    "expensive": -1.5, "costly": -1.5, "confusing": -1.6, "complicated": -1.4, "irritating": -2.2,
+    "hate": -2.7, "uninstall": -2.0, "uninstalled": -2.0, "unresponsive": -2.0,
+    "blocked": -1.6, "deducted": -1.2, "refund": -0.6, "worse": -2.1, "nonsense": -2.1,
+}
+
+# Flip (and dampen) the next token, or the one after a booster: "not good", "not very good"
+NEGATORS = ("not", "no", "never", "dont", "don't", "didnt", "didn't", "doesnt", "doesn't",
+            "isnt", "isn't", "wasnt", "wasn't", "cant", "can't", "cannot", "wont", "won't", "without")
+BOOSTERS = ("very", "really", "so", "too", "that", "much", "quite", "at", "all")
+_NEGATION_SCALE = -0.74
+_ALPHA = 15.0
+
+class SentimentScorer:
+    def __init__(self, lexicon=None, negators=NEGATORS, boosters=BOOSTERS):
+        lexicon = lexicon if lexicon is not None else DEFAULT_LEXICON
+        # Index 0 is the "unknown token" slot: weight 0, not a negator
+        words = [""] + sorted(set(lexicon) | set(negators) | set(boosters))
+        self.index = {w: i for i, w in enumerate(words)}
+        self.weights = np.array([lexicon.get(w, 0.0) for w in words], dtype=np.float32)
+        self.is_negator = np.array([w in negators for w in words], dtype=bool)
+        self.is_booster = np.array([w in boosters for w in words], dtype=bool)
+        self.weights[0] = 0.0
+        self.is_negator[0] = False
+        self.is_booster[0] = False
+
+    def score_batch(self, texts):
+        """Sentiment in (-1, 1) for each text, as a float32 array."""
+        tokenized = [_TOKEN.findall((t or "").lower()) or [""] for t in texts]
+        if not tokenized:
+            return np.zeros(0, dtype=np.float32)
+        lengths = np.fromiter((len(t) for t in tokenized), dtype=np.int64, count=len(tokenized))
+        offsets = np.r_[0, np.cumsum(lengths)[:-1]]
+        index = self.index
+        ids = np.fromiter((index.get(w, 0) for t in tokenized for w in t), dtype=np.int64, count=int(lengths.sum()))
+
+        weights = self.weights[ids]
+        negators = self.is_negator[ids]
+        boosters = self.is_booster[ids]
+        # A token is negated by a negator right before it in the same review,
+        # or two before it with a booster in between
+        position = np.arange(len(ids)) - np.repeat(offsets, lengths)
+        negated = np.zeros(len(ids), dtype=bool)
+        negated[1:] |= negators[:-1] & (position[1:] >= 1)
+        negated[2:] |= negators[:-2] & boosters[1:-1] & (position[2:] >= 2)
+        weights = np.where(negated, weights * _NEGATION_SCALE, weights)
+
+        sums = np.add.reduceat(weights, offsets)
+        return (sums / np.sqrt(sums * sums + _ALPHA)).astype(np.float32)
+
+    def score(self, text):
+        return float(self.score_batch([text])[0])
+
+def sentiment_labels(scores):
+    """"positive" / "neutral" / "negative" per score, using the config thresholds."""
+    scores = np.asarray(scores, dtype=np.float32)
+    return np.select(
+        [scores >= config.SENTIMENT_POSITIVE_THRESHOLD, scores <= config.SENTIMENT_NEGATIVE_THRESHOLD],
+        ["positive", "negative"],
+        default="neutral"
+    ).tolist()
+
+_default_scorer = None
+
+def get_default_scorer():
+    """Shared scorer built from DEFAULT_LEXICON, compiled on first use."""
+    global _default_scorer
+    if _default_scorer is None:
+        _default_scorer = SentimentScorer()
+    return _default_scorer
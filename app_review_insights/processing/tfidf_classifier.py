@@ -0,0 +1,164 @@
+"""
+Offline theme classifier: TF-IDF features and a linear (logistic
+regression) model trained from reviews that were already tagged.
+
+Prediction keeps only the vectorizer and the weight matrix, so a whole
+batch is classified by one sparse matrix multiply plus an argmax. The
+trained model is pickled to config.TFIDF_MODEL_FILE for fast reloads.
+"""
+import json
+import os
+import pickle
+from datetime import datetime
+import numpy as np
+from .. import config
+from ..storage.atomic import atomic_write
+
+# Stubbing the import so the default setup runs without scikit-learn
+try:
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.metrics import precision_recall_fscore_support
+    from sklearn.model_selection import train_test_split
+except ImportError:
+    TfidfVectorizer = None
+    print("WARNING: scikit-learn library not found. The tfidf theme classifier will be disabled.")
+
+def make_vectorizer(texts_count):
+    # Dropping singleton terms only pays off once there's enough text
+    return TfidfVectorizer(
+        ngram_range=(1, 2),
+        min_df=2 if texts_count >= 1000 else 1,
+        max_features=50000,
+        sublinear_tf=True,
+        dtype=np.float32,
+    )
+
+class TfidfThemeClassifier:
+    def __init__(self, vectorizer, coef, intercept, themes, metadata=None):
+        self.vectorizer = vectorizer
+        self.coef = coef  # (n_themes, n_features)
+        self.intercept = intercept  # (n_themes,)
+        self.themes = [str(t) for t in themes]
+        self.metadata = metadata or {}
+
+    @classmethod
+    def train(cls, texts, labels):
+        if TfidfVectorizer is None:
+            raise RuntimeError("scikit-learn is required to train the tfidf classifier.")
+        if len(set(labels)) < 2:
+            raise ValueError("Need reviews tagged with at least two themes to train.")
+
+        vectorizer = make_vectorizer(len(texts))
+        X = vectorizer.fit_transform(texts)
+        model = LogisticRegression(max_iter=1000, class_weight="balanced")
+        model.fit(X, labels)
+
+        coef, intercept = model.coef_, model.intercept_
+        if len(model.classes_) == 2:
+            # Binary models keep a single row for the positive class
+            coef = np.vstack([-coef[0], coef[0]])
+            intercept = np.array([-intercept[0], intercept[0]])
+        return cls(vectorizer, coef.astype(np.float32), intercept.astype(np.float32), model.classes_,
+                   {"trained_at": datetime.now().isoformat(timespec="seconds"), "train_size": len(texts)})
+
+    def decision_scores(self, texts):
+        """(n_texts, n_themes) scores, one sparse matmul for the whole batch."""
+        X = self.vectorizer.transform(texts)
+        return np.asarray(X @ self.coef.T) + self.intercept
+
+    def predict(self, texts, themes=None):
+        """Best theme per text; `themes` restricts the candidates to those the model knows."""
+        texts = list(texts)
+        if not texts:
+            return []
+        columns = [i for i, t in enumerate(self.themes) if themes is None or t in themes]
+        if not columns:
+            raise ValueError("None of the requested themes were seen in training.")
+        scores = self.decision_scores(texts)[:, columns]
+        return [self.themes[columns[j]] for j in scores.argmax(axis=1)]
+
+    def save(self, path=None):
+        path = path or config.TFIDF_MODEL_FILE
+        with atomic_write(path, 'wb') as f:
+            pickle.dump({
+                "vectorizer": self.vectorizer, "coef": self.coef, "intercept": self.intercept,
+                "themes": self.themes, "metadata": self.metadata,
+            }, f, protocol=pickle.HIGHEST_PROTOCOL)
+        return path
+
+    @classmethod
+    def load(cls, path=None):
+        with open(path or config.TFIDF_MODEL_FILE, 'rb') as f:
+            state = pickle.load(f)
+        return cls(state["vectorizer"], state["coef"], state["intercept"], state["themes"], state["metadata"])
+
+def evaluate(classifier, texts, labels):
+    """Per-theme precision/recall/support on held-out reviews, plus accuracy."""
+    predicted = classifier.predict(texts)
+    precision, recall, f1, support = precision_recall_fscore_support(
+        labels, predicted, labels=classifier.themes, zero_division=0
+    )
+    report = {
+        theme: {"precision": round(float(p), 3), "recall": round(float(r), 3),
+                "f1": round(float(f), 3), "support": int(s)}
+        for theme, p, r, f, s in zip(classifier.themes, precision, recall, f1, support)
+    }
+    report["accuracy"] = round(float(np.mean(np.array(predicted) == np.array(labels))), 3)
+    return report
+
+def load_tagged_history(source=None):
+    """
+    (texts, labels) from tagged reviews: a reviews_tagged.json style file
+    when `source` is a .json path, otherwise every tagged row in the store.
+    """
+    if source and source.endswith(".json"):
+        with open(source, 'r', encoding='utf-8') as f:
+            reviews = json.load(f)
+    else:
+        from ..storage.review_store import ReviewStore
+        with ReviewStore(source) as store:
+            reviews = [r for r in store.query_reviews(columns=["text", "theme"]) if r["theme"]]
+    reviews = [r for r in reviews if r.get("text") and r.get("theme")]
+    return [r["text"] for r in reviews], [r["theme"] for r in reviews]
+
+def train_from_history(source=None, holdout=0.2, model_file=None, seed=42):
+    """
+    Trains on tagged history, reports metrics on a `holdout` split, then
+    refits on everything and saves the model. Returns (classifier, report).
+    """
+    if TfidfVectorizer is None:
+        raise RuntimeError("scikit-learn is required to train the tfidf classifier.")
+    texts, labels = load_tagged_history(source)
+    if len(set(labels)) < 2:
+        raise ValueError("Need reviews tagged with at least two themes to train. Run categorize first.")
+    print(f"Training tfidf theme classifier on {len(texts)} tagged reviews...")
+
+    report = None
+    if holdout:
+        # Stratify when every theme has enough examples to appear on both sides
+        counts = {l: labels.count(l) for l in set(labels)}
+        stratify = labels if min(counts.values()) >= 2 else None
+        train_texts, test_texts, train_labels, test_labels = train_test_split(
+            texts, labels, test_size=holdout, random_state=seed, stratify=stratify
+        )
+        report = evaluate(TfidfThemeClassifier.train(train_texts, train_labels), test_texts, test_labels)
+
+    classifier = TfidfThemeClassifier.train(texts, labels)
+    classifier.metadata["holdout_report"] = report
+    path = classifier.save(model_file)
+    print(f"Saved tfidf theme classifier to {path}")
+    return classifier, report
+
+_loaded = {}
+
+def get_classifier(path=None):
+    """The saved classifier, loaded once per process; None when it can't be loaded."""
+    path = path or config.TFIDF_MODEL_FILE
+    if path not in _loaded:
+        if not os.path.exists(path):
+            print(f"WARNING: No tfidf theme model at {path}. Train one with scripts/train_theme_model.py.")
+            _loaded[path] = None
+        else:
+            _loaded[path] = TfidfThemeClassifier.load(path)
+    return _loaded[path]
@@ -0,0 +1,92 @@
+"""
+Emerging-theme discovery: clusters a period's reviews without using the
+configured themes, then checks each cluster against them.
+
+Reviews become sparse TF-IDF vectors and are grouped by mini-batch
+k-means, which only ever touches `batch_size` rows per step, so 100k
+reviews cluster in seconds on a CPU. Each cluster is described by the
+heaviest terms of its centroid; a cluster whose terms hit no keyword in
+config.THEME_KEYWORDS doesn't fit any existing theme and is flagged as
+emerging.
+"""
+import time
+import numpy as np
+from .. import config
+from .keyword_themes import get_default_engine
+
+# Stubbing the import so the default setup runs without scikit-learn
+try:
+    from sklearn.cluster import MiniBatchKMeans
+    from sklearn.feature_extraction.text import TfidfVectorizer
+except ImportError:
+    MiniBatchKMeans = None
+    print("WARNING: scikit-learn library not found. Theme discovery will be disabled.")
+
+def _vectorize(texts, max_df=None):
+    vectorizer = TfidfVectorizer(
+        stop_words="english",
+        # Words only: numbers and single letters make poor cluster labels
+        token_pattern=r"(?u)\b[a-zA-Z][a-zA-Z]+\b",
+        min_df=2 if len(texts) >= 1000 else 1,
+        # In a small or one-note sample the useful terms are in most reviews
+        max_df=max_df or (0.5 if len(texts) >= 100 else 1.0),
+        max_features=20000,
+        sublinear_tf=True,
+        dtype=np.float32,
+    )
+    return vectorizer, vectorizer.fit_transform(texts)
+
+def discover_themes(texts, n_clusters=None, top_terms=None, samples=3, seed=42):
+    """
+    Clusters `texts` and returns one dict per cluster, largest first:
+    size, share, top_terms, sample reviews, the existing theme its terms
+    map onto (or None) and whether it looks like an emerging theme.
+    """
+    if MiniBatchKMeans is None:
+        raise RuntimeError("scikit-learn is required for theme discovery.")
+    texts = [t for t in texts if t]
+    n_clusters = n_clusters or config.DISCOVERY_CLUSTERS
+    top_terms = top_terms or config.DISCOVERY_TOP_TERMS
+    n_clusters = min(n_clusters, len(texts))
+    if n_clusters < 2:
+        return []
+
+    start = time.perf_counter()
+    try:
+        vectorizer, X = _vectorize(texts)
+    except ValueError:
+        # Every term is in most reviews (a one-note period): keep them all
+        try:
+            vectorizer, X = _vectorize(texts, max_df=1.0)
+        except ValueError as e:
+            # No usable terms at all (e.g. only stop words or numbers)
+            raise RuntimeError(f"Theme discovery found nothing to cluster: {e}")
+    kmeans = MiniBatchKMeans(n_clusters=n_clusters, batch_size=4096, n_init=3, random_state=seed)
+    labels = kmeans.fit_predict(X)
+    terms = vectorizer.get_feature_names_out()
+
+    engine = get_default_engine()
+    sizes = np.bincount(labels, minlength=n_clusters)
+    clusters = []
+    for cluster in np.argsort(-sizes):
+        if not sizes[cluster]:
+            continue
+        centroid = kmeans.cluster_centers_[cluster]
+        cluster_terms = [str(terms[i]) for i in np.argsort(-centroid)[:top_terms] if centroid[i] > 0]
+        # Keyword hits on the cluster's vocabulary say which theme it belongs to
+        ranked = engine.rank(" ".join(cluster_terms))
+        members = np.flatnonzero(labels == cluster)
+        clusters.append({
+            "cluster": int(cluster),
+            "size": int(sizes[cluster]),
+            "share": round(float(sizes[cluster]) / len(texts), 3),
+            "top_terms": cluster_terms,
+            "samples": [texts[i] for i in members[:samples]],
+            "matched_theme": ranked[0][0] if ranked else None,
+            "is_emerging": not ranked,
+        })
+
+    emerging = sum(c["is_emerging"] for c in clusters)
+    print(f"Clustered {len(texts)} reviews into {len(clusters)} groups "
+          f"({emerging} emerging) in {time.perf_counter() - start:.2f}s")
+    return clusters
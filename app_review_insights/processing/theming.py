@@ -1,21 +1,146 @@
-from ..llm_client import LLMClient
+import multiprocessing
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from ..llm_client import LLMClient, get_default_client
+from ..storage.review_store import review_key
 from .. import config
+from .dedup import group_signatures, minhash_signatures
+from .sentiment import get_default_scorer
 
-def theme_reviews(reviews):
+# Per-process client, built once by _init_worker
+_worker_client = None
+
+# Workers come from a fork server, not fork(): theming also runs on service
+# and scheduler threads, and a child forked from a threaded process can
+# inherit a lock that no thread will ever release. Preloading this module
+# in the server keeps every pool after the first cheap to start.
+_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+_MP_CONTEXT = multiprocessing.get_context(_START_METHOD)
+if _START_METHOD == "forkserver":
+    _MP_CONTEXT.set_forkserver_preload([__name__])
+
+# Providers cheap enough per review that shipping texts to workers never pays
+_SERIAL_PROVIDERS = {"mock"}
+
+def _init_worker(provider):
+    global _worker_client
+    _worker_client = LLMClient(provider)
+    # Warm up the classifier so the first chunk doesn't pay for it
+    _worker_client.categorize_batch([""], config.THEME_LIST)
+
+def _categorize_chunk(texts):
+    return _worker_client.categorize_batch(texts, config.THEME_LIST)
+
+def parallel_worker_count(review_count, max_workers=None, chunk_size=None):
+    """
+    Worker processes worth starting for `review_count` reviews: 0 means
+    stay serial (too few reviews, or a single core).
+    """
+    chunk_size = chunk_size or config.THEMING_CHUNK_SIZE
+    max_workers = max_workers or config.THEMING_WORKERS or os.cpu_count() or 1
+    if review_count < config.THEMING_PARALLEL_MIN_REVIEWS:
+        return 0
+    workers = min(max_workers, -(-review_count // chunk_size))
+    return workers if workers > 1 else 0
+
+def categorize_texts_parallel(client, texts, max_workers=None, chunk_size=None):
+    """
+    Classifies `texts` in chunks across a process pool, each worker with its
+    own client. Results come back in input order. Falls back to the calling
+    process for small inputs, for the keyword mock and for network
+    providers, which already keep several requests in flight from threads.
+    """
+    texts = list(texts)
+    chunk_size = chunk_size or config.THEMING_CHUNK_SIZE
+    pooled = client.is_local and client.provider not in _SERIAL_PROVIDERS
+    workers = parallel_worker_count(len(texts), max_workers, chunk_size) if pooled else 0
+    if not workers:
+        return client.categorize_batch(texts, config.THEME_LIST)
+
+    print(f"Categorizing {len(texts)} reviews across {workers} worker processes...")
+    chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(client.provider,), mp_context=_MP_CONTEXT) as executor:
+        results = executor.map(_categorize_chunk, chunks)
+        return [theme for chunk in results for theme in chunk]
+
+# Representatives already tagged (earlier runs or chunks): their MinHash
+# signatures, themes and review keys, row-aligned
+KnownGroups = namedtuple("KnownGroups", ["signatures", "themes", "keys"])
+
+def known_groups(representatives):
+    """KnownGroups for tagged reviews that are their group's representative."""
+    representatives = [r for r in representatives if r.get('theme') and not r.get('duplicate_of')]
+    return KnownGroups(
+        minhash_signatures([r['text'] for r in representatives]),
+        [r['theme'] for r in representatives],
+        [review_key(r) for r in representatives],
+    )
+
+def _categorize_deduped(reviews, categorize, known=None):
+    """
+    Runs `categorize` on one text per near-duplicate group and fans the
+    themes back out. Returns (themes, duplicate_of, known) aligned with
+    `reviews`; duplicate_of holds the representative's review key, or None.
+    A review copying one of the `known` representatives takes its theme
+    without being classified; the returned KnownGroups adds this batch's
+    new representatives to `known`.
+    """
+    texts = [r['text'] for r in reviews]
+    if not config.DEDUP_ENABLED or not texts:
+        return categorize(texts), [None] * len(texts), known
+
+    signatures = minhash_signatures(texts)
+    offset = len(known.keys) if known else 0
+    # Known rows go first, so a group that reaches one keeps it as representative
+    labels = group_signatures(np.vstack([known.signatures, signatures]) if offset else signatures)
+    labels = (labels[offset:] - offset).tolist()
+    representatives = sorted({label for label in labels if label >= 0})
+    if len(representatives) < len(texts):
+        print(f"Near-duplicates: classifying {len(representatives)} representatives for {len(texts)} reviews")
+    rep_themes = dict(zip(representatives, categorize([texts[i] for i in representatives])))
+
+    themes, duplicate_of = [], []
+    for i, label in enumerate(labels):
+        if label < 0:
+            themes.append(known.themes[label + offset])
+            duplicate_of.append(known.keys[label + offset])
+        else:
+            themes.append(rep_themes[label])
+            duplicate_of.append(None if label == i else review_key(reviews[label]))
+
+    new_known = KnownGroups(
+        signatures[representatives],
+        [rep_themes[i] for i in representatives],
+        [review_key(reviews[i]) for i in representatives],
+    )
+    if offset:
+        new_known = KnownGroups(np.vstack([known.signatures, new_known.signatures]),
+                                known.themes + new_known.themes, known.keys + new_known.keys)
+    return themes, duplicate_of, new_known
+
+def theme_reviews(reviews, max_workers=None, known=None):
     """
-    Assigns a theme to each review using the LLM client.
+    Assigns a theme to each review using the LLM client. Copies of the
+    `known` representatives (KnownGroups, e.g. the window's tagged reviews)
+    are grouped with them instead of being classified again.
     """
-    client = LLMClient()
-    import os
+    client = get_default_client()
     tagged_reviews = []
     
     print("Categorizing reviews into themes...")
     
-    for r in reviews:
-        theme = client.categorize_review(r['text'], config.THEME_LIST)
-        
+    themes, duplicate_of, _ = _categorize_deduped(
+        reviews, lambda texts: categorize_texts_parallel(client, texts, max_workers), known
+    )
+    sentiments = get_default_scorer().score_batch([r['text'] for r in reviews])
+    for r, theme, original, sentiment in zip(reviews, themes, duplicate_of, sentiments.tolist()):
         tagged_review = r.copy()
         tagged_review['theme'] = theme
+        tagged_review['duplicate_of'] = original
+        tagged_review['sentiment'] = round(sentiment, 3)
         tagged_reviews.append(tagged_review)
         
     # Ensure directory exists if saving (though this func just returns, usually caller saves)
@@ -23,3 +148,36 @@ def theme_reviews(reviews):
     # Wait, api.py calls categorize_reviews_action -> save_tagged_reviews in api.py? 
     # Actually, let's check saving locations.
     return tagged_reviews
+
+def _chunked(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def iter_theme_reviews(reviews_iter, chunk_size=None):
+    """
+    Streaming theme_reviews: pulls reviews in chunks of `chunk_size`, tags
+    them in place (no per-review copy) and yields them one by one.
+    Each chunk's representatives are kept, so a copy of a review from an
+    earlier chunk is grouped with it.
+    """
+    client = get_default_client()
+    chunk_size = chunk_size or config.STREAM_CHUNK_SIZE
+    known = None
+
+    for chunk in _chunked(reviews_iter, chunk_size):
+        # Only signatures are carried over, one row per representative
+        themes, duplicate_of, known = _categorize_deduped(
+            chunk, lambda texts: client.categorize_batch(texts, config.THEME_LIST), known
+        )
+        sentiments = get_default_scorer().score_batch([r['text'] for r in chunk])
+        for r, theme, original, sentiment in zip(chunk, themes, duplicate_of, sentiments.tolist()):
+            r['theme'] = theme
+            r['duplicate_of'] = original
+            r['sentiment'] = round(sentiment, 3)
+        yield from chunk
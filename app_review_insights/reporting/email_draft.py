@@ -1,22 +1,34 @@
 import os
-from .. import config
+from ..context import RunContext
+from ..storage.atomic import write_text
 
-def generate_email_draft(tagged_reviews, output_file=config.EMAIL_DRAFT_FILE):
+def generate_email_draft(tagged_reviews, output_file=None, weekly_totals=None, ctx=None):
     """
     Generates a formal, professional email draft including the weekly summary.
+    `weekly_totals` ({theme: aggregate sums}, as from ReviewStore.theme_totals)
+    adds a headline with the review volume and average rating.
+    The app, window and report come from `ctx` (default: config.APP_ID).
     """
+    ctx = ctx or RunContext.default()
+    output_file = output_file or ctx.email_draft_file
+
     # Read the weekly report content
     report_content = ""
-    if os.path.exists(config.WEEKLY_REPORT_FILE):
-        with open(config.WEEKLY_REPORT_FILE, 'r', encoding='utf-8') as f:
+    if os.path.exists(ctx.weekly_report_file):
+        with open(ctx.weekly_report_file, 'r', encoding='utf-8') as f:
             report_content = f.read()
     else:
         report_content = "(Weekly report not found. Please generate it first.)"
 
-    subject = f"Market pulse: {config.APP_ID} | Weekly User Feedback Analysis"
+    subject = f"Market pulse: {ctx.app_id} | Weekly User Feedback Analysis"
     
     body_text = "Hi Team,\n\n"
-    body_text += f"Attached is the weekly analysis of user feedback for the {config.APP_ID} Android app, covering the last {config.WEEKS_BACK} weeks. This report synthesizes recent Play Store reviews to highlight key themes, emerging pain points, and strategic opportunities for product improvement.\n\n"
+    body_text += f"Attached is the weekly analysis of user feedback for the {ctx.app_id} Android app, covering the last {ctx.weeks_back} weeks. This report synthesizes recent Play Store reviews to highlight key themes, emerging pain points, and strategic opportunities for product improvement.\n\n"
+    if weekly_totals:
+        review_count = sum(t["review_count"] for t in weekly_totals.values())
+        rating_sum = sum(t["rating_sum"] for t in weekly_totals.values())
+        if review_count:
+            body_text += f"The window covers {review_count} distinct reviews with an average rating of {rating_sum / review_count:.1f}⭐.\n\n"
     body_text += "Overview of Key Insights:\n"
     body_text += report_content + "\n\n"
     body_text += "We recommend prioritizing the high-impact action items identified above to enhance user satisfaction and retention in the coming sprint.\n\n"
@@ -26,9 +38,7 @@ def generate_email_draft(tagged_reviews, output_file=config.EMAIL_DRAFT_FILE):
 
     full_content = f"Subject: {subject}\n\n{body_text}"
 
-    os.makedirs(os.path.dirname(output_file), exist_ok=True)
-    with open(output_file, 'w', encoding='utf-8') as f:
-        f.write(full_content)
+    write_text(output_file, full_content)
         
     print(f"Email draft generated at {output_file}")
     return subject, body_text
@@ -0,0 +1,103 @@
+"""
+Week-over-week trend and anomaly detection over the per-theme weekly
+series in the review store's theme_weekly aggregates.
+
+Rows for any number of apps and themes are pivoted into one
+(series x week) matrix, so deltas and rolling z-scores are computed with
+a handful of NumPy operations over every series at once. A week is a
+spike when its count sits `TREND_Z_THRESHOLD` standard deviations above
+the mean of the `TREND_WINDOW_WEEKS` weeks before it.
+"""
+from datetime import datetime, timedelta
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from .. import config
+
+def build_series(rows, last_week=None):
+    """
+    Pivots weekly_theme_stats rows into (keys, weeks, counts, rating_sums):
+    keys are (app_name, theme) per row of the matrices, weeks the
+    consecutive Mondays per column. Weeks with no reviews are zeros.
+    `last_week` (a "%Y-%m-%d" Monday) fixes the final column, so the series
+    reach it even when that week has no rows; later rows are left out.
+    """
+    if last_week is not None:
+        rows = [r for r in rows if r["week_start"] <= last_week]
+    if not rows:
+        return [], [], np.zeros((0, 0)), np.zeros((0, 0))
+    keys = sorted({(r["app_name"], r["theme"]) for r in rows})
+    first = datetime.strptime(min(r["week_start"] for r in rows), "%Y-%m-%d")
+    last = datetime.strptime(last_week or max(r["week_start"] for r in rows), "%Y-%m-%d")
+    weeks = [(first + timedelta(weeks=i)).strftime("%Y-%m-%d") for i in range((last - first).days // 7 + 1)]
+
+    key_index = {k: i for i, k in enumerate(keys)}
+    week_index = {w: i for i, w in enumerate(weeks)}
+    row_idx = np.fromiter((key_index[(r["app_name"], r["theme"])] for r in rows), dtype=np.int64, count=len(rows))
+    col_idx = np.fromiter((week_index[r["week_start"]] for r in rows), dtype=np.int64, count=len(rows))
+    counts = np.zeros((len(keys), len(weeks)))
+    rating_sums = np.zeros((len(keys), len(weeks)))
+    counts[row_idx, col_idx] = [r["review_count"] for r in rows]
+    rating_sums[row_idx, col_idx] = [r["rating_sum"] for r in rows]
+    return keys, weeks, counts, rating_sums
+
+def rolling_zscores(counts, window):
+    """
+    z-score of each week against the `window` weeks before it, as a
+    (series x week) array; NaN where there isn't a full window of history.
+    The deviation is floored at sqrt(mean) (Poisson noise) and 1, so flat,
+    sparse series don't turn every small bump into a spike.
+    """
+    z = np.full(counts.shape, np.nan)
+    if counts.shape[1] <= window:
+        return z
+    history = sliding_window_view(counts, window, axis=1)[:, :-1]  # weeks t-window .. t-1 for t >= window
+    mean = history.mean(axis=2)
+    std = np.maximum.reduce([history.std(axis=2), np.sqrt(mean), np.ones_like(mean)])
+    z[:, window:] = (counts[:, window:] - mean) / std
+    return z
+
+def detect_trends(rows, window=None, z_threshold=None, min_count=None, last_week=None):
+    """
+    Trend highlights for `last_week` (default: the latest week in `rows`),
+    most significant first.
+    Each is a dict with app_name, theme, week_start, count, previous_count,
+    wow_change (fraction, None from zero), zscore, mean_rating,
+    rating_change and kind: "spike", "drop" or "rising".
+    """
+    window = window or config.TREND_WINDOW_WEEKS
+    z_threshold = z_threshold if z_threshold is not None else config.TREND_Z_THRESHOLD
+    min_count = min_count if min_count is not None else config.TREND_MIN_COUNT
+    keys, weeks, counts, rating_sums = build_series(rows, last_week)
+    if len(weeks) < 2:
+        return []
+
+    current, previous = counts[:, -1], counts[:, -2]
+    delta = current - previous
+    with np.errstate(divide="ignore", invalid="ignore"):
+        wow = np.where(previous > 0, delta / previous, np.nan)
+        mean_rating = np.where(counts > 0, rating_sums / counts, np.nan)
+    rating_change = mean_rating[:, -1] - mean_rating[:, -2]
+    z = rolling_zscores(counts, window)[:, -1]
+
+    spike = (z >= z_threshold) & (current >= min_count)
+    drop = (z <= -z_threshold) & (previous >= min_count)
+    # Without a full window, fall back to a plain week-over-week doubling
+    rising = ~spike & np.isnan(z) & (current >= min_count) & (current >= 2 * np.maximum(previous, 1))
+
+    alerts = []
+    for i in np.flatnonzero(spike | drop | rising):
+        alerts.append({
+            "app_name": keys[i][0],
+            "theme": keys[i][1],
+            "week_start": weeks[-1],
+            "count": int(current[i]),
+            "previous_count": int(previous[i]),
+            "wow_change": None if np.isnan(wow[i]) else round(float(wow[i]), 3),
+            "zscore": None if np.isnan(z[i]) else round(float(z[i]), 2),
+            "mean_rating": None if np.isnan(mean_rating[i, -1]) else round(float(mean_rating[i, -1]), 2),
+            "rating_change": None if np.isnan(rating_change[i]) else round(float(rating_change[i]), 2),
+            "kind": "spike" if spike[i] else "drop" if drop[i] else "rising",
+        })
+    alerts.sort(key=lambda a: abs(a["zscore"]) if a["zscore"] is not None else abs(a["count"] - a["previous_count"]),
+                reverse=True)
+    return alerts
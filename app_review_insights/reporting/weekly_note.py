@@ -2,9 +2,11 @@ import os
 print("DEBUG: Loaded weekly_note.py, os imported successfully.")
 import pandas as pd
 from datetime import datetime
-from .. import config
+from ..context import RunContext
+from ..storage.atomic import write_text
+from ..processing.sentiment import sentiment_labels
 
-def generate_weekly_note(tagged_reviews, output_file=config.WEEKLY_REPORT_FILE):
+def generate_weekly_note(tagged_reviews, output_file=None, ctx=None):
     """
     Generates a structured weekly summary report matching the specific 'Groww' case example.
     Format:
@@ -29,9 +31,86 @@ def generate_weekly_note(tagged_reviews, output_file=config.WEEKLY_REPORT_FILE):
 
     # Theme breakdown
     theme_counts = df['theme'].value_counts()
-    top_themes = theme_counts.head(3)
-    
-    report = f"📌 Weekly Pulse Summary — {config.APP_ID}\n\n"
+    write_weekly_note(theme_counts.to_dict(), output_file, theme_sentiment_distribution(df), ctx=ctx)
+
+def generate_weekly_note_from_aggregates(theme_totals, output_file=None, trend_alerts=None, ctx=None):
+    """
+    Writes the weekly note from pre-aggregated per-theme sums (as from
+    ReviewStore.theme_totals), so no review rows are loaded at all.
+    `trend_alerts` (from trends.detect_trends) adds a Trend Alerts section.
+    """
+    theme_counts = {theme: t["review_count"] for theme, t in theme_totals.items() if t["review_count"]}
+    theme_sentiment = {
+        theme: {
+            "positive": t["positive_count"],
+            "neutral": t["sentiment_count"] - t["positive_count"] - t["negative_count"],
+            "negative": t["negative_count"],
+            "mean": round(t["sentiment_sum"] / t["sentiment_count"], 3)
+        }
+        for theme, t in theme_totals.items() if t["sentiment_count"]
+    }
+    write_weekly_note(theme_counts, output_file, theme_sentiment, trend_alerts, ctx)
+
+def theme_sentiment_distribution(df):
+    """
+    {theme: {"positive": n, "neutral": n, "negative": n, "mean": score}} for
+    the reviews in `df` that carry a sentiment score; {} if none do.
+    """
+    if 'sentiment' not in df:
+        return {}
+    scored = df.dropna(subset=['sentiment'])
+    if scored.empty:
+        return {}
+    labels = pd.Series(sentiment_labels(scored['sentiment'].to_numpy()), index=scored.index)
+    counts = pd.crosstab(scored['theme'], labels)
+    means = scored.groupby('theme')['sentiment'].mean()
+    return {
+        theme: {
+            **{label: int(counts.loc[theme].get(label, 0)) for label in ("positive", "neutral", "negative")},
+            "mean": round(float(means[theme]), 3)
+        }
+        for theme in counts.index
+    }
+
+def _format_sentiment(dist):
+    total = dist["positive"] + dist["neutral"] + dist["negative"]
+    if not total:
+        return ""
+    shares = {label: round(100 * dist[label] / total) for label in ("positive", "neutral", "negative")}
+    return (f"   Sentiment: {shares['positive']}% positive · {shares['neutral']}% neutral · "
+            f"{shares['negative']}% negative (avg {dist['mean']:+.2f})\n")
+
+def _format_trend_alert(alert):
+    icon = {"spike": "🚨", "rising": "📈", "drop": "📉"}[alert["kind"]]
+    line = f"{icon} {alert['theme']}: {alert['count']} reviews in the week of {alert['week_start']} (prev {alert['previous_count']}"
+    if alert["wow_change"] is not None:
+        line += f", {alert['wow_change']:+.0%} WoW"
+    if alert["zscore"] is not None:
+        line += f", z={alert['zscore']:+.1f}"
+    line += ")"
+    if alert["rating_change"] is not None and abs(alert["rating_change"]) >= 0.1:
+        line += f", avg rating {alert['mean_rating']:.1f}⭐ ({alert['rating_change']:+.1f})"
+    return line + "\n"
+
+def write_weekly_note(theme_counts, output_file=None, theme_sentiment=None, trend_alerts=None, ctx=None):
+    """
+    Renders the weekly note from aggregates ({theme: review count}, and
+    optionally per-theme sentiment distributions and trend alerts) rather
+    than review lists, so streaming runs never hold the reviews in memory.
+    The note is titled for `ctx`'s app and written to its report file
+    unless `output_file` is given.
+    """
+    ctx = ctx or RunContext.default()
+    output_file = output_file or ctx.weekly_report_file
+    theme_sentiment = theme_sentiment or {}
+    if not theme_counts:
+        print("No reviews to report.")
+        return
+
+    # Stable sort keeps the caller's order for ties
+    top_themes = dict(sorted(theme_counts.items(), key=lambda item: item[1], reverse=True)[:3])
+
+    report = f"📌 Weekly Pulse Summary — {ctx.app_id}\n\n"
     
     report += "Top 3 Categories & Action Insights\n\n"
     
@@ -83,12 +162,20 @@ def generate_weekly_note(tagged_reviews, output_file=config.WEEKLY_REPORT_FILE):
         display_name = "UI & Experience" if theme == "User Experience" else theme
         
         report += f"{i}. {display_name}\n"
+        if theme in theme_sentiment:
+            report += _format_sentiment(theme_sentiment[theme])
         report += f"   ✓ {data['pos']}\n"
         report += f"   ⚠ {data['neg']}\n"
         report += f"   🔧 {data['fix']}\n\n"
         
         priority_actions.append(data['fix'])
 
+    if trend_alerts:
+        report += "Trend Alerts\n"
+        for alert in trend_alerts:
+            report += _format_trend_alert(alert)
+        report += "\n"
+
     report += "Next Sprint Priorities:\n"
     
     # Use the specific priorities from the example if they match the generated themes, 
@@ -105,8 +192,6 @@ def generate_weekly_note(tagged_reviews, output_file=config.WEEKLY_REPORT_FILE):
          for action in priority_actions:
              report += f"- {action}\n"
             
-    os.makedirs(os.path.dirname(output_file), exist_ok=True)
-    with open(output_file, 'w', encoding='utf-8') as f:
-        f.write(report)
+    write_text(output_file, report)
         
     print(f"Weekly report generated at {output_file}")
@@ -0,0 +1,182 @@
+"""
+Built-in scheduler: recurring pipeline runs for many apps in one warm
+process, instead of a cron entry (and a fresh interpreter) per app.
+
+The schedule is a JSON list of apps, each with its own cadence:
+
+    [
+      {"app_id": "com.nextbillion.groww", "cadence": "weekly", "weekday": 0, "hour": 9},
+      {"app_url": "https://play.google.com/store/apps/details?id=com.zerodha.kite3", "cadence": "daily"},
+      {"app_id": "in.upstox.app", "country": "in", "cadence": "hourly"},
+      {"app_id": "com.example.app", "interval_minutes": 30}
+    ]
+
+Runs are submitted as "pipeline" jobs to a service.JobService, so they
+share its worker pool, per-app ordering and memoized stages (and, when
+served over HTTP, its job status endpoints). Each app's start time is
+shifted by a fixed offset derived from its id, so apps on the same
+cadence don't all hit the stores at once. A run is skipped when the app
+still has a job queued or running.
+"""
+import asyncio
+import json
+import zlib
+from collections import namedtuple
+from datetime import datetime, timedelta
+from . import config
+from .context import RunContext
+
+CADENCES = ("hourly", "daily", "weekly")
+
+# cadence is one of CADENCES or None with interval_minutes set; offset is
+# the stagger in seconds
+ScheduleEntry = namedtuple("ScheduleEntry", ["ctx", "cadence", "weekday", "hour", "interval_minutes", "offset"])
+
+def _period_seconds(cadence, interval_minutes):
+    return {"hourly": 3600, "daily": 86400, "weekly": 7 * 86400}.get(cadence) or interval_minutes * 60
+
+def stagger_offset(ctx, period_seconds, stagger_minutes=None):
+    """Deterministic per-app delay in seconds, within the stagger window and the period."""
+    stagger_minutes = config.SCHEDULE_STAGGER_MINUTES if stagger_minutes is None else stagger_minutes
+    window = min(stagger_minutes * 60, period_seconds)
+    if window <= 0:
+        return 0
+    return zlib.crc32(f"{ctx.app_id}|{ctx.lang}|{ctx.country}".encode("utf-8")) % window
+
+def parse_entry(raw):
+    """ScheduleEntry from one schedule item; ValueError if it is malformed."""
+    overrides = {key: raw[key] for key in ("lang", "country", "weeks_back") if raw.get(key)}
+    if raw.get("app_url"):
+        ctx = RunContext.from_url(raw["app_url"], **overrides)
+    elif raw.get("app_id"):
+        ctx = RunContext.for_app(raw["app_id"], **overrides)
+    else:
+        raise ValueError(f"Schedule entry needs app_id or app_url: {raw}")
+
+    interval_minutes = raw.get("interval_minutes")
+    cadence = None if interval_minutes is not None else raw.get("cadence", "weekly")
+    if cadence is None and not (isinstance(interval_minutes, int) and interval_minutes > 0):
+        raise ValueError(f"interval_minutes must be a positive integer: {raw}")
+    if cadence is not None and cadence not in CADENCES:
+        raise ValueError(f"Unknown cadence {cadence!r} for {ctx.app_id}; expected one of {CADENCES}")
+
+    weekday = raw.get("weekday", 0)
+    hour = raw.get("hour", config.SCHEDULE_DEFAULT_HOUR)
+    if weekday not in range(7) or hour not in range(24):
+        raise ValueError(f"weekday must be 0-6 (Monday = 0) and hour 0-23: {raw}")
+    offset = stagger_offset(ctx, _period_seconds(cadence, interval_minutes))
+    return ScheduleEntry(ctx, cadence, weekday, hour, interval_minutes, offset)
+
+def load_schedule(path=None):
+    path = path or config.SCHEDULE_FILE
+    with open(path, 'r', encoding='utf-8') as f:
+        items = json.load(f)
+    if not isinstance(items, list):
+        raise ValueError(f"{path} must hold a JSON list of apps")
+    return [parse_entry(item) for item in items]
+
+def next_run(entry, after):
+    """First start time strictly after `after` (a naive local datetime)."""
+    offset = timedelta(seconds=entry.offset)
+    if entry.cadence is None:
+        # Interval slots are aligned to the epoch, so restarts keep the rhythm
+        period = entry.interval_minutes * 60
+        slot = (int(after.timestamp()) - entry.offset) // period * period + entry.offset
+        start = datetime.fromtimestamp(slot)
+        step = timedelta(seconds=period)
+    elif entry.cadence == "hourly":
+        start = after.replace(minute=0, second=0, microsecond=0) + offset
+        step = timedelta(hours=1)
+    elif entry.cadence == "daily":
+        start = after.replace(hour=entry.hour, minute=0, second=0, microsecond=0) + offset
+        step = timedelta(days=1)
+    else:
+        day = after - timedelta(days=(after.weekday() - entry.weekday) % 7)
+        start = day.replace(hour=entry.hour, minute=0, second=0, microsecond=0) + offset
+        step = timedelta(weeks=1)
+    # The offset is shorter than the period, so this is at most one step
+    while start <= after:
+        start += step
+    return start
+
+def describe(entry):
+    if entry.cadence is None:
+        return f"every {entry.interval_minutes} min"
+    if entry.cadence == "weekly":
+        return f"weekly on {['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun'][entry.weekday]} at {entry.hour:02d}:00"
+    if entry.cadence == "daily":
+        return f"daily at {entry.hour:02d}:00"
+    return "hourly"
+
+class Scheduler:
+    def __init__(self, service, entries, max_sleep=60):
+        self.service = service
+        self.entries = entries
+        # Sleeps are capped so clock jumps (suspend, DST) are noticed
+        self.max_sleep = max_sleep
+        self.skipped = 0
+        self.submitted = 0
+
+    async def run(self, now=datetime.now):
+        due = {i: next_run(entry, now()) for i, entry in enumerate(self.entries)}
+        for i, entry in enumerate(self.entries):
+            print(f"Scheduled {entry.ctx.app_id} ({entry.ctx.lang}-{entry.ctx.country}) {describe(entry)}, "
+                  f"+{entry.offset // 60}m{entry.offset % 60:02d}s stagger; next run {due[i]:%Y-%m-%d %H:%M:%S}")
+        while due:
+            i = min(due, key=due.get)
+            delay = (due[i] - now()).total_seconds()
+            if delay > 0:
+                await asyncio.sleep(min(delay, self.max_sleep))
+                continue
+            self.trigger(self.entries[i])
+            due[i] = next_run(self.entries[i], max(now(), due[i]))
+
+    def trigger(self, entry):
+        """Submits one scheduled run, unless the app is still busy with a previous one."""
+        stamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        if self.service.app_busy(entry.ctx):
+            self.skipped += 1
+            print(f"[{stamp}] Skipping {entry.ctx.app_id}: its previous run is still going.")
+            return None
+        from .service import JobError
+        try:
+            job, _ = self.service.submit("pipeline", entry.ctx, {})
+        except JobError as e:
+            # e.g. the queue is full; the next slot tries again
+            self.skipped += 1
+            print(f"[{stamp}] Skipping {entry.ctx.app_id}: {e}")
+            return None
+        self.submitted += 1
+        print(f"[{stamp}] Started scheduled run for {entry.ctx.app_id} (job {job.id}).")
+        job.add_done_callback(self._report)
+        return job
+
+    def _report(self, job):
+        stamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        if job.status == "succeeded":
+            print(f"[{stamp}] Scheduled run for {job.ctx.app_id} finished (job {job.id}).")
+        else:
+            message = (job.result or {}).get("message", "no result")
+            print(f"[{stamp}] Scheduled run for {job.ctx.app_id} failed (job {job.id}): {message}")
+
+async def run_scheduler(path=None, workers=None):
+    """Runs the schedule on an in-process job service (no HTTP)."""
+    from .service import JobService
+    entries = load_schedule(path)
+    service = JobService(workers=workers)
+    await service.start()
+    try:
+        await Scheduler(service, entries).run()
+    finally:
+        await service.stop()
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Run recurring pipelines for the apps in a schedule file.")
+    parser.add_argument("schedule", nargs="?", default=None, help=f"Schedule JSON (default {config.SCHEDULE_FILE})")
+    parser.add_argument("--workers", type=int, default=config.SERVICE_WORKERS)
+    args = parser.parse_args()
+    try:
+        asyncio.run(run_scheduler(args.schedule, args.workers))
+    except KeyboardInterrupt:
+        print("Scheduler stopped.")
@@ -0,0 +1,84 @@
+import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
+from .. import config
+from .fetch_control import get_controller
+
+def _label(entry, key, default=""):
+    return (entry.get(key) or {}).get("label", default)
+
+def _normalize_date(value):
+    # Feed dates carry an offset (2025-12-04T07:21:33-07:00); store them as UTC
+    try:
+        parsed = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return str(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc)
+    return parsed.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+def normalize_rss_entry(entry, app_name):
+    """Maps one RSS feed entry onto the dict shape produced by fetch_ios_reviews."""
+    rating = _label(entry, "im:rating", None)
+    return {
+        "platform": "iOS App Store",
+        "app_name": app_name,
+        "date": _normalize_date(_label(entry, "updated")),
+        "rating": int(rating) if rating is not None else None,
+        "title": _label(entry, "title"),
+        "text": _label(entry, "content").replace("\n", " ")
+    }
+
+def _make_session(pool_size):
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+def _fetch_page(session, url):
+    response = session.get(url, timeout=10)
+    response.raise_for_status()
+    entries = response.json().get("feed", {}).get("entry", [])
+    # A page with a single review comes back as a bare object
+    if isinstance(entries, dict):
+        entries = [entries]
+    # Older feeds lead page 1 with an app-info entry that has no rating
+    return [e for e in entries if "im:rating" in e]
+
+def iter_ios_rss_reviews(app_id, app_name=None, country='in', pages=config.IOS_RSS_PAGES,
+                         max_workers=config.IOS_RSS_MAX_WORKERS, url_template=config.IOS_RSS_URL):
+    """
+    Streams normalized iOS reviews from the iTunes customer-reviews RSS feed.
+    All pages are requested at once over one pooled session, and reviews
+    are yielded page by page as the downloads complete, so arrival order
+    is not date order.
+    """
+    app_name = app_name or str(app_id)
+    urls = [url_template.format(country=country, page=page, app_id=app_id) for page in range(1, pages + 1)]
+    controller = get_controller(urlparse(urls[0]).netloc)
+
+    print(f"Fetching iOS RSS reviews for {app_name} (ID: {app_id}, {pages} pages)...")
+
+    workers = max(1, min(max_workers, pages))
+    with _make_session(workers) as session, ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(controller.call, _fetch_page, session, url) for url in urls]
+        for future in as_completed(futures):
+            for entry in future.result():
+                yield normalize_rss_entry(entry, app_name)
+
+def fetch_ios_rss_reviews(app_id, app_name=None, country='in', pages=config.IOS_RSS_PAGES,
+                          max_workers=config.IOS_RSS_MAX_WORKERS, url_template=config.IOS_RSS_URL):
+    """
+    Fetches all RSS feed pages concurrently and returns the reviews newest first.
+    """
+    reviews_data = list(iter_ios_rss_reviews(app_id, app_name, country, pages, max_workers, url_template))
+    reviews_data.sort(key=lambda r: r["date"], reverse=True)
+    print(f"Fetched {len(reviews_data)} iOS reviews from RSS.")
+    return reviews_data
+
+if __name__ == "__main__":
+    for review in fetch_ios_rss_reviews(app_id=1351630927, app_name="groww-stocks-mutual-fund")[:5]:
+        print(review)
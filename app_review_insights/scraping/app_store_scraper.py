@@ -2,113 +2,96 @@ import json
 import pandas as pd
 from datetime import datetime, timedelta
 from .. import config
+from .fetch_control import get_controller
+from .app_store_rss import fetch_ios_rss_reviews
+from ..processing.filters import review_filter_mask
+from ..storage.atomic import atomic_write, write_json
 import os
 import time
 
+APP_STORE_HOST = "apps.apple.com"
+
 # Stubbing the import to prevent deployment crashes
 try:
     from app_store_scraper import AppStore
 except ImportError:
     AppStore = None
-    print("WARNING: app_store_scraper library not found. iOS scraping will be disabled.")
+    print("WARNING: app_store_scraper library not found. iOS scraping will use the RSS feed.")
 
 def fetch_ios_reviews(app_name, app_id, country='in', count=500):
     """
-    Fetches reviews from iOS App Store using app_store_scraper.
+    Fetches reviews from iOS App Store using app_store_scraper, or from the
+    RSS feed when the library is not installed.
+    Requests go through the shared fetch-control layer; a fetch that still
+    fails after retries raises FetchError rather than returning [].
     """
     if AppStore is None:
-        print("❌ app_store_scraper not installed. Returning empty list.")
-        return []
+        return fetch_ios_rss_reviews(app_id=app_id, app_name=app_name, country=country)[:count]
 
     print(f"Fetching iOS reviews for {app_name} (ID: {app_id})...")
-    
-    try:
-        # Initialize scraper
+
+    def _fetch():
         scraper = AppStore(country=country, app_name=app_name, app_id=app_id)
-        
-        # Fetch reviews
         scraper.review(how_many=count)
+        return scraper.reviews
+
+    reviews_data = get_controller(APP_STORE_HOST).call(_fetch)
+    print(f"Fetched {len(reviews_data)} reviews.")
+
+    # Normalize data to match Google Play structure
+    normalized_reviews = []
+    
+    for r in reviews_data:
+        # app_store_scraper returns: 'date', 'review', 'rating', 'isEdited', 'title', 'userName'
         
-        reviews_data = scraper.reviews
-        print(f"Fetched {len(reviews_data)} reviews.")
-        
-        # Normalize data to match Google Play structure
-        normalized_reviews = []
-        
-        for r in reviews_data:
-            # app_store_scraper returns: 'date', 'review', 'rating', 'isEdited', 'title', 'userName'
+        # Parse date
+        review_date = r.get('date')
+        if isinstance(review_date, datetime):
+            date_str = review_date.strftime("%Y-%m-%dT%H:%M:%SZ")
+        else:
+            date_str = str(review_date) # Fallback
             
-            # Parse date
-            review_date = r.get('date')
-            if isinstance(review_date, datetime):
-                date_str = review_date.strftime("%Y-%m-%dT%H:%M:%SZ")
-            else:
-                date_str = str(review_date) # Fallback
-                
-            normalized_review = {
-                "platform": "iOS App Store",
-                "app_name": app_name, 
-                "date": date_str,
-                "rating": r.get('rating'),
-                "title": r.get('title', ''),
-                "text": r.get('review', '').replace("\n", " ")
-            }
-            normalized_reviews.append(normalized_review)
-                
-        return normalized_reviews
-    except Exception as e:
-        print(f"Error fetching reviews: {e}")
-        return []
+        normalized_review = {
+            "platform": "iOS App Store",
+            "app_name": app_name, 
+            "date": date_str,
+            "rating": r.get('rating'),
+            "title": r.get('title', ''),
+            "text": r.get('review', '').replace("\n", " ")
+        }
+        normalized_reviews.append(normalized_review)
+            
+    return normalized_reviews
 
 def filter_and_save_ios_reviews(reviews_data, app_name="Groww"):
     """
     Filters iOS reviews and saves them to JSON and CSV.
     """
-    filtered = []
     cutoff_date = datetime.now() - timedelta(weeks=config.WEEKS_BACK)
     
     print(f"Filtering iOS reviews since {cutoff_date.date()}...")
-    
-    for r in reviews_data:
-        # Date check
-        try:
-            review_date = datetime.strptime(r['date'], "%Y-%m-%dT%H:%M:%SZ")
-        except ValueError:
-            continue
-            
-        if review_date < cutoff_date:
-            continue
-            
-        # Length check
-        content = r['text']
-        word_count = len(content.split())
-        char_count = len(content)
-        
-        if word_count < config.MIN_WORD_COUNT and char_count < config.MIN_CHAR_COUNT:
-            continue
-            
-        filtered.append(r)
-        
+
+    # Same vectorized date/length filter as the Google Play path
+    keep = review_filter_mask([r['date'] for r in reviews_data], [r['text'] for r in reviews_data], cutoff_date)
+    filtered = [r for r, k in zip(reviews_data, keep) if k]
+
     print(f"Filtered down to {len(filtered)} iOS reviews.")
 
     # Save JSON
     json_path = os.path.join(config.DATA_DIR, "ios_reviews_filtered.json")
-    with open(json_path, 'w', encoding='utf-8') as f:
-        json.dump(filtered, f, indent=2)
+    write_json(json_path, filtered, indent=2)
     print(f"Saved filtered JSON to {json_path}")
 
     # Save CSV
     if filtered:
         df = pd.DataFrame(filtered)
         csv_path = os.path.join(config.OUTPUT_DIR, "ios_reviews_latest.csv")
-        df.to_csv(csv_path, index=False)
+        with atomic_write(csv_path, newline='') as f:
+            df.to_csv(f, index=False)
         print(f"Saved CSV to {csv_path}")
     
     return filtered
 
 if __name__ == "__main__":
-    if AppStore:
-        reviews = fetch_ios_reviews(app_name="groww-stocks-mutual-fund", app_id=1351630927)
-        filter_and_save_ios_reviews(reviews)
-    else:
-        print("Skipping main execution due to missing dependency.")
+    reviews = fetch_ios_reviews(app_name="groww-stocks-mutual-fund", app_id=1351630927)
+    filter_and_save_ios_reviews(reviews)
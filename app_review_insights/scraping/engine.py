@@ -0,0 +1,106 @@
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from .. import config
+from .google_play_scraper import (
+    fetch_reviews, checkpoint_path, load_high_water_mark, save_high_water_mark, high_water_mark
+)
+from ..processing.filters import filter_reviews
+from ..storage.review_store import ReviewStore, locale_key
+
+# One scrape unit: an app in a given store locale
+ScrapeTarget = namedtuple("ScrapeTarget", ["app_id", "lang", "country"])
+
+def make_target(app_id, lang=config.LANG, country=config.COUNTRY):
+    return ScrapeTarget(app_id, lang, country)
+
+def scrape_target(target, store=None, weeks_back=None):
+    """
+    Incrementally scrapes one target: fetches reviews newer than its
+    high-water mark (the whole reporting window on the first run), filters
+    that delta and upserts it into the review store, then returns the
+    target's reviews in the window (`weeks_back`, default config.WEEKS_BACK).
+    Everything is keyed by the target, so several targets can run side
+    by side without touching module globals.
+    """
+    app_id, lang, country = target
+    locale = locale_key(lang, country)
+    weeks_back = weeks_back or config.WEEKS_BACK
+    own_store = store is None
+    store = store or ReviewStore()
+
+    try:
+        window_start = (datetime.now() - timedelta(weeks=weeks_back)).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+        # Incremental: only page back to the newest review we already hold,
+        # never further than the reporting window. Without a mark the first
+        # run pages back to the window start, however many reviews that is
+        mark = load_high_water_mark(app_id, lang, country) if store.count_reviews(app_name=app_id, locale=locale) else None
+        if not mark or (mark.get("at") or "") < window_start:
+            mark = {"reviewId": None, "at": window_start}
+
+        # Checkpointed so an interrupted scrape resumes instead of refetching
+        new_reviews = fetch_reviews(
+            app_id=app_id,
+            lang=lang,
+            country=country,
+            checkpoint_file=checkpoint_path(app_id, lang, country),
+            stop_at=mark
+        )
+        store.upsert_reviews(filter_reviews(new_reviews, app_id=app_id, weeks_back=weeks_back, locale=locale))
+        # Only advance the mark once the delta is safely in the store
+        if new_reviews:
+            save_high_water_mark(app_id, high_water_mark(new_reviews), lang, country)
+
+        return {
+            "status": "success",
+            "target": target,
+            "new_review_count": len(new_reviews),
+            "reviews": store.query_reviews(app_name=app_id, platform="Google Play", since=window_start,
+                                           locale=locale),
+        }
+    finally:
+        if own_store:
+            store.close()
+
+def scrape_targets(targets, max_workers=config.SCRAPE_MAX_WORKERS):
+    """
+    Scrapes many (app_id, lang, country) targets concurrently on a bounded
+    thread pool. The store fetch is network-bound, so threads overlap the
+    waiting. Returns {target: result}; a failing target gets an error
+    result instead of aborting the others.
+    """
+    targets = [ScrapeTarget(*t) for t in targets]
+    results = {}
+
+    print(f"Scraping {len(targets)} targets with up to {max_workers} workers...")
+
+    with ReviewStore() as store, ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(scrape_target, t, store): t for t in targets}
+        for future in as_completed(futures):
+            target = futures[future]
+            try:
+                results[target] = future.result()
+            except Exception as e:
+                print(f"Error scraping {target.app_id} ({target.lang}-{target.country}): {e}")
+                results[target] = {"status": "error", "target": target, "message": str(e)}
+
+    ok = sum(1 for r in results.values() if r["status"] == "success")
+    print(f"Scraped {ok}/{len(targets)} targets successfully.")
+    return results
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Scrape several apps/countries concurrently.")
+    parser.add_argument("app_ids", nargs="+", help="Google Play app ids")
+    parser.add_argument("--countries", default=config.COUNTRY, help="Comma-separated country codes")
+    parser.add_argument("--lang", default=config.LANG)
+    parser.add_argument("--workers", type=int, default=config.SCRAPE_MAX_WORKERS)
+    args = parser.parse_args()
+
+    targets = [make_target(a, args.lang, c) for a in args.app_ids for c in args.countries.split(",")]
+    for target, result in scrape_targets(targets, max_workers=args.workers).items():
+        if result["status"] == "success":
+            print(f"{target}: {len(result['reviews'])} reviews ({result['new_review_count']} new)")
+        else:
+            print(f"{target}: ERROR {result['message']}")
@@ -0,0 +1,202 @@
+"""
+Shared fetch-control layer for the store scrapers: a per-host adaptive
+token bucket, exponential backoff with full jitter under a retry budget,
+and a circuit breaker that stops hammering a host that keeps failing.
+
+Scrapers wrap each outbound request in `get_controller(host).call(...)`.
+"""
+import random
+import socket
+import threading
+import time
+from urllib.error import URLError
+from .. import config
+
+THROTTLE_STATUSES = {429, 503}
+RETRYABLE_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+
+class FetchError(Exception):
+    """A fetch failed after exhausting its retry budget."""
+
+class CircuitOpenError(FetchError):
+    """The host's circuit breaker is open; the request was not attempted."""
+
+class TransientFetchError(Exception):
+    """Raised by a fetch function to ask for a retry (e.g. an empty page mid-stream)."""
+
+def _status_of(exc):
+    response = getattr(exc, "response", None)
+    status = getattr(response, "status_code", None)
+    if status is None:
+        status = getattr(exc, "code", None) or getattr(exc, "status", None)
+    return status if isinstance(status, int) else None
+
+def _retry_after(exc):
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or getattr(exc, "headers", None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+def is_retryable(exc):
+    status = _status_of(exc)
+    if status is not None:
+        return status in RETRYABLE_STATUSES
+    return isinstance(exc, (TransientFetchError, URLError, ConnectionError, TimeoutError, socket.timeout)) \
+        or type(exc).__module__.startswith("requests")
+
+class TokenBucket:
+    """
+    Thread-safe token bucket whose refill rate adapts AIMD-style:
+    throttling halves it, each success creeps it back up to `max_rate`.
+    """
+
+    def __init__(self, rate, capacity, min_rate=0.2):
+        self.max_rate = rate
+        self.min_rate = min(min_rate, rate)
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def on_throttled(self):
+        with self.lock:
+            self._refill()
+            self.rate = max(self.min_rate, self.rate / 2)
+
+    def on_success(self):
+        with self.lock:
+            self._refill()
+            self.rate = min(self.max_rate, self.rate + self.max_rate * 0.05)
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures, rejects calls for
+    `reset_timeout` seconds, then lets a single probe through (half-open).
+    """
+
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        self.lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self):
+        with self.lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self.probing:
+                self.probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.probing or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self.probing = False
+
+class FetchController:
+    """Rate limit, retry and circuit-break every request made to one host."""
+
+    def __init__(self, host, rate=None, burst=None, max_retries=None, backoff_base=None,
+                 backoff_max=None, failure_threshold=None, reset_timeout=None):
+        self.host = host
+        self.bucket = TokenBucket(
+            rate or config.FETCH_RATE_LIMIT,
+            burst or config.FETCH_BURST
+        )
+        self.breaker = CircuitBreaker(
+            failure_threshold or config.CIRCUIT_FAILURE_THRESHOLD,
+            reset_timeout if reset_timeout is not None else config.CIRCUIT_RESET_SECONDS
+        )
+        self.max_retries = config.FETCH_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff_base = config.FETCH_BACKOFF_BASE if backoff_base is None else backoff_base
+        self.backoff_max = config.FETCH_BACKOFF_MAX if backoff_max is None else backoff_max
+
+    def backoff(self, attempt):
+        # Full jitter: uniform in [0, min(max, base * 2^attempt)]
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def call(self, fn, *args, **kwargs):
+        """
+        Calls `fn(*args, **kwargs)` under the host's rate limit, retrying
+        retryable failures with backoff. Raises CircuitOpenError without
+        calling when the breaker is open, FetchError when the budget runs
+        out, and re-raises non-retryable errors unchanged.
+        """
+        for attempt in range(self.max_retries + 1):
+            if not self.breaker.allow():
+                raise CircuitOpenError(f"Circuit open for {self.host}; skipping request.")
+
+            self.bucket.acquire()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                if not is_retryable(e):
+                    # The host answered; the request itself is bad
+                    self.breaker.record_success()
+                    raise
+
+                self.breaker.record_failure()
+                if _status_of(e) in THROTTLE_STATUSES:
+                    self.bucket.on_throttled()
+
+                if attempt == self.max_retries:
+                    raise FetchError(f"{self.host}: giving up after {attempt + 1} attempts: {e}") from e
+
+                delay = max(self.backoff(attempt), _retry_after(e) or 0)
+                print(f"Fetch from {self.host} failed ({e}); retry {attempt + 1}/{self.max_retries} in {delay:.1f}s.")
+                time.sleep(delay)
+                continue
+
+            self.breaker.record_success()
+            self.bucket.on_success()
+            return result
+
+_controllers = {}
+_controllers_lock = threading.Lock()
+
+def get_controller(host):
+    """Returns the process-wide controller for `host`, creating it on first use."""
+    with _controllers_lock:
+        if host not in _controllers:
+            _controllers[host] = FetchController(host)
+        return _controllers[host]
@@ -1,42 +1,293 @@
 import json
+import os
+import threading
+import time
+from importlib import metadata
 from google_play_scraper import Sort, reviews
 from datetime import datetime, timedelta
 from .. import config
+from .fetch_control import get_controller, TransientFetchError
+from ..storage.atomic import atomic_write, write_json
+
+PLAY_HOST = "play.google.com"
+
+# The continuation token is a private class of google_play_scraper, so
+# checkpoints record the library version and the fields they rely on; a
+# checkpoint from another version (or a library without the class) is
+# dropped in favour of a fresh scrape rather than resumed
+try:
+    from google_play_scraper.features.reviews import _ContinuationToken
+except ImportError:
+    _ContinuationToken = None
+try:
+    LIBRARY_VERSION = metadata.version("google-play-scraper")
+except metadata.PackageNotFoundError:
+    LIBRARY_VERSION = None
+_TOKEN_FIELDS = ("token", "lang", "country", "sort", "count", "filter_score_with", "filter_device_with")
+
+# Concurrent scrapes share the high-water mark file
+_mark_lock = threading.Lock()
+
+def _serialize_dates(page):
+    # Convert datetime objects to strings for JSON serialization
+    for r in page:
+        for key, value in r.items():
+            if isinstance(value, datetime):
+                r[key] = value.strftime("%Y-%m-%dT%H:%M:%SZ")
+    return page
+
+def checkpoint_path(app_id, lang=config.LANG, country=config.COUNTRY):
+    """Default checkpoint location for a paged fetch of one app/locale."""
+    return os.path.join(config.CHECKPOINT_DIR, f"{app_id}_{lang}_{country}.json")
+
+def _token_to_dict(token):
+    return {field: getattr(token, field) for field in _TOKEN_FIELDS}
+
+def _token_from_dict(data):
+    """The continuation token back from a checkpoint, or None if this library can't take it."""
+    if _ContinuationToken is None or sorted(data) != sorted(_TOKEN_FIELDS):
+        return None
+    try:
+        return _ContinuationToken(**data)
+    except TypeError:
+        return None
 
-def fetch_reviews(app_id=config.APP_ID, lang=config.LANG, country=config.COUNTRY, count=500):
+def _load_checkpoint(checkpoint_file, app_id, lang, country):
     """
-    Fetches reviews from Google Play Store.
+    Returns (token, pages) from a previous interrupted run, or (None, []).
+    Pages live in an append-only JSONL file next to the state file; only the
+    number of pages recorded in the state is trusted, so a crash between the
+    two writes never resumes from a half-written page. Checkpoints older than
+    config.CHECKPOINT_MAX_AGE_HOURS are discarded: newer reviews have pushed
+    the NEWEST-sorted pages along since, so the token no longer lines up.
     """
-    print(f"Fetching reviews for {app_id}...")
-    
-    result, _ = reviews(
+    if not checkpoint_file or not os.path.exists(checkpoint_file):
+        return None, []
+
+    with open(checkpoint_file, 'r', encoding='utf-8') as f:
+        state = json.load(f)
+
+    if (state.get("app_id"), state.get("lang"), state.get("country")) != (app_id, lang, country):
+        print(f"Ignoring checkpoint {checkpoint_file}: it belongs to a different app/locale.")
+        return None, []
+
+    if time.time() - state.get("saved_at", 0) > config.CHECKPOINT_MAX_AGE_HOURS * 3600:
+        print(f"Checkpoint {checkpoint_file} is stale, starting over.")
+        _clear_checkpoint(checkpoint_file)
+        return None, []
+
+    token = _token_from_dict(state.get("token") or {}) if state.get("library_version") == LIBRARY_VERSION else None
+    if token is None:
+        print(f"Checkpoint {checkpoint_file} was written by another google_play_scraper version, starting over.")
+        _clear_checkpoint(checkpoint_file)
+        return None, []
+
+    pages = []
+    pages_file = checkpoint_file + ".pages.jsonl"
+    if os.path.exists(pages_file):
+        with open(pages_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                if len(pages) == state["page_count"]:
+                    break
+                pages.append(json.loads(line))
+
+    if len(pages) < state["page_count"]:
+        print(f"Checkpoint {checkpoint_file} is missing pages, starting over.")
+        _clear_checkpoint(checkpoint_file)
+        return None, []
+
+    # Drop any page appended after the last state write so new pages line up
+    with atomic_write(pages_file) as f:
+        for page in pages:
+            f.write(json.dumps(page) + "\n")
+
+    return token, pages
+
+def _save_checkpoint(checkpoint_file, app_id, lang, country, token, page, page_count):
+    os.makedirs(os.path.dirname(checkpoint_file), exist_ok=True)
+
+    # Append the page first, then advance the state that points at it
+    with open(checkpoint_file + ".pages.jsonl", 'a', encoding='utf-8') as f:
+        f.write(json.dumps(page) + "\n")
+
+    state = {
+        "app_id": app_id,
+        "lang": lang,
+        "country": country,
+        "page_count": page_count,
+        "saved_at": time.time(),
+        "library_version": LIBRARY_VERSION,
+        "token": _token_to_dict(token),
+    }
+    write_json(checkpoint_file, state)
+
+def _clear_checkpoint(checkpoint_file):
+    for path in (checkpoint_file, checkpoint_file + ".pages.jsonl"):
+        if os.path.exists(path):
+            os.remove(path)
+
+def _mark_key(app_id, lang, country):
+    return f"{app_id}|{lang}|{country}"
+
+def load_high_water_mark(app_id, lang=config.LANG, country=config.COUNTRY, state_file=None):
+    """Returns the newest stored review {"reviewId", "at"} for an app, or None."""
+    state_file = state_file or config.HIGH_WATER_MARK_FILE
+    if not os.path.exists(state_file):
+        return None
+    with open(state_file, 'r', encoding='utf-8') as f:
+        marks = json.load(f)
+    return marks.get(_mark_key(app_id, lang, country))
+
+def save_high_water_mark(app_id, mark, lang=config.LANG, country=config.COUNTRY, state_file=None):
+    state_file = state_file or config.HIGH_WATER_MARK_FILE
+    with _mark_lock:
+        marks = {}
+        if os.path.exists(state_file):
+            with open(state_file, 'r', encoding='utf-8') as f:
+                marks = json.load(f)
+        marks[_mark_key(app_id, lang, country)] = mark
+
+        write_json(state_file, marks, indent=2)
+
+def high_water_mark(reviews_data):
+    """The newest review of a newest-first list, in high-water-mark form."""
+    if not reviews_data:
+        return None
+    newest = reviews_data[0]
+    return {"reviewId": newest.get("reviewId"), "at": newest.get("at")}
+
+def _reached_mark(review, stop_at):
+    if stop_at.get("reviewId") and review.get("reviewId") == stop_at["reviewId"]:
+        return True
+    # Timestamps share one fixed-width format, so string order is time order
+    return bool(stop_at.get("at")) and (review.get("at") or "") < stop_at["at"]
+
+def _fetch_page(app_id, lang, country, count, token, expect_reviews=False):
+    page, next_token = reviews(
         app_id,
         lang=lang,
         country=country,
         sort=Sort.NEWEST,
-        count=count
+        count=count,
+        continuation_token=token
     )
-    
-    # Convert datetime objects to strings for JSON serialization
-    for r in result:
-        for key, value in r.items():
-            if isinstance(value, datetime):
-                r[key] = value.strftime("%Y-%m-%dT%H:%M:%SZ")
-            
-    return result
+    if not page and token is not None and token.token is not None:
+        # google_play_scraper swallows request errors and hands back an
+        # empty page; mid-stream that means a failed request, not the end
+        raise TransientFetchError(f"empty page for {app_id} while a continuation token was live")
+    if not page and token is None and expect_reviews:
+        # Same on the first page of a full or window scrape: an empty answer
+        # there is a failed request, and passing it on would report on nothing
+        raise TransientFetchError(f"empty first page for {app_id}")
+    return page, next_token
 
-import os
+def iter_review_pages(app_id=None, lang=config.LANG, country=config.COUNTRY,
+                      page_size=config.PAGE_SIZE, max_reviews=None, checkpoint_file=None,
+                      stop_at=None):
+    """
+    Yields reviews from Google Play Store page by page, following the
+    continuation token until the store runs out or `max_reviews` is reached.
+
+    If `checkpoint_file` is given, the token and every fetched page are
+    persisted after each page, and a later call with the same file resumes
+    where the previous one stopped (checkpointed pages are yielded first).
+    The checkpoint is removed on completion.
+
+    If `stop_at` is a high-water mark ({"reviewId", "at"}), paging stops as
+    soon as that review or anything older shows up, and only the newer
+    reviews are yielded.
+    """
+    app_id = app_id or config.APP_ID
+    token, pages = _load_checkpoint(checkpoint_file, app_id, lang, country)
+    page_count = len(pages)
+    fetched_count = sum(len(page) for page in pages)
+
+    if pages:
+        print(f"Resuming fetch for {app_id} from checkpoint ({fetched_count} reviews, {page_count} pages).")
+    else:
+        print(f"Fetching reviews for {app_id}...")
+
+    for page in pages:
+        yield page
+    del pages
+
+    while max_reviews is None or fetched_count < max_reviews:
+        count = page_size if max_reviews is None else min(page_size, max_reviews - fetched_count)
+        if token is not None:
+            # The token carries the page size forward, so keep it in sync
+            token.count = count
+
+        # Raises FetchError once retries run out; the checkpoint stays on
+        # disk so the next run resumes from the last good page
+        # Only an incremental run (a mark naming a stored review) may find nothing
+        page, token = get_controller(PLAY_HOST).call(_fetch_page, app_id, lang, country, count, token,
+                                                     not (stop_at and stop_at.get("reviewId")))
+        if not page:
+            break
+
+        _serialize_dates(page)
+
+        reached_mark = False
+        if stop_at:
+            for i, r in enumerate(page):
+                if _reached_mark(r, stop_at):
+                    page = page[:i]
+                    reached_mark = True
+                    break
+
+        fetched_count += len(page)
+        page_count += 1
 
-def save_raw_reviews(reviews_data, filepath=config.RAW_REVIEWS_FILE):
+        if checkpoint_file:
+            _save_checkpoint(checkpoint_file, app_id, lang, country, token, page, page_count)
+
+        yield page
+
+        if reached_mark or token.token is None:
+            break
+
+    if checkpoint_file:
+        _clear_checkpoint(checkpoint_file)
+
+    print(f"Fetched {fetched_count} reviews in {page_count} pages.")
+
+def fetch_reviews_paged(app_id=None, lang=config.LANG, country=config.COUNTRY,
+                        page_size=config.PAGE_SIZE, max_reviews=None, checkpoint_file=None,
+                        stop_at=None):
+    """
+    Collects `iter_review_pages` into one newest-first list.
+    """
+    fetched = []
+    for page in iter_review_pages(app_id, lang, country, page_size, max_reviews, checkpoint_file, stop_at):
+        fetched.extend(page)
+    return fetched[:max_reviews] if max_reviews is not None else fetched
+
+def fetch_reviews(app_id=None, lang=config.LANG, country=config.COUNTRY, count=500,
+                  checkpoint_file=None, stop_at=None):
+    """
+    Fetches the newest `count` reviews from Google Play Store.
+    With a `stop_at` high-water mark, `count` no longer caps the fetch:
+    everything newer than the mark is returned so incremental runs leave no gaps.
+    """
+    return fetch_reviews_paged(
+        app_id=app_id,
+        lang=lang,
+        country=country,
+        max_reviews=None if stop_at else count,
+        checkpoint_file=checkpoint_file,
+        stop_at=stop_at
+    )
+
+def save_raw_reviews(reviews_data, filepath=None):
+    filepath = filepath or config.RAW_REVIEWS_FILE
     print(f"DEBUG: Attempting to save reviews to {filepath}")
-    
+
     # Ensure directory exists
     try:
         os.makedirs(os.path.dirname(filepath), exist_ok=True)
         print(f"DEBUG: Directory {os.path.dirname(filepath)} created/checked.")
     except Exception as e:
         print(f"DEBUG: Failed to create dir: {e}")
-        
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(reviews_data, f, indent=2)
+
+    write_json(filepath, reviews_data, indent=2)
     print(f"Saved {len(reviews_data)} raw reviews to {filepath}")
@@ -0,0 +1,384 @@
+"""
+Async job service: the api.py actions behind a small HTTP/JSON interface.
+
+A request enqueues a job and returns its id straight away; a bounded pool
+of workers runs the (blocking) actions on threads, so one process serves
+many dashboards and schedulers without a Python start-up per run. An
+identical request for the same app while a job is still queued or running
+gets that job's id back instead of a second job. Jobs for the same app and
+locale run one at a time (whatever their window), in the order they were
+submitted.
+
+    POST /jobs        {"action": "scrape", "app_url": "..."}  -> 202 {"job_id": ...}
+    GET  /jobs/<id>   status, progress and (once finished) the action's result
+    GET  /jobs        recent jobs (?app_id=... to filter)
+    GET  /health      queue and worker counts
+
+Besides the single actions there is "pipeline", which runs the whole
+memoized stage DAG and reports progress per stage.
+"""
+import asyncio
+import json
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, parse_qs
+from . import config
+from . import api
+from .context import RunContext
+from .pipeline import build_review_pipeline
+
+def _run_pipeline(ctx, params, progress):
+    pipeline = build_review_pipeline(ctx)
+    done = []
+
+    def on_stage_done(run):
+        done.append(run.name)
+        progress({"stages_done": len(done), "stages_total": len(pipeline.stages), "last_stage": run.name})
+
+    runs = pipeline.run(force=params.get("force", False), on_stage_done=on_stage_done)
+    stages = {name: {"status": run.status, "seconds": round(run.seconds, 3)} for name, run in runs.items()}
+    if not pipeline.succeeded(runs):
+        failed = [name for name, run in runs.items() if run.status in ("failed", "blocked")]
+        return {"status": "error", "message": f"Stages failed: {', '.join(failed)}", "stages": stages}
+    return {"action_performed": "PIPELINE", "status": "success", "data_preview": {"stages": stages}}
+
+# action -> fn(ctx, params, progress) returning an api-style result dict
+ACTIONS = {
+    "scrape": lambda ctx, params, progress: api.scrape_reviews_action(ctx=ctx),
+    "categorize": lambda ctx, params, progress: api.categorize_reviews_action(ctx),
+    "report": lambda ctx, params, progress: api.generate_weekly_note_action(ctx),
+    "draft": lambda ctx, params, progress: api.create_email_draft_action(ctx),
+    "send": lambda ctx, params, progress: api.send_email_action(params["email"], ctx),
+    "discover": lambda ctx, params, progress: api.discover_themes_action(ctx),
+    "pipeline": _run_pipeline,
+}
+
+class JobError(Exception):
+    """A request the service refuses; carries the HTTP status to answer with."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+class Job:
+    def __init__(self, action, ctx, params, key):
+        self.id = uuid.uuid4().hex[:12]
+        self.action = action
+        self.ctx = ctx
+        self.params = params
+        self.key = key
+        self.status = "queued"
+        self.progress = None
+        self.result = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._callbacks = []
+
+    @property
+    def in_flight(self):
+        return self.status in ("queued", "running")
+
+    def add_done_callback(self, fn):
+        """Calls fn(job) once the job has finished (right away if it already has)."""
+        if self.in_flight:
+            self._callbacks.append(fn)
+        else:
+            fn(self)
+
+    def _finished(self):
+        for fn in self._callbacks:
+            try:
+                fn(self)
+            except Exception as e:
+                print(f"WARNING: Callback for job {self.id} failed: {e}")
+        self._callbacks = []
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "action": self.action,
+            "app_id": self.ctx.app_id,
+            "lang": self.ctx.lang,
+            "country": self.ctx.country,
+            "status": self.status,
+            "progress": self.progress,
+            "created_at": _timestamp(self.created_at),
+            "started_at": _timestamp(self.started_at),
+            "finished_at": _timestamp(self.finished_at),
+            "seconds": round(self.finished_at - self.started_at, 3) if self.finished_at and self.started_at else None,
+            "result": self.result,
+        }
+
+def _timestamp(t):
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(t)) if t else None
+
+def parse_job_request(payload):
+    """(action, ctx, params) from a POST /jobs body; JobError(400) if it is malformed."""
+    if not isinstance(payload, dict):
+        raise JobError(400, "Request body must be a JSON object")
+    action = payload.get("action")
+    if action not in ACTIONS:
+        raise JobError(400, f"Unknown action {action!r}; expected one of {sorted(ACTIONS)}")
+
+    overrides = {key: payload[key] for key in ("lang", "country", "weeks_back") if payload.get(key)}
+    if "weeks_back" in overrides and not isinstance(overrides["weeks_back"], int):
+        raise JobError(400, "weeks_back must be an integer")
+    try:
+        if payload.get("app_url"):
+            ctx = RunContext.from_url(payload["app_url"], **overrides)
+        elif payload.get("app_id"):
+            ctx = RunContext.for_app(payload["app_id"], **overrides)
+        else:
+            raise JobError(400, "Either app_url or app_id is required")
+    except ValueError as e:
+        raise JobError(400, str(e))
+
+    params = {}
+    if action == "send":
+        if "@" not in str(payload.get("email", "")):
+            raise JobError(400, "send needs a valid email")
+        params["email"] = payload["email"]
+    if action == "pipeline" and payload.get("force"):
+        params["force"] = payload["force"]
+    return action, ctx, params
+
+def _app_key(ctx):
+    # Runs of one app and locale share its data dir, snapshots and pipeline
+    # state whatever their window, so they are serialized on this, not on ctx
+    return (ctx.app_id, ctx.lang, ctx.country)
+
+class JobService:
+    def __init__(self, workers=None, max_queue=None, history=None):
+        self.workers = workers or config.SERVICE_WORKERS
+        self.max_queue = max_queue or config.SERVICE_MAX_QUEUE
+        self.history = history or config.SERVICE_JOB_HISTORY
+        self.jobs = OrderedDict()  # job id -> Job, oldest first
+        self.in_flight = {}  # dedup key -> in-flight Job
+        # app key -> jobs waiting for that app's current job; an app is only
+        # present while it has a job queued or running
+        self.app_backlog = {}
+        self.queue = None
+        self.executor = None
+        self.tasks = []
+
+    async def start(self):
+        self.queue = asyncio.Queue()
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="job")
+        self.tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.executor.shutdown(wait=True)
+
+    def submit(self, action, ctx, params):
+        """Returns (job, deduplicated). Raises JobError(503) when the queue is full."""
+        key = json.dumps([action, ctx, params], sort_keys=True)
+        job = self.in_flight.get(key)
+        if job is not None:
+            return job, True
+
+        if sum(1 for j in self.in_flight.values() if j.status == "queued") >= self.max_queue:
+            raise JobError(503, "Job queue is full, try again later")
+
+        job = Job(action, ctx, params, key)
+        self.jobs[job.id] = job
+        self.in_flight[key] = job
+        # A job only reaches the worker queue once the app's previous job is
+        # done, so an app's jobs run in order without tying up idle workers
+        app = _app_key(ctx)
+        if app in self.app_backlog:
+            self.app_backlog[app].append(job)
+        else:
+            self.app_backlog[app] = deque()
+            self.queue.put_nowait(job)
+        self._trim_history()
+        return job, False
+
+    def app_busy(self, ctx):
+        """True while the app has a job queued or running."""
+        return _app_key(ctx) in self.app_backlog
+
+    def _trim_history(self):
+        finished = [job_id for job_id, job in self.jobs.items() if not job.in_flight]
+        for job_id in finished[:max(0, len(finished) - self.history)]:
+            del self.jobs[job_id]
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    def list(self, app_id=None):
+        return [job for job in self.jobs.values() if app_id is None or job.ctx.app_id == app_id]
+
+    def stats(self):
+        counts = {"queued": 0, "running": 0}
+        for job in self.in_flight.values():
+            counts[job.status] += 1
+        return {"status": "ok", "workers": self.workers, **counts, "jobs_tracked": len(self.jobs)}
+
+    async def _worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await self.queue.get()
+            try:
+                job.status = "running"
+                job.started_at = time.time()
+                job.result = await loop.run_in_executor(self.executor, self._run, job)
+                job.status = "succeeded" if job.result.get("status") == "success" else "failed"
+            except Exception as e:
+                # e.g. the executor refusing work; _run already turns action errors into results
+                job.result = {"status": "error", "message": f"{type(e).__name__}: {e}"}
+                job.status = "failed"
+            finally:
+                if job.status == "running":
+                    # Cancelled while running (service stopping)
+                    job.status = "failed"
+                job.finished_at = time.time()
+                self.in_flight.pop(job.key, None)
+                app = _app_key(job.ctx)
+                backlog = self.app_backlog[app]
+                if backlog:
+                    self.queue.put_nowait(backlog.popleft())
+                else:
+                    del self.app_backlog[app]
+                job._finished()
+                self.queue.task_done()
+
+    def _run(self, job):
+        def progress(update):
+            job.progress = update
+        try:
+            return ACTIONS[job.action](job.ctx, job.params, progress)
+        except Exception as e:
+            return {"status": "error", "message": f"{type(e).__name__}: {e}"}
+
+    async def wait(self, job_id, poll=0.05):
+        """Waits until a job has finished; for in-process callers and tests."""
+        while self.jobs[job_id].in_flight:
+            await asyncio.sleep(poll)
+        return self.jobs[job_id]
+
+# --- HTTP ---
+
+_REASONS = {200: "OK", 202: "Accepted", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            413: "Payload Too Large", 503: "Service Unavailable"}
+_MAX_BODY = 1 << 16
+
+async def _read_request(reader):
+    request_line = (await reader.readline()).decode("latin-1").strip()
+    if not request_line:
+        return None
+    method, target, _ = request_line.split(" ", 2)
+    headers = {}
+    while True:
+        line = (await reader.readline()).decode("latin-1").strip()
+        if not line:
+            break
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get("content-length") or 0)
+    if length > _MAX_BODY:
+        raise JobError(413, "Request body too large")
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), target, body
+
+def handle_request(service, method, target, body):
+    """Routes one request; returns (status, JSON-able body)."""
+    url = urlsplit(target)
+    parts = [p for p in url.path.split("/") if p]
+
+    if parts == ["health"] and method == "GET":
+        return 200, service.stats()
+    if parts == ["jobs"] and method == "POST":
+        try:
+            payload = json.loads(body or b"null")
+        except ValueError:
+            raise JobError(400, "Request body is not valid JSON")
+        job, deduplicated = service.submit(*parse_job_request(payload))
+        return 202, {"job_id": job.id, "status": job.status, "deduplicated": deduplicated}
+    if parts == ["jobs"] and method == "GET":
+        app_id = parse_qs(url.query).get("app_id", [None])[0]
+        return 200, {"jobs": [job.to_dict() for job in service.list(app_id)]}
+    if len(parts) == 2 and parts[0] == "jobs" and method == "GET":
+        job = service.get(parts[1])
+        if job is None:
+            raise JobError(404, f"No job {parts[1]}")
+        return 200, job.to_dict()
+    if parts in (["health"], ["jobs"]) or (len(parts) == 2 and parts[0] == "jobs"):
+        raise JobError(405, f"{method} not allowed on {url.path}")
+    raise JobError(404, f"No route for {url.path}")
+
+async def _handle_connection(service, reader, writer):
+    try:
+        try:
+            request = await _read_request(reader)
+            if request is None:
+                return
+            status, payload = handle_request(service, *request)
+        except JobError as e:
+            status, payload = e.status, {"status": "error", "message": str(e)}
+        except (ValueError, asyncio.IncompleteReadError):
+            status, payload = 400, {"status": "error", "message": "Malformed HTTP request"}
+
+        body = json.dumps(payload, default=str).encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n"
+            .encode("latin-1") + body
+        )
+        await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+def _report_scheduler_exit(task):
+    if not task.cancelled() and task.exception() is not None:
+        print(f"ERROR: Scheduler stopped: {type(task.exception()).__name__}: {task.exception()}")
+
+async def serve(host=None, port=None, workers=None, schedule=None):
+    """Serves jobs over HTTP; with `schedule` (scheduler entries) also runs them on their cadence."""
+    from .scheduler import Scheduler
+    service = JobService(workers=workers)
+    await service.start()
+    server = await asyncio.start_server(lambda r, w: _handle_connection(service, r, w),
+                                        host or config.SERVICE_HOST, port or config.SERVICE_PORT)
+    addresses = ", ".join(str(sock.getsockname()) for sock in server.sockets)
+    print(f"Job service listening on {addresses} with {service.workers} workers")
+    scheduler = None
+    if schedule:
+        scheduler = asyncio.create_task(Scheduler(service, schedule).run())
+        # Nothing awaits the task until shutdown, so report a crash right away
+        scheduler.add_done_callback(_report_scheduler_exit)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        if scheduler:
+            scheduler.cancel()
+        await service.stop()
+
+def run_service(host=None, port=None, workers=None, schedule=None):
+    try:
+        asyncio.run(serve(host, port, workers, schedule))
+    except KeyboardInterrupt:
+        print("Job service stopped.")
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Serve the api actions as async jobs over HTTP.")
+    parser.add_argument("--host", default=config.SERVICE_HOST)
+    parser.add_argument("--port", type=int, default=config.SERVICE_PORT)
+    parser.add_argument("--workers", type=int, default=config.SERVICE_WORKERS)
+    parser.add_argument("--schedule", nargs="?", const=config.SCHEDULE_FILE,
+                        help="Also run the recurring pipelines in this schedule file")
+    args = parser.parse_args()
+    schedule = None
+    if args.schedule:
+        from .scheduler import load_schedule
+        schedule = load_schedule(args.schedule)
+    run_service(args.host, args.port, args.workers, schedule)
@@ -0,0 +1,74 @@
+"""
+Crash-safe file writes.
+
+atomic_write writes to a temporary file in the target's directory, fsyncs
+it, renames it over the target with os.replace and fsyncs the directory,
+so readers (and the next run after a crash) see either the old file or
+the complete new one, never a truncated mix.
+"""
+import json
+import os
+import stat
+import tempfile
+from contextlib import contextmanager
+
+# Read once at import: os.umask can only be queried by setting it, which
+# would race with other threads creating files
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+def _target_mode(path):
+    """The target's current permissions, or what open() would give a new file."""
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        return 0o666 & ~_UMASK
+
+def _fsync_dir(directory):
+    # Makes the rename itself durable; directories can't be opened on Windows
+    if os.name != "posix":
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+@contextmanager
+def atomic_write(path, mode='w', encoding='utf-8', newline=None):
+    """
+    Context manager yielding a file object; the target is replaced only if
+    the block finishes without raising. `mode` is 'w' or 'wb'.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    # A unique temp name, so concurrent writers of one target never share it
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=directory)
+    try:
+        if 'b' in mode:
+            f = os.fdopen(fd, mode)
+        else:
+            f = os.fdopen(fd, mode, encoding=encoding, newline=newline)
+        with f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp creates the file owner-only; keep the mode a plain write would have
+        os.chmod(tmp_path, _target_mode(path))
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    _fsync_dir(directory)
+
+def write_json(path, data, **kwargs):
+    """json.dump(data) into `path` atomically; kwargs go to json.dump."""
+    with atomic_write(path) as f:
+        json.dump(data, f, **kwargs)
+
+def write_text(path, text):
+    with atomic_write(path) as f:
+        f.write(text)
@@ -0,0 +1,155 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from .. import config
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS classifications (
+    key        TEXT PRIMARY KEY,
+    theme      TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_used  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_classifications_last_used ON classifications (last_used);
+"""
+
+_WHITESPACE = re.compile(r"\s+")
+
+def normalize_text(text):
+    """Case and whitespace differences don't change a review's theme."""
+    return _WHITESPACE.sub(" ", (text or "").lower()).strip()
+
+def cache_key(text, themes, classifier):
+    """
+    Content address of one classification: the normalized text, the
+    candidate themes (order matters for tie-breaking) and the classifier
+    identity, e.g. "openai:gpt-4o-mini".
+    """
+    payload = "\x1f".join([classifier, "\x1e".join(themes), normalize_text(text)])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class ClassificationCache:
+    """
+    Two-tier theme cache: an in-memory LRU in front of a SQLite table.
+
+    Entries expire `ttl_days` after they were written; the disk tier is
+    trimmed to `max_entries` by least recent use. Hit/miss counters are
+    kept per instance. One instance may be shared across threads.
+    """
+
+    def __init__(self, path=None, memory_size=None, max_entries=None, ttl_days=None):
+        self.path = path or config.CLASSIFICATION_CACHE_FILE
+        self.memory_size = memory_size if memory_size is not None else config.CLASSIFICATION_CACHE_MEMORY_SIZE
+        self.max_entries = max_entries if max_entries is not None else config.CLASSIFICATION_CACHE_MAX_ENTRIES
+        ttl_days = ttl_days if ttl_days is not None else config.CLASSIFICATION_CACHE_TTL_DAYS
+        self.ttl = ttl_days * 86400 if ttl_days else None
+
+        self.memory = OrderedDict()  # key -> (theme, created_at)
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock, self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.executescript(_SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    def _expired(self, created_at, now):
+        return self.ttl is not None and now - created_at > self.ttl
+
+    def _remember(self, key, theme, created_at):
+        self.memory[key] = (theme, created_at)
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_size:
+            self.memory.popitem(last=False)
+
+    def get_many(self, keys):
+        """Returns {key: theme} for the keys that are cached and fresh."""
+        now = time.time()
+        found = {}
+        with self.lock:
+            disk_keys = []
+            for key in dict.fromkeys(keys):
+                entry = self.memory.get(key)
+                if entry and not self._expired(entry[1], now):
+                    self.memory.move_to_end(key)
+                    found[key] = entry[0]
+                    self.stats["memory_hits"] += 1
+                else:
+                    self.memory.pop(key, None)
+                    disk_keys.append(key)
+
+            # Chunked to stay under SQLite's bound-parameter limit
+            for i in range(0, len(disk_keys), 500):
+                chunk = disk_keys[i:i + 500]
+                rows = self.conn.execute(
+                    f"SELECT key, theme, created_at FROM classifications WHERE key IN ({','.join('?' * len(chunk))})",
+                    chunk
+                ).fetchall()
+                for key, theme, created_at in rows:
+                    if not self._expired(created_at, now):
+                        found[key] = theme
+                        self._remember(key, theme, created_at)
+                        self.stats["disk_hits"] += 1
+
+            hits = [k for k in disk_keys if k in found]
+            self.stats["misses"] += len(disk_keys) - len(hits)
+            if hits:
+                with self.conn:
+                    self.conn.executemany("UPDATE classifications SET last_used = ? WHERE key = ?",
+                                          [(now, k) for k in hits])
+        return found
+
+    def get(self, key):
+        return self.get_many([key]).get(key)
+
+    def put_many(self, items):
+        """Stores {key: theme} in both tiers, then applies eviction."""
+        now = time.time()
+        with self.lock:
+            for key, theme in items.items():
+                self._remember(key, theme, now)
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO classifications (key, theme, created_at, last_used) VALUES (?, ?, ?, ?)",
+                    [(key, theme, now, now) for key, theme in items.items()]
+                )
+            self._evict(now)
+
+    def put(self, key, theme):
+        self.put_many({key: theme})
+
+    def _evict(self, now):
+        with self.conn:
+            removed = 0
+            if self.ttl is not None:
+                removed += self.conn.execute("DELETE FROM classifications WHERE created_at < ?",
+                                             (now - self.ttl,)).rowcount
+            if self.max_entries:
+                excess = self.conn.execute("SELECT COUNT(*) FROM classifications").fetchone()[0] - self.max_entries
+                if excess > 0:
+                    removed += self.conn.execute(
+                        "DELETE FROM classifications WHERE key IN "
+                        "(SELECT key FROM classifications ORDER BY last_used LIMIT ?)",
+                        (excess,)
+                    ).rowcount
+        self.stats["evictions"] += removed
+
+    def hit_rate(self):
+        hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+        total = hits + self.stats["misses"]
+        return hits / total if total else 0.0
@@ -0,0 +1,147 @@
+"""
+Optional columnar backend: review datasets as Parquet, hive-partitioned by
+app and ISO week, with typed date/rating/theme columns. Readers ask for the
+columns they need and get them through memory-mapped files instead of
+re-parsing CSV or JSON.
+"""
+import os
+import pandas as pd
+from .. import config
+from .review_store import locale_key
+
+# Stubbing the import so the default (non-columnar) setup runs without pyarrow
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    from pyarrow import fs
+except ImportError:
+    pa = None
+    print("WARNING: pyarrow library not found. Columnar storage will be disabled.")
+
+PARTITION_COLUMNS = ["app_name", "week"]
+
+def _schema():
+    return pa.schema([
+        ("platform", pa.dictionary(pa.int8(), pa.string())),
+        ("locale", pa.dictionary(pa.int8(), pa.string())),
+        ("review_id", pa.string()),
+        ("date", pa.timestamp("s", tz="UTC")),
+        ("rating", pa.int8()),
+        ("title", pa.string()),
+        ("text", pa.string()),
+        ("theme", pa.dictionary(pa.int8(), pa.string())),
+        ("duplicate_of", pa.string()),
+        ("sentiment", pa.float32()),
+        ("app_name", pa.string()),
+        ("week", pa.string()),
+    ])
+
+def _partitioning():
+    return ds.partitioning(pa.schema([("app_name", pa.string()), ("week", pa.string())]), flavor="hive")
+
+def is_enabled():
+    """True when the columnar backend is switched on and pyarrow is importable."""
+    return config.COLUMNAR_BACKEND and pa is not None
+
+def _open_dataset(root):
+    return ds.dataset(
+        root,
+        format="parquet",
+        partitioning=_partitioning(),
+        # Explicit schema so files written before a column existed read it as null
+        schema=_schema(),
+        filesystem=fs.LocalFileSystem(use_mmap=True)
+    )
+
+def _existing_rows(root, table):
+    """
+    Rows already stored in the (app, week) partitions `table` touches, minus
+    the reviews `table` replaces (matched by locale and review_id).
+    """
+    if not os.path.isdir(root):
+        return None
+    apps = pc.unique(table["app_name"])
+    weeks = pc.unique(table["week"])
+    existing = _open_dataset(root).to_table(
+        filter=ds.field("app_name").isin(apps) & ds.field("week").isin(weeks)
+    )
+    if not existing.num_rows:
+        return None
+    # Rows written before the locale column existed belong to the default locale
+    default = locale_key()
+    locales = [locale or default for locale in existing["locale"].to_pylist()]
+    existing = existing.set_column(existing.schema.get_field_index("locale"), "locale",
+                                   pa.array(locales).dictionary_encode().cast(_schema().field("locale").type))
+    touched = set(zip(table["app_name"].to_pylist(), table["week"].to_pylist()))
+    replaced = set(zip(table["locale"].to_pylist(), table["review_id"].to_pylist()))
+    keep = [
+        (app, week) in touched and (locale, review_id) not in replaced
+        for app, week, locale, review_id in zip(existing["app_name"].to_pylist(), existing["week"].to_pylist(),
+                                                locales, existing["review_id"].to_pylist())
+    ]
+    return existing.filter(pa.array(keep, type=pa.bool_()))
+
+def write_reviews(reviews, root=None):
+    """
+    Upserts normalized reviews into the dataset by (locale, review_id). Each (app,
+    week) partition present in `reviews` is rewritten with its stored rows
+    merged in, so rewriting the current window is idempotent, reviews of a
+    partially covered week are kept, and other weeks are never touched.
+    """
+    if pa is None:
+        raise RuntimeError("pyarrow is required for the columnar backend.")
+    root = root or config.COLUMNAR_DIR
+    if not reviews:
+        return 0
+
+    df = pd.DataFrame(reviews)
+    for column in ("platform", "locale", "review_id", "title", "text", "theme", "duplicate_of", "sentiment"):
+        if column not in df:
+            df[column] = None
+    df["date"] = pd.to_datetime(df["date"], format="%Y-%m-%dT%H:%M:%SZ", utc=True)
+    iso = df["date"].dt.isocalendar()
+    df["week"] = iso["year"].astype(str) + "-W" + iso["week"].astype(str).str.zfill(2)
+    df["review_id"] = df["review_id"].astype("string")
+
+    table = pa.Table.from_pandas(df[_schema().names], schema=_schema(), preserve_index=False)
+    # The partitions are replaced as a whole, so carry their other rows over
+    existing = _existing_rows(root, table)
+    if existing is not None:
+        table = pa.concat_tables([existing, table])
+    ds.write_dataset(
+        table,
+        root,
+        format="parquet",
+        partitioning=_partitioning(),
+        existing_data_behavior="delete_matching",
+        basename_template="part-{i}.parquet"
+    )
+    return len(df)
+
+def load_reviews(columns=None, app_name=None, since=None, root=None, locale=None):
+    """
+    Loads reviews as a DataFrame, reading only `columns` (all if None) and
+    pruning partitions by app. `since` is a "%Y-%m-%dT%H:%M:%SZ" string;
+    `locale` keeps one store locale (see review_store.locale_key).
+    """
+    if pa is None:
+        raise RuntimeError("pyarrow is required for the columnar backend.")
+    root = root or config.COLUMNAR_DIR
+    if not os.path.isdir(root):
+        return pd.DataFrame(columns=columns or _schema().names)
+
+    dataset = _open_dataset(root)
+    expression = None
+    if app_name is not None:
+        expression = ds.field("app_name") == app_name
+    if locale is not None:
+        locale_filter = ds.field("locale") == locale
+        expression = locale_filter if expression is None else expression & locale_filter
+    if since is not None:
+        cutoff = pa.scalar(pd.Timestamp(since), type=pa.timestamp("s", tz="UTC"))
+        date_filter = ds.field("date") >= cutoff
+        expression = date_filter if expression is None else expression & date_filter
+
+    table = dataset.to_table(columns=columns, filter=expression)
+    return table.to_pandas()
@@ -0,0 +1,429 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+from .. import config
+
+COLUMNS = ["platform", "app_name", "locale", "review_id", "date", "rating", "title", "text", "theme",
+           "duplicate_of", "sentiment"]
+
+# Reviews are kept per app *and* store locale (see locale_key): a run for
+# one locale reads, tags and reports only that locale's reviews
+_REVIEWS_TABLE = """
+CREATE TABLE IF NOT EXISTS {table} (
+    platform    TEXT NOT NULL,
+    app_name    TEXT NOT NULL,
+    locale      TEXT NOT NULL,
+    review_id   TEXT NOT NULL,
+    date        TEXT NOT NULL,
+    rating      INTEGER,
+    title       TEXT,
+    text        TEXT,
+    theme       TEXT,
+    duplicate_of TEXT,
+    sentiment   REAL,
+    ingested_at TEXT NOT NULL,
+    PRIMARY KEY (platform, app_name, locale, review_id)
+)"""
+
+_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_reviews_app_locale_date ON reviews (app_name, locale, date)",
+    "CREATE INDEX IF NOT EXISTS idx_reviews_app_locale_theme ON reviews (app_name, locale, theme)",
+    "CREATE INDEX IF NOT EXISTS idx_reviews_app_locale_rating ON reviews (app_name, locale, rating)",
+]
+
+def locale_key(lang=None, country=None):
+    """The store's locale for a Play Store language and country, e.g. "en_in"."""
+    return f"{lang or config.LANG}_{country or config.COUNTRY}"
+
+# Materialized per-(app, locale, week, theme) aggregates, kept current by
+# triggers on `reviews`. week_start is the Monday of the review's ISO week.
+# A review contributes while it is tagged and not a near-duplicate; any
+# change to its date, rating, theme, duplicate_of or sentiment swaps its
+# old contribution for the new one, so re-tags never double count.
+AGGREGATE_COLUMNS = ["review_count", "rating_sum", "sentiment_sum", "sentiment_count",
+                     "positive_count", "negative_count"]
+
+_AGGREGATE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS theme_weekly (
+    app_name        TEXT NOT NULL,
+    locale          TEXT NOT NULL,
+    week_start      TEXT NOT NULL,
+    theme           TEXT NOT NULL,
+    review_count    INTEGER NOT NULL DEFAULT 0,
+    rating_sum      INTEGER NOT NULL DEFAULT 0,
+    sentiment_sum   REAL NOT NULL DEFAULT 0,
+    sentiment_count INTEGER NOT NULL DEFAULT 0,
+    positive_count  INTEGER NOT NULL DEFAULT 0,
+    negative_count  INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (app_name, locale, week_start, theme)
+)"""
+
+_WEEK_START = "date(substr({row}.date, 1, 10), 'weekday 0', '-6 days')"
+
+def _add_contribution(row):
+    week = _WEEK_START.format(row=row)
+    return f"""
+    INSERT INTO theme_weekly (app_name, locale, week_start, theme, review_count, rating_sum, sentiment_sum,
+                              sentiment_count, positive_count, negative_count)
+    SELECT {row}.app_name, {row}.locale, {week}, {row}.theme, 1, COALESCE({row}.rating, 0), COALESCE({row}.sentiment, 0),
+           {row}.sentiment IS NOT NULL,
+           COALESCE({row}.sentiment >= {config.SENTIMENT_POSITIVE_THRESHOLD}, 0),
+           COALESCE({row}.sentiment <= {config.SENTIMENT_NEGATIVE_THRESHOLD}, 0)
+    WHERE {row}.theme IS NOT NULL AND {row}.duplicate_of IS NULL
+    ON CONFLICT (app_name, locale, week_start, theme) DO UPDATE SET
+        review_count = review_count + excluded.review_count,
+        rating_sum = rating_sum + excluded.rating_sum,
+        sentiment_sum = sentiment_sum + excluded.sentiment_sum,
+        sentiment_count = sentiment_count + excluded.sentiment_count,
+        positive_count = positive_count + excluded.positive_count,
+        negative_count = negative_count + excluded.negative_count;"""
+
+def _remove_contribution(row):
+    week = _WEEK_START.format(row=row)
+    where = (f"app_name = {row}.app_name AND locale = {row}.locale AND week_start = {week} AND theme = {row}.theme "
+             f"AND {row}.theme IS NOT NULL AND {row}.duplicate_of IS NULL")
+    return f"""
+    UPDATE theme_weekly SET
+        review_count = review_count - 1,
+        rating_sum = rating_sum - COALESCE({row}.rating, 0),
+        sentiment_sum = sentiment_sum - COALESCE({row}.sentiment, 0),
+        sentiment_count = sentiment_count - ({row}.sentiment IS NOT NULL),
+        positive_count = positive_count - COALESCE({row}.sentiment >= {config.SENTIMENT_POSITIVE_THRESHOLD}, 0),
+        negative_count = negative_count - COALESCE({row}.sentiment <= {config.SENTIMENT_NEGATIVE_THRESHOLD}, 0)
+    WHERE {where};
+    DELETE FROM theme_weekly WHERE {where} AND review_count <= 0;"""
+
+# Store-level settings the aggregates depend on
+_META_SCHEMA = """
+CREATE TABLE IF NOT EXISTS store_meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# Bumped whenever the tables, indexes or triggers change; stores whose
+# store_meta row is behind are migrated on open
+SCHEMA_VERSION = "2"
+
+def _aggregate_settings():
+    """The config the positive/negative counts were built with, as stored in store_meta."""
+    return f"{config.SENTIMENT_POSITIVE_THRESHOLD}|{config.SENTIMENT_NEGATIVE_THRESHOLD}"
+
+def _aggregate_triggers():
+    # Recreated with the current thresholds whenever they change (theme_weekly
+    # is rebuilt at the same time, so a trigger never removes a contribution
+    # counted under other thresholds).
+    # A list of statements, so they can run inside one transaction
+    return [
+        "DROP TRIGGER IF EXISTS reviews_aggregate_insert",
+        "DROP TRIGGER IF EXISTS reviews_aggregate_update",
+        "DROP TRIGGER IF EXISTS reviews_aggregate_delete",
+        f"""CREATE TRIGGER reviews_aggregate_insert AFTER INSERT ON reviews BEGIN{_add_contribution("NEW")}
+END""",
+        f"""CREATE TRIGGER reviews_aggregate_update AFTER UPDATE OF date, rating, theme, duplicate_of, sentiment ON reviews
+WHEN OLD.date IS NOT NEW.date OR OLD.rating IS NOT NEW.rating OR OLD.theme IS NOT NEW.theme
+  OR OLD.duplicate_of IS NOT NEW.duplicate_of OR OLD.sentiment IS NOT NEW.sentiment
+BEGIN{_remove_contribution("OLD")}{_add_contribution("NEW")}
+END""",
+        f"""CREATE TRIGGER reviews_aggregate_delete AFTER DELETE ON reviews BEGIN{_remove_contribution("OLD")}
+END""",
+    ]
+
+def _backfill_aggregates():
+    week = _WEEK_START.format(row="reviews")
+    return f"""
+    INSERT INTO theme_weekly (app_name, locale, week_start, theme, review_count, rating_sum, sentiment_sum,
+                              sentiment_count, positive_count, negative_count)
+    SELECT app_name, locale, {week}, theme, COUNT(*), COALESCE(SUM(rating), 0), COALESCE(SUM(sentiment), 0),
+           COUNT(sentiment),
+           COALESCE(SUM(sentiment >= {config.SENTIMENT_POSITIVE_THRESHOLD}), 0),
+           COALESCE(SUM(sentiment <= {config.SENTIMENT_NEGATIVE_THRESHOLD}), 0)
+    FROM reviews
+    WHERE theme IS NOT NULL AND duplicate_of IS NULL
+    GROUP BY app_name, locale, {week}, theme"""
+
+def week_start(timestamp):
+    """Monday (ISO week start) of a "%Y-%m-%dT%H:%M:%SZ" timestamp, as "%Y-%m-%d"."""
+    day = datetime.strptime(timestamp[:10], "%Y-%m-%d")
+    return (day - timedelta(days=day.weekday())).strftime("%Y-%m-%d")
+
+# Columns added after the first release, with their SQL types
+_ADDED_COLUMNS = {"duplicate_of": "TEXT", "sentiment": "REAL"}
+
+# Re-ingesting an edited review clears its theme so it gets reclassified,
+# and restamps ingested_at so readers of the store see the change
+_UPSERT = """
+INSERT INTO reviews (platform, app_name, locale, review_id, date, rating, title, text, theme, ingested_at)
+VALUES (:platform, :app_name, :locale, :review_id, :date, :rating, :title, :text, :theme, :ingested_at)
+ON CONFLICT (platform, app_name, locale, review_id) DO UPDATE SET
+    date = excluded.date,
+    rating = excluded.rating,
+    title = excluded.title,
+    theme = CASE WHEN reviews.text = excluded.text THEN COALESCE(excluded.theme, reviews.theme) ELSE excluded.theme END,
+    duplicate_of = CASE WHEN reviews.text = excluded.text THEN reviews.duplicate_of ELSE NULL END,
+    sentiment = CASE WHEN reviews.text = excluded.text THEN reviews.sentiment ELSE NULL END,
+    ingested_at = CASE WHEN reviews.text = excluded.text THEN reviews.ingested_at ELSE excluded.ingested_at END,
+    text = excluded.text
+"""
+
+def review_key(review):
+    """
+    The review's store id: the platform's own id when it has one, otherwise
+    a content hash (app_store_scraper output carries no id).
+    """
+    if review.get("review_id"):
+        return str(review["review_id"])
+    digest = hashlib.sha1(f"{review.get('date')}|{review.get('title')}|{review.get('text')}".encode("utf-8"))
+    return digest.hexdigest()
+
+class ReviewStore:
+    """
+    SQLite-backed review history keyed by (platform, app, locale, review id).
+
+    Stages upsert only the reviews they produce and query the slice they
+    need (an app, a date range, untagged rows), so nothing rewrites the
+    whole history. The database runs in WAL mode so report reads don't
+    block ingestion. One instance may be shared across threads.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or config.REVIEW_STORE_FILE
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.lock = threading.Lock()
+        with self.lock:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            # Stores are opened per action and job, so an up-to-date store
+            # opens without a write transaction
+            if not self._is_current():
+                self._set_up()
+
+    def _meta(self):
+        if not self._columns("store_meta"):
+            return {}
+        return {row["key"]: row["value"] for row in self.conn.execute("SELECT key, value FROM store_meta")}
+
+    def _is_current(self):
+        meta = self._meta()
+        return (meta.get("schema_version") == SCHEMA_VERSION
+                and meta.get("aggregate_settings") == _aggregate_settings())
+
+    def _set_up(self):
+        """Creates or migrates the schema and (re)builds the aggregates, under the write lock."""
+        # Concurrent runs open their own stores; taking the write lock up
+        # front keeps their migrations and trigger swaps from interleaving
+        with self.conn:
+            self.conn.execute("BEGIN IMMEDIATE")
+            # Another process may have finished the same setup while we waited
+            if self._is_current():
+                return
+            self.conn.execute(_REVIEWS_TABLE.format(table="reviews"))
+            # Stores created by older versions lack the later columns
+            existing = self._columns("reviews")
+            for column, sql_type in _ADDED_COLUMNS.items():
+                if column not in existing:
+                    self.conn.execute(f"ALTER TABLE reviews ADD COLUMN {column} {sql_type}")
+            rebuild = False
+            if "locale" not in existing:
+                self._add_locale_key()
+                rebuild = True
+            for statement in _INDEXES:
+                self.conn.execute(statement)
+            aggregate_columns = self._columns("theme_weekly")
+            if aggregate_columns and "locale" not in aggregate_columns:
+                # Aggregates from before the locale key; rebuilt below
+                self.conn.execute("DROP TABLE theme_weekly")
+                rebuild = True
+            self.conn.execute(_AGGREGATE_SCHEMA)
+            self.conn.execute(_META_SCHEMA)
+            for statement in _aggregate_triggers():
+                self.conn.execute(statement)
+            # Built on first open, and rebuilt when the sentiment
+            # thresholds the counts were made with have changed
+            built_with = self.conn.execute(
+                "SELECT value FROM store_meta WHERE key = 'aggregate_settings'"
+            ).fetchone()
+            if rebuild or built_with is None or built_with["value"] != _aggregate_settings():
+                self.conn.execute("DELETE FROM theme_weekly")
+                self.conn.execute(_backfill_aggregates())
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO store_meta (key, value) VALUES (?, ?)",
+                [("aggregate_settings", _aggregate_settings()), ("schema_version", SCHEMA_VERSION)]
+            )
+
+    def _columns(self, table):
+        return {row["name"] for row in self.conn.execute(f"PRAGMA table_info({table})")}
+
+    def _add_locale_key(self):
+        """
+        Moves a store from before the locale key onto the current table.
+        Those stores only held reviews scraped for config.LANG/COUNTRY
+        runs, so their rows get that locale.
+        """
+        columns = [c for c in COLUMNS if c != "locale"] + ["ingested_at"]
+        self.conn.execute(_REVIEWS_TABLE.format(table="reviews_migrated"))
+        self.conn.execute(
+            f"INSERT INTO reviews_migrated ({', '.join(columns)}, locale) "
+            f"SELECT {', '.join(columns)}, ? FROM reviews",
+            (locale_key(),)
+        )
+        # Dropping the old table takes its indexes and triggers with it
+        self.conn.execute("DROP TABLE reviews")
+        self.conn.execute("ALTER TABLE reviews_migrated RENAME TO reviews")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    def upsert_reviews(self, reviews):
+        """Inserts new reviews and refreshes changed ones. Returns the row count."""
+        ingested_at = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        rows = [
+            {
+                "platform": r.get("platform", "Google Play"),
+                "app_name": r["app_name"],
+                "locale": r.get("locale") or locale_key(),
+                "review_id": review_key(r),
+                "date": r["date"],
+                "rating": r.get("rating"),
+                "title": r.get("title", ""),
+                "text": r.get("text", ""),
+                "theme": r.get("theme"),
+                "ingested_at": ingested_at,
+            }
+            for r in reviews
+        ]
+        with self.lock, self.conn:
+            self.conn.executemany(_UPSERT, rows)
+        return len(rows)
+
+    def set_themes(self, tagged_reviews):
+        """
+        Writes the `theme` (plus `duplicate_of`, the representative's review
+        id for near-duplicates, and `sentiment`) of already-stored reviews
+        back to the store.
+        """
+        rows = [
+            (r["theme"], r.get("duplicate_of"), r.get("sentiment"),
+             r.get("platform", "Google Play"), r["app_name"], r.get("locale") or locale_key(), review_key(r))
+            for r in tagged_reviews
+        ]
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "UPDATE reviews SET theme = ?, duplicate_of = ?, sentiment = ? "
+                "WHERE platform = ? AND app_name = ? AND locale = ? AND review_id = ?",
+                rows
+            )
+        return len(rows)
+
+    def _where(self, app_name, locale, platform, since, until, theme, untagged_only):
+        clauses, params = [], []
+        if app_name is not None:
+            clauses.append("app_name = ?")
+            params.append(app_name)
+        if locale is not None:
+            clauses.append("locale = ?")
+            params.append(locale)
+        if platform is not None:
+            clauses.append("platform = ?")
+            params.append(platform)
+        if since is not None:
+            clauses.append("date >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("date < ?")
+            params.append(until)
+        if theme is not None:
+            clauses.append("theme = ?")
+            params.append(theme)
+        if untagged_only:
+            clauses.append("theme IS NULL")
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def query_reviews(self, app_name=None, platform=None, since=None, until=None, theme=None,
+                      untagged_only=False, columns=None, locale=None):
+        """
+        Returns matching reviews newest first as dicts. `since`/`until` are
+        "%Y-%m-%dT%H:%M:%SZ" strings (until is exclusive); `columns` limits
+        the fields loaded. `locale` (see locale_key) limits them to one
+        store locale; None means all of the app's locales.
+        """
+        columns = columns or COLUMNS
+        unknown = set(columns) - set(COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown review columns: {sorted(unknown)}")
+
+        where, params = self._where(app_name, locale, platform, since, until, theme, untagged_only)
+        sql = f"SELECT {', '.join(columns)} FROM reviews{where} ORDER BY date DESC"
+        with self.lock:
+            return [dict(row) for row in self.conn.execute(sql, params)]
+
+    def count_reviews(self, app_name=None, platform=None, since=None, until=None, theme=None,
+                      untagged_only=False, locale=None):
+        where, params = self._where(app_name, locale, platform, since, until, theme, untagged_only)
+        with self.lock:
+            return self.conn.execute(f"SELECT COUNT(*) FROM reviews{where}", params).fetchone()[0]
+
+    def slice_state(self, app_name=None, platform=None, since=None, until=None, locale=None):
+        """
+        {"count", "last_ingested_at"} of the matching reviews: changes whenever
+        a review enters or leaves the slice, or one in it is added or edited.
+        """
+        where, params = self._where(app_name, locale, platform, since, until, None, False)
+        with self.lock:
+            row = self.conn.execute(f"SELECT COUNT(*), MAX(ingested_at) FROM reviews{where}", params).fetchone()
+        return {"count": row[0], "last_ingested_at": row[1]}
+
+    def _aggregate_where(self, app_name, locale, since, until):
+        clauses, params = [], []
+        if app_name is not None:
+            clauses.append("app_name = ?")
+            params.append(app_name)
+        if locale is not None:
+            clauses.append("locale = ?")
+            params.append(locale)
+        if since is not None:
+            clauses.append("week_start >= ?")
+            params.append(week_start(since))
+        if until is not None:
+            clauses.append("week_start < ?")
+            params.append(week_start(until))
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def weekly_theme_stats(self, app_name=None, since=None, until=None, locale=None):
+        """
+        Rows of the materialized (app, week, theme) aggregates, oldest week
+        first, summed over the app's locales unless `locale` picks one.
+        `since`/`until` are timestamps, widened to whole ISO weeks.
+        """
+        where, params = self._aggregate_where(app_name, locale, since, until)
+        sums = ", ".join(f"SUM({c}) AS {c}" for c in AGGREGATE_COLUMNS)
+        sql = (f"SELECT app_name, week_start, theme, {sums} FROM theme_weekly{where} "
+               "GROUP BY app_name, week_start, theme ORDER BY app_name, week_start, theme")
+        with self.lock:
+            return [dict(row) for row in self.conn.execute(sql, params)]
+
+    def theme_totals(self, app_name=None, since=None, until=None, locale=None):
+        """{theme: {aggregate column: sum}} over the matching weeks, most reviews first."""
+        where, params = self._aggregate_where(app_name, locale, since, until)
+        sums = ", ".join(f"SUM({c}) AS {c}" for c in AGGREGATE_COLUMNS)
+        sql = f"SELECT theme, {sums} FROM theme_weekly{where} GROUP BY theme ORDER BY review_count DESC, theme"
+        with self.lock:
+            return {row["theme"]: {c: row[c] for c in AGGREGATE_COLUMNS} for row in self.conn.execute(sql, params)}
+
+    def theme_counts(self, app_name=None, since=None, until=None, locale=None):
+        """Returns [(theme, count)] for tagged reviews, most frequent first."""
+        where, params = self._where(app_name, locale, None, since, until, None, False)
+        where += (" AND" if where else " WHERE") + " theme IS NOT NULL"
+        sql = f"SELECT theme, COUNT(*) AS n FROM reviews{where} GROUP BY theme ORDER BY n DESC, theme"
+        with self.lock:
+            return [(row["theme"], row["n"]) for row in self.conn.execute(sql, params)]
@@ -0,0 +1,79 @@
+"""
+Streaming pipeline mode: reviews flow page by page from the fetcher through
+filtering, PII redaction and theming into a JSONL sink, while only running
+aggregates are kept for the report. Peak memory is bounded by
+the page and chunk sizes, not by how many reviews the window holds.
+"""
+import json
+from collections import Counter
+from . import config
+from .context import RunContext
+from .scraping.google_play_scraper import iter_review_pages
+from .processing.filters import iter_filter_reviews
+from .processing.theming import iter_theme_reviews
+from .processing.sentiment import sentiment_labels
+from .storage.atomic import atomic_write
+
+class ThemeAggregates:
+    """Running per-theme counts, rating sums and sentiment tallies; all the report needs."""
+
+    def __init__(self):
+        self.counts = Counter()
+        self.rating_sums = Counter()
+        self.sentiment_sums = Counter()
+        self.sentiment_counts = {}
+        self.total = 0
+
+    def add(self, review):
+        # Near-duplicates are counted once, through their representative
+        if review.get('duplicate_of'):
+            return
+        theme = review['theme']
+        self.counts[theme] += 1
+        self.rating_sums[theme] += review.get('rating') or 0
+        if review.get('sentiment') is not None:
+            self.sentiment_sums[theme] += review['sentiment']
+            self.sentiment_counts.setdefault(theme, Counter())[sentiment_labels([review['sentiment']])[0]] += 1
+        self.total += 1
+
+    def mean_ratings(self):
+        return {theme: self.rating_sums[theme] / n for theme, n in self.counts.items()}
+
+    def sentiment_distribution(self):
+        """Same shape as weekly_note.theme_sentiment_distribution."""
+        return {
+            theme: {
+                **{label: labels[label] for label in ("positive", "neutral", "negative")},
+                "mean": round(self.sentiment_sums[theme] / sum(labels.values()), 3)
+            }
+            for theme, labels in self.sentiment_counts.items()
+        }
+
+def run_streaming_pipeline(app_id=None, lang=None, country=None, sink_file=None, chunk_size=None,
+                           max_reviews=None, weeks_back=None):
+    """
+    Streams every review in the `weeks_back` window for one app into
+    `sink_file` (one tagged review per line) and returns ThemeAggregates.
+    Each run replaces the sink with its own window, so reruns never
+    duplicate rows; readers see the previous sink until the run finishes.
+    Defaults come from config, and the sink from the app's RunContext.
+    """
+    ctx = RunContext.for_app(app_id or config.APP_ID, lang, country, weeks_back)
+    app_id, lang, country = ctx.app_id, ctx.lang, ctx.country
+    sink_file = sink_file or ctx.stream_sink_file
+    window_start = ctx.window_start()
+
+    # Newest-first paging can stop at the window edge
+    pages = iter_review_pages(app_id, lang, country, max_reviews=max_reviews,
+                              stop_at={"reviewId": None, "at": window_start})
+    raw_reviews = (r for page in pages for r in page)
+    tagged_reviews = iter_theme_reviews(iter_filter_reviews(raw_reviews, app_id, ctx.weeks_back, ctx.locale), chunk_size)
+
+    aggregates = ThemeAggregates()
+    with atomic_write(sink_file) as f:
+        for r in tagged_reviews:
+            f.write(json.dumps(r) + "\n")
+            aggregates.add(r)
+
+    print(f"Streamed {aggregates.total} tagged reviews into {sink_file}")
+    return aggregates
@@ -17,7 +17,9 @@ from app_review_insights.api import (
 )
 # Import email sender directly
 from app_review_insights.reporting.email_sender import send_weekly_email
-from app_review_insights import config
+from app_review_insights.context import RunContext
+from app_review_insights.processing.sentiment import sentiment_labels
+from app_review_insights.storage import columnar_store
 
 # Page Config
 st.set_page_config(
@@ -49,9 +51,14 @@ def get_theme_insight(theme_name, reviews_df):
         
     avg_rating = theme_df['rating'].mean()
     
-    # Base sentiment
+    # Base sentiment: review text scores when theming added them, else star rating
     sentiment = "Mixed feedback"
-    if avg_rating >= 4.0: sentiment = "Positive sentiment"
+    if 'sentiment' in theme_df and theme_df['sentiment'].notna().any():
+        # Same cutoffs as the report's positive/negative counts
+        label = sentiment_labels([theme_df['sentiment'].mean()])[0]
+        if label == "positive": sentiment = "Positive sentiment"
+        elif label == "negative": sentiment = "Critical feedback"
+    elif avg_rating >= 4.0: sentiment = "Positive sentiment"
     elif avg_rating <= 2.5: sentiment = "Critical feedback"
     
     # Condensed descriptors for bullet points (No quotes)
@@ -68,7 +75,7 @@ def get_theme_insight(theme_name, reviews_df):
     else:
         summary = "General feedback breakdown available in report."
         
-    return f"**{theme_name}** ({count} reviews, {avg_rating:.1f}⭐) — {summary}"
+    return f"**{theme_name}** ({count} reviews, {avg_rating:.1f}⭐, {sentiment}) — {summary}"
 
 # --- Step 1: App URL & Scraping ---
 st.header("1. App URL & Scraping")
@@ -76,19 +83,31 @@ st.header("1. App URL & Scraping")
 default_url = "https://play.google.com/store/apps/details?id=com.nextbillion.groww"
 app_url = st.text_input("Google Play Store App URL", value=default_url)
 
+# Every step runs for the app in the URL box, with its own data and output files
+try:
+    ctx = RunContext.from_url(app_url) if "play.google.com" in app_url else None
+except ValueError:
+    ctx = None
+
 if st.button("Scrape Reviews"):
-    if not app_url or "play.google.com" not in app_url or "id=" not in app_url:
+    if ctx is None:
         st.error("Please enter a valid Google Play Store URL.")
     else:
         with st.spinner("Scraping reviews (and redacting PII)..."):
-            result = scrape_reviews_action(app_url)
+            result = scrape_reviews_action(ctx=ctx)
             
         if result["status"] == "success":
             st.success(f"Successfully scraped {result['data_preview']['review_count']} reviews!")
             st.info(f"App ID: {result['data_preview']['app_id']}")
             
             # Show preview (redacted)
-            if os.path.exists(result['data_preview'].get('csv_path', '')):
+            if result['data_preview'].get('columnar_path'):
+                # Columnar backend: read just the preview columns of the reporting window
+                df = columnar_store.load_reviews(columns=['date', 'rating', 'text', 'theme'],
+                                                 app_name=ctx.app_id, locale=ctx.locale,
+                                                 since=ctx.window_start())
+                st.dataframe(df.sort_values('date', ascending=False).head(5), use_container_width=True)
+            elif os.path.exists(result['data_preview'].get('csv_path', '')):
                 df = pd.read_csv(result['data_preview']['csv_path'])
                 # Ensure no user names in preview if columns exist
                 cols_to_show = ['date', 'rating', 'text', 'theme'] if 'theme' in df.columns else ['date', 'rating', 'text']
@@ -104,19 +123,24 @@ if st.button("Scrape Reviews"):
 st.header("2. Categorize Reviews")
 
 if st.button("Categorize Reviews"):
-    if not os.path.exists(config.FILTERED_REVIEWS_FILE):
+    if ctx is None or not os.path.exists(ctx.filtered_reviews_file):
         st.error("No scraped data found. Please run Step 1 first.")
     else:
         with st.spinner("Categorizing reviews into themes..."):
-            result = categorize_reviews_action()
+            result = categorize_reviews_action(ctx)
             
         if result["status"] == "success":
             st.success(f"Categorized {result['data_preview']['tagged_count']} reviews!")
             
             # Load tagged data for insights
-            with open(config.TAGGED_REVIEWS_FILE, 'r', encoding='utf-8') as f:
-                tagged_data = json.load(f)
-            df = pd.DataFrame(tagged_data)
+            if columnar_store.is_enabled():
+                # Same reporting window as the tagged JSON snapshot
+                df = columnar_store.load_reviews(columns=['theme', 'rating', 'sentiment'], app_name=ctx.app_id,
+                                                 locale=ctx.locale, since=ctx.window_start())
+            else:
+                with open(ctx.tagged_reviews_file, 'r', encoding='utf-8') as f:
+                    tagged_data = json.load(f)
+                df = pd.DataFrame(tagged_data)
             
             st.subheader("Category Summaries")
             
@@ -133,11 +157,11 @@ if st.button("Categorize Reviews"):
 st.header("3. Weekly Pulse Summary")
 
 if st.button("Generate Weekly Pulse Summary"):
-    if not os.path.exists(config.TAGGED_REVIEWS_FILE):
+    if ctx is None or not os.path.exists(ctx.tagged_reviews_file):
         st.error("No categorized data found. Please run Step 2 first.")
     else:
         with st.spinner("Generating weekly report..."):
-            result = generate_weekly_note_action()
+            result = generate_weekly_note_action(ctx)
             
         if result["status"] == "success":
             st.success("Weekly report generated!")
@@ -153,18 +177,18 @@ if st.button("Generate Weekly Pulse Summary"):
 st.header("4. Generate Email Draft")
 
 if st.button("Generate Email Draft"):
-    if not os.path.exists(config.TAGGED_REVIEWS_FILE): # Draft needs tagged data
+    if ctx is None or not os.path.exists(ctx.tagged_reviews_file): # Draft needs tagged data
         st.error("Please complete previous steps first.")
     else:
         with st.spinner("Drafting email..."):
-            draft_result = create_email_draft_action()
+            draft_result = create_email_draft_action(ctx)
             
         if draft_result["status"] == "success":
             st.success("Email draft prepared!")
             
             # Parse subject and body from the draft file or preview
             try:
-                with open(config.EMAIL_DRAFT_FILE, 'r', encoding='utf-8') as f:
+                with open(ctx.email_draft_file, 'r', encoding='utf-8') as f:
                     content = f.read()
                     lines = content.split('\n')
                     subject = lines[0].replace("Subject: ", "").strip()
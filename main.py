@@ -1,58 +1,94 @@
 import sys
 import argparse
 from app_review_insights.api import (
-    scrape_reviews_action,
-    categorize_reviews_action,
-    generate_weekly_note_action,
-    create_email_draft_action
+    create_email_draft_action,
+    stream_pipeline_action
 )
+from app_review_insights.context import RunContext
+from app_review_insights.pipeline import build_review_pipeline, format_timings
 
-def run_pipeline(url=None):
+def run_streaming_pipeline(url):
+    print("🚀 Starting App Review Insights Pipeline (streaming)...")
+
+    print("\n--- Steps 1-3: Streaming Scrape → Categorize → Weekly Pulse ---")
+    ctx = RunContext.from_url(url)
+    res = stream_pipeline_action(ctx=ctx)
+    if res['status'] != 'success':
+        print(f"❌ Streaming pipeline failed: {res.get('message')}")
+        return
+    print(f"✅ Streamed {res['data_preview']['tagged_count']} reviews into {res['data_preview']['sink_path']}.")
+
+    print("\n--- Step 4: Drafting Email ---")
+    res = create_email_draft_action(ctx)
+    if res['status'] != 'success':
+        print(f"❌ Draft creation failed: {res.get('message')}")
+        return
+    print("✅ Email draft created.")
+
+    print("\n✨ Pipeline Completed Successfully! ✨")
+
+def run_pipeline(url=None, force=False):
     print("🚀 Starting App Review Insights Pipeline...")
     
-    # 1. Scrape
-    print("\n--- Step 1: Scraping Reviews ---")
     if not url:
         url = input("Enter Google Play Store App URL (or press Enter for default): ").strip()
     if not url:
         url = "https://play.google.com/store/apps/details?id=com.nextbillion.groww"
-        
-    res = scrape_reviews_action(url)
-    if res['status'] != 'success':
-        print(f"❌ Scraping failed: {res.get('message')}")
-        return
-    print(f"✅ Scraped {res['data_preview']['review_count']} reviews.")
-    
-    # 2. Categorize
-    print("\n--- Step 2: Categorizing Reviews ---")
-    res = categorize_reviews_action()
-    if res['status'] != 'success':
-        print(f"❌ Categorization failed: {res.get('message')}")
-        return
-    print(f"✅ Categorized {res['data_preview']['tagged_count']} reviews.")
-    
-    # 3. Report
-    print("\n--- Step 3: Generating Weekly Pulse ---")
-    res = generate_weekly_note_action()
-    if res['status'] != 'success':
-        print(f"❌ Report generation failed: {res.get('message')}")
+
+    # Stages whose inputs, config and code are unchanged since the last run are reused
+    try:
+        ctx = RunContext.from_url(url)
+    except ValueError as e:
+        print(f"❌ {e}")
         return
-    print("✅ Weekly report generated.")
-    
-    # 4. Email Draft
-    print("\n--- Step 4: Drafting Email ---")
-    res = create_email_draft_action()
-    if res['status'] != 'success':
-        print(f"❌ Draft creation failed: {res.get('message')}")
+    pipeline = build_review_pipeline(ctx)
+    runs = pipeline.run(force=force, on_stage_done=_report_stage)
+
+    print("\n--- Stage Timings ---")
+    print(format_timings(runs))
+    if not pipeline.succeeded(runs):
+        print("\n❌ Pipeline did not complete.")
         return
-    print("✅ Email draft created.")
     
     print("\n✨ Pipeline Completed Successfully! ✨")
-    print("Check the 'output/' directory for results.")
+    print(f"Check {ctx.output_dir} for results.")
+
+def _report_stage(run):
+    if run.status == "failed":
+        print(f"❌ {run.name} failed: {run.result.get('message')}")
+    elif run.status == "cached":
+        print(f"♻️  {run.name} unchanged, reusing previous output.")
+    else:
+        print(f"✅ {run.name} done in {run.seconds:.2f}s.")
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Run the App Review Insights pipeline.")
     parser.add_argument("--url", help="Google Play Store App URL")
+    parser.add_argument("--streaming", action="store_true",
+                        help="Stream reviews through the pipeline in chunks (bounded memory, for large backfills)")
+    parser.add_argument("--serve", action="store_true",
+                        help="Run the HTTP job service instead (see app_review_insights/service.py)")
+    parser.add_argument("--schedule", nargs="?", const="", metavar="FILE",
+                        help="Run the recurring pipelines in a schedule file (default schedule.json); "
+                             "with --serve, alongside the HTTP service")
+    parser.add_argument("--force", nargs="*", metavar="STAGE",
+                        help="Re-run stages even if unchanged (all stages, or just the ones named)")
     args = parser.parse_args()
     
-    run_pipeline(args.url)
+    if args.serve:
+        from app_review_insights.service import run_service
+        from app_review_insights.scheduler import load_schedule
+        run_service(schedule=load_schedule(args.schedule or None) if args.schedule is not None else None)
+    elif args.schedule is not None:
+        import asyncio
+        from app_review_insights.scheduler import run_scheduler
+        try:
+            asyncio.run(run_scheduler(args.schedule or None))
+        except KeyboardInterrupt:
+            print("Scheduler stopped.")
+    elif args.streaming:
+        run_streaming_pipeline(args.url or "https://play.google.com/store/apps/details?id=com.nextbillion.groww")
+    else:
+        # --force alone forces everything; --force report draft only those stages
+        force = args.force if args.force else args.force is not None
+        run_pipeline(args.url, force=force)
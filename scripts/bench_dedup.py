@@ -0,0 +1,38 @@
+import sys
+import os
+import time
+import random
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app_review_insights.processing.dedup import near_duplicate_groups
+from bench_theming import make_corpus
+
+TEMPLATES = [
+    "worst app ever my money is stuck for {} days and customer support is not responding please refund",
+    "app crashed during market hours and my order got rejected {} times please fix this asap",
+    "very good app for beginners easy to use and invest in mutual funds {} stars from me",
+]
+
+def make_templated_corpus(n, duplicate_share=0.1, seed=42):
+    """Random reviews plus copy-pasted complaints with small edits."""
+    random.seed(seed)
+    corpus = make_corpus(int(n * (1 - duplicate_share)), seed)
+    for _ in range(n - len(corpus)):
+        corpus.append(random.choice(TEMPLATES).format(random.randint(2, 9)) + random.choice(["", "!!", " now"]))
+    random.shuffle(corpus)
+    return corpus
+
+def main(n=100_000):
+    corpus = make_templated_corpus(n)
+    print(f"Grouping {n:,} synthetic reviews (10% templated)...")
+    start = time.perf_counter()
+    labels = near_duplicate_groups(corpus)
+    elapsed = time.perf_counter() - start
+    groups = len(set(labels.tolist()))
+    print(f"  MinHash + LSH            {elapsed:7.3f}s  {n / elapsed:>10,.0f} reviews/s")
+    print(f"  {groups:,} groups; classification work cut by {1 - groups / n:.1%}")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,36 @@
+import sys
+import os
+import time
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app_review_insights import config
+from app_review_insights.llm_client import LLMClient
+from app_review_insights.processing.theming import categorize_texts_parallel
+from bench_theming import make_corpus
+
+def bench(label, fn):
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<28} {elapsed:7.3f}s")
+    return elapsed, result
+
+def main(n=200_000):
+    corpus = make_corpus(n)
+    # The keyword mock always runs serially; tfidf (keyword themes until a
+    # model is trained) is the local provider that goes through the pool
+    client = LLMClient("tfidf")
+    print(f"Theming {n:,} synthetic reviews with {client.provider} on {os.cpu_count()} CPUs...")
+    serial, expected = bench("serial", lambda: client.categorize_batch(corpus, config.THEME_LIST))
+    for workers in (2, 4, os.cpu_count()):
+        if not workers or workers < 2:
+            continue
+        elapsed, result = bench(f"{workers} worker processes",
+                                lambda: categorize_texts_parallel(client, corpus, max_workers=workers))
+        assert result == expected, "parallel theming changed the result order"
+        print(f"  Speedup: {serial / elapsed:.2f}x")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
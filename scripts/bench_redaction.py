@@ -0,0 +1,51 @@
+import sys
+import os
+import re
+import time
+import random
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app_review_insights.processing.redaction import DEFAULT_ENGINE
+
+def legacy_sanitize_review_text(text):
+    """The previous three-pass implementation, kept here as the baseline."""
+    if not text:
+        return ""
+    text = re.sub(r'[\w\.-]+@[\w\.-]+\.\w+', '[EMAIL REDACTED]', text)
+    text = re.sub(r'\b\d{7,}\b', '[PHONE REDACTED]', text)
+    text = re.sub(r'(?:-|~|by)\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)', '[NAME REDACTED]', text)
+    return text
+
+def make_corpus(n, seed=42):
+    random.seed(seed)
+    words = ("app good trading charges slow support refund stock order login update "
+             "brokerage chart market ipo withdraw kyc money option").split()
+    extras = ["mail me at user.name@gmail.com", "call 9876543210", "- Rahul Sharma",
+              "pay via rahul@okaxis", "PAN ABCDE1234F", "fixed by Monday"]
+    corpus = []
+    for _ in range(n):
+        text = " ".join(random.choice(words) for _ in range(random.randint(10, 60)))
+        if random.random() < 0.2:
+            text += " " + random.choice(extras)
+        corpus.append(text)
+    return corpus
+
+def bench(label, fn, corpus):
+    start = time.perf_counter()
+    fn(corpus)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<32} {elapsed:7.3f}s  {len(corpus) / elapsed:>10,.0f} reviews/s")
+    return elapsed
+
+def main(n=100_000):
+    corpus = make_corpus(n)
+    print(f"Redacting {n:,} synthetic reviews (20% contain PII)...")
+    legacy = bench("legacy 3x re.sub", lambda c: [legacy_sanitize_review_text(t) for t in c], corpus)
+    engine = bench("engine redact_batch", DEFAULT_ENGINE.redact_batch, corpus)
+    bench("engine redact_batch (spans)", lambda c: DEFAULT_ENGINE.redact_batch(c, with_spans=True), corpus)
+    print(f"Speedup (text only): {legacy / engine:.2f}x")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
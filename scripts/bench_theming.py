@@ -0,0 +1,85 @@
+import sys
+import os
+import time
+import random
+import pandas as pd
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app_review_insights import config
+from app_review_insights.processing.keyword_themes import KeywordThemeEngine
+
+SAMPLE_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                           "output", "reviews_latest.csv")
+
+def legacy_mock_categorize(text):
+    """The previous ordered any()-scan mock that the engine replaced, kept here as the baseline."""
+    text_lower = text.lower()
+    if any(w in text_lower for w in ['support', 'customer', 'service', 'reply']):
+        return "Customer Support"
+    if any(w in text_lower for w in ['charge', 'fee', 'money', 'cost', 'brokerage']):
+        return "Pricing & Charges"
+    if any(w in text_lower for w in ['bug', 'crash', 'slow', 'lag', 'install', 'error']):
+        return "App Performance & Bugs"
+    if any(w in text_lower for w in ['feature', 'option', 'trade', 'stock', 'f&o', 'ipo']):
+        return "Trading & Features"
+    return "User Experience"
+
+def make_corpus(n, seed=42):
+    """Synthetic reviews: filler words with up to 3 config keywords mixed in (used by the other benches)."""
+    random.seed(seed)
+    filler = ("the app is really very good but sometimes i feel that it could be better for "
+              "new users who want to invest money in the market every day").split()
+    keywords = [k for keywords in config.THEME_KEYWORDS.values() for k in keywords]
+    corpus = []
+    for _ in range(n):
+        words = [random.choice(filler) for _ in range(random.randint(10, 60))]
+        for _ in range(random.randint(0, 3)):
+            words.insert(random.randrange(len(words) + 1), random.choice(keywords))
+        corpus.append(" ".join(words))
+    return corpus
+
+def load_corpus(n):
+    """The checked-in review sample, repeated up to n reviews."""
+    texts = pd.read_csv(SAMPLE_FILE)["text"].dropna().astype(str).tolist()
+    return (texts * (n // len(texts) + 1))[:n], len(texts)
+
+def scaled_keywords(factor):
+    """config.THEME_KEYWORDS padded with synthetic keywords, to show how cost scales."""
+    scaled = {theme: dict(keywords) for theme, keywords in config.THEME_KEYWORDS.items()}
+    for theme, keywords in scaled.items():
+        for i in range(len(keywords) * (factor - 1)):
+            keywords[f"{theme.split()[0].lower()}kw{i}"] = 1
+    return scaled
+
+def bench(label, fn, corpus, repeat=3):
+    # Best of `repeat` runs
+    elapsed = min(_timed(fn, corpus) for _ in range(repeat))
+    print(f"  {label:<40} {elapsed:7.3f}s  {len(corpus) / elapsed:>10,.0f} reviews/s")
+    return elapsed
+
+def _timed(fn, corpus):
+    start = time.perf_counter()
+    for text in corpus:
+        fn(text)
+    return time.perf_counter() - start
+
+def main(n=100_000):
+    corpus, unique = load_corpus(n)
+    print(f"Classifying {n:,} reviews ({unique} distinct, from {os.path.relpath(SAMPLE_FILE)})...")
+    legacy = bench("legacy mock (22 keywords, first hit)", legacy_mock_categorize, corpus)
+    for factor in (1, 5):
+        theme_keywords = scaled_keywords(factor)
+        keyword_count = sum(len(k) for k in theme_keywords.values())
+        engine = KeywordThemeEngine(theme_keywords)
+        elapsed = bench(f"keyword engine ({keyword_count} keywords, ranked)", engine.classify, corpus)
+        print(f"  engine / legacy time: {elapsed / legacy:.2f}")
+
+    texts = corpus[:unique]
+    engine = KeywordThemeEngine()
+    changed = sum(engine.classify(t) != legacy_mock_categorize(t) for t in texts)
+    print(f"Themes that differ from the legacy mock: {changed} of {unique} reviews")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
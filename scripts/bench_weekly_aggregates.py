@@ -0,0 +1,53 @@
+import sys
+import os
+import time
+import random
+import tempfile
+from datetime import datetime, timedelta
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+from app_review_insights import config
+from app_review_insights.storage.review_store import ReviewStore
+
+def fill_store(store, n, weeks=52, seed=42):
+    """n tagged reviews spread over the last `weeks` weeks."""
+    random.seed(seed)
+    now = datetime.now()
+    span = weeks * 7 * 24 * 3600
+    reviews = [{
+        "app_name": "bench.app",
+        "review_id": f"r{i}",
+        "date": (now - timedelta(seconds=random.randrange(span))).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "rating": random.randint(1, 5),
+        "text": f"review {i}",
+        "theme": random.choice(config.THEME_LIST),
+        "sentiment": round(random.uniform(-1, 1), 3),
+    } for i in range(n)]
+    store.upsert_reviews(reviews)
+    store.set_themes(reviews)
+
+def bench(label, fn, repeat=5):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    elapsed = (time.perf_counter() - start) / repeat
+    print(f"  {label:<36} {elapsed * 1000:9.2f} ms")
+    return elapsed
+
+def main(n=200_000):
+    with tempfile.TemporaryDirectory() as tmp, ReviewStore(os.path.join(tmp, "reviews.db")) as store:
+        print(f"Loading {n:,} tagged reviews spanning a year...")
+        fill_store(store, n)
+        since = (datetime.now() - timedelta(weeks=52)).strftime("%Y-%m-%dT%H:%M:%SZ")
+        print("Per-theme totals for the year:")
+        full = bench("rows + DataFrame value_counts", lambda: pd.DataFrame(
+            store.query_reviews(app_name="bench.app", since=since, columns=["theme", "rating", "sentiment"])
+        )["theme"].value_counts())
+        agg = bench("materialized theme_weekly", lambda: store.theme_totals(app_name="bench.app", since=since))
+        print(f"  Speedup: {full / agg:.0f}x")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
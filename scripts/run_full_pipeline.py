@@ -1,41 +1,32 @@
 import sys
 import os
-import json
+import argparse
 
 # Add project root to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app_review_insights import config
-from app_review_insights.scraping.google_play_scraper import fetch_reviews, save_raw_reviews
-from app_review_insights.processing.filters import filter_reviews
-from app_review_insights.processing.theming import theme_reviews
-from app_review_insights.reporting.weekly_note import generate_weekly_note
-from app_review_insights.reporting.email_draft import generate_email_draft
+from app_review_insights.context import RunContext
+from app_review_insights.pipeline import build_review_pipeline, format_timings
+
+DEFAULT_URL = "https://play.google.com/store/apps/details?id=com.nextbillion.groww"
 
 def main():
+    parser = argparse.ArgumentParser(description="Run the review pipeline DAG, reusing unchanged stages.")
+    parser.add_argument("--url", default=DEFAULT_URL, help="Google Play Store App URL")
+    parser.add_argument("--force", nargs="*", metavar="STAGE",
+                        help="Re-run stages even if unchanged (all stages, or just the ones named)")
+    args = parser.parse_args()
+
     print("=== Starting App Review Insights Pipeline ===")
-    
-    # 1. Scrape
-    raw_reviews = fetch_reviews(count=500)
-    save_raw_reviews(raw_reviews)
-    
-    # 2. Filter
-    filtered_reviews = filter_reviews(raw_reviews)
-    print(f"Filtered down to {len(filtered_reviews)} reviews.")
-    
-    with open(config.FILTERED_REVIEWS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(filtered_reviews, f, indent=2)
-        
-    # 3. Theme
-    tagged_reviews = theme_reviews(filtered_reviews)
-    
-    with open(config.TAGGED_REVIEWS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(tagged_reviews, f, indent=2)
-        
-    # 4. Report
-    generate_weekly_note(tagged_reviews)
-    generate_email_draft(tagged_reviews)
-    
+    pipeline = build_review_pipeline(RunContext.from_url(args.url))
+    force = args.force if args.force else args.force is not None
+    runs = pipeline.run(force=force)
+    print(format_timings(runs))
+
+    if not pipeline.succeeded(runs):
+        failed = [r.name for r in runs.values() if r.status in ("failed", "blocked")]
+        print(f"=== Pipeline Failed ({', '.join(failed)}) ===")
+        sys.exit(1)
     print("=== Pipeline Completed Successfully ===")
 
 if __name__ == "__main__":
@@ -0,0 +1,138 @@
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import requests
+
+# pytest is optional: `python scripts/test_fetch_control.py` runs the checks without it
+try:
+    import pytest
+except ImportError:
+    pytest = None
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app_review_insights import config
+from app_review_insights.scraping.fetch_control import FetchController, FetchError, CircuitOpenError, get_controller
+from app_review_insights.scraping.app_store_rss import fetch_ios_rss_reviews
+
+# Keep the retries fast; the fake server tells us when they happen
+FAST_BACKOFF = {"FETCH_BACKOFF_BASE": 0.01, "FETCH_BACKOFF_MAX": 0.05}
+
+FEED = {"feed": {"entry": [{
+    "im:rating": {"label": "4"},
+    "updated": {"label": "2025-12-04T07:21:33-07:00"},
+    "title": {"label": "Good"},
+    "content": {"label": "Works well after the update"},
+}]}}
+
+class FakeStore(BaseHTTPRequestHandler):
+    """
+    /throttle/...: 429 (Retry-After: 0) for the first THROTTLED requests, then a feed page.
+    /fail: always 500.  /ok: a feed page.
+    """
+    THROTTLED = 2
+    hits = {}
+
+    def do_GET(self):
+        route = self.path.split("/")[1]
+        FakeStore.hits[route] = FakeStore.hits.get(route, 0) + 1
+        if route == "throttle" and FakeStore.hits[route] <= FakeStore.THROTTLED:
+            self._reply(429, {}, {"Retry-After": "0"})
+        elif route == "fail":
+            self._reply(500, {})
+        else:
+            self._reply(200, FEED)
+
+    def _reply(self, status, body, headers=None):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+@contextmanager
+def fake_store():
+    """Serves FakeStore on a free local port with fast backoff; yields its base URL."""
+    saved = {name: getattr(config, name) for name in FAST_BACKOFF}
+    for name, value in FAST_BACKOFF.items():
+        setattr(config, name, value)
+    FakeStore.hits = {}
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeStore)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+        for name, value in saved.items():
+            setattr(config, name, value)
+
+if pytest is not None:
+    @pytest.fixture
+    def base():
+        with fake_store() as url:
+            yield url
+
+def _get(url):
+    response = requests.get(url, timeout=5)
+    response.raise_for_status()
+    return response.status_code
+
+def test_throttled_then_ok(base):
+    # Goes through the real RSS fetcher, with the feed host pointed at the fake server
+    url_template = base + "/throttle/{country}/{page}/{app_id}"
+    reviews = fetch_ios_rss_reviews(app_id=1, app_name="fake", pages=1, url_template=url_template)
+    assert len(reviews) == 1, reviews
+    assert FakeStore.hits["throttle"] == FakeStore.THROTTLED + 1, FakeStore.hits
+    controller = get_controller(base.split("//")[1])
+    # Throttling halved the rate; the final success only nudges it back up
+    assert controller.bucket.rate < config.FETCH_RATE_LIMIT, controller.bucket.rate
+    assert controller.breaker.state == "closed"
+    print(f"429 -> backoff -> ok: {FakeStore.hits['throttle']} requests, rate now {controller.bucket.rate:.2f}/s")
+
+def test_breaker_opens_and_closes(base):
+    controller = FetchController("fake-breaker", max_retries=0, failure_threshold=2, reset_timeout=0.2)
+    for _ in range(2):
+        try:
+            controller.call(_get, base + "/fail")
+            raise AssertionError("expected FetchError")
+        except CircuitOpenError:
+            raise AssertionError("breaker opened too early")
+        except FetchError:
+            pass
+    assert controller.breaker.state == "open"
+
+    hits = FakeStore.hits["fail"]
+    try:
+        controller.call(_get, base + "/fail")
+        raise AssertionError("expected CircuitOpenError")
+    except CircuitOpenError:
+        pass
+    assert FakeStore.hits["fail"] == hits, "an open breaker must not reach the host"
+
+    time.sleep(0.25)
+    assert controller.breaker.state == "half-open"
+    assert controller.call(_get, base + "/ok") == 200
+    assert controller.breaker.state == "closed"
+    print("breaker: open after 2 failures, rejects without a request, closes after a good probe")
+
+def main():
+    with fake_store() as base:
+        test_throttled_then_ok(base)
+    with fake_store() as base:
+        test_breaker_opens_and_closes(base)
+    print("\n✅ Fetch control checks passed.")
+
+if __name__ == "__main__":
+    main()
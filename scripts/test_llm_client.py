@@ -0,0 +1,180 @@
+import json
+import os
+import sys
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# pytest is optional: `python scripts/test_llm_client.py` runs the checks without it
+try:
+    import pytest
+except ImportError:
+    pytest = None
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app_review_insights import api, config
+from app_review_insights.context import RunContext
+from app_review_insights.llm_client import LLMClient
+from app_review_insights.processing.keyword_themes import get_default_engine
+from app_review_insights.scraping.fetch_control import FetchError
+from app_review_insights.storage.classification_cache import ClassificationCache
+from app_review_insights.storage.review_store import ReviewStore
+
+THEMES = config.THEME_LIST
+REVIEWS = [
+    "Customer support never replied to my ticket",
+    "Brokerage charges are too high",
+    "App crashes every time I open the portfolio",
+    "Love the clean interface",
+    "Please add more IPO options",
+]
+
+# Keep the retries fast; the fake server fails on purpose
+FAST_BACKOFF = {"FETCH_BACKOFF_BASE": 0.01, "FETCH_BACKOFF_MAX": 0.05}
+
+def stand_in_theme(text):
+    """The fake server's answer: differs from the keyword themes, so fallbacks show."""
+    return THEMES[len(text) % len(THEMES)]
+
+class FakeLLM(BaseHTTPRequestHandler):
+    """
+    OpenAI-style /<mode>/chat/completions, answering with stand_in_theme.
+    ok: valid batch and single answers.  garbled: batch answers aren't JSON.
+    offlist: every answer names a theme that isn't offered.  fail: always 500.
+    """
+    requests = []
+
+    def do_POST(self):
+        mode = self.path.split("/")[1]
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        prompt = body["messages"][-1]["content"]
+        batch = "\nReviews:\n" in prompt
+        FakeLLM.requests.append("batch" if batch else "single")
+        if mode == "fail":
+            return self._reply(500, {})
+
+        if batch:
+            texts = [json.loads(line.split(". ", 1)[1]) for line in prompt.split("\nReviews:\n", 1)[1].splitlines()]
+            answer = {"results": [{"id": i, "theme": stand_in_theme(t)} for i, t in enumerate(texts, 1)]}
+            content = "not json" if mode == "garbled" else json.dumps(answer)
+        else:
+            text = prompt.split("\nReview: ", 1)[1]
+            content = json.dumps({"theme": stand_in_theme(text)})
+        if mode == "offlist":
+            content = json.dumps({"theme": "Not A Theme"})
+        self._reply(200, {"choices": [{"message": {"content": content}}]})
+
+    def _reply(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+@contextmanager
+def fake_llm():
+    """Serves FakeLLM on a free local port with fast backoff; yields its base URL."""
+    saved = {name: getattr(config, name) for name in FAST_BACKOFF}
+    for name, value in FAST_BACKOFF.items():
+        setattr(config, name, value)
+    FakeLLM.requests = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeLLM)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+        for name, value in saved.items():
+            setattr(config, name, value)
+
+if pytest is not None:
+    @pytest.fixture
+    def base():
+        with fake_llm() as url:
+            yield url
+
+def _client(base, mode):
+    cache = ClassificationCache(path=os.path.join(tempfile.mkdtemp(), "cache.db"))
+    return LLMClient(provider="openai", api_base=f"{base}/{mode}", model="stand-in", cache=cache)
+
+def test_batch_answers_are_parsed(base):
+    client = _client(base, "ok")
+    themes = client.categorize_batch(REVIEWS, THEMES, batch_size=3, max_concurrency=2)
+    assert themes == [stand_in_theme(t) for t in REVIEWS], themes
+    assert FakeLLM.requests == ["batch", "batch"], FakeLLM.requests
+    # Second pass is served from the classification cache
+    assert client.categorize_batch(REVIEWS, THEMES) == themes
+    assert len(FakeLLM.requests) == 2, FakeLLM.requests
+    print(f"batch: {len(REVIEWS)} reviews in 2 requests, then all from cache")
+
+def test_unparsable_batch_falls_back_per_review(base):
+    client = _client(base, "garbled")
+    themes = client.categorize_batch(REVIEWS, THEMES, batch_size=len(REVIEWS))
+    assert themes == [stand_in_theme(t) for t in REVIEWS], themes
+    assert FakeLLM.requests == ["batch"] + ["single"] * len(REVIEWS), FakeLLM.requests
+    print(f"garbled batch: retried as {len(REVIEWS)} single-review requests")
+
+def test_unusable_answer_falls_back_to_keywords(base):
+    client = _client(base, "offlist")
+    themes = client.categorize_batch(REVIEWS, THEMES, batch_size=len(REVIEWS))
+    engine = get_default_engine()
+    assert themes == [engine.classify(t, THEMES) for t in REVIEWS], themes
+    # Keyword fallbacks aren't cached, so the next run asks the provider again
+    sent = len(FakeLLM.requests)
+    assert client.categorize_batch(REVIEWS[:1], THEMES) == themes[:1]
+    assert len(FakeLLM.requests) > sent, FakeLLM.requests
+    print("off-list answers: keyword themes used, and not cached")
+
+def test_failing_provider_raises_fetch_error(base):
+    client = _client(base, "fail")
+    try:
+        client.categorize_batch(REVIEWS[:1], THEMES)
+        raise AssertionError("expected FetchError")
+    except FetchError:
+        pass
+    assert FakeLLM.requests == ["batch"] * (config.FETCH_MAX_RETRIES + 1), FakeLLM.requests
+    print(f"500s: FetchError after {len(FakeLLM.requests)} attempts")
+
+def test_categorize_action_reports_provider_failure(base):
+    tmp = tempfile.mkdtemp()
+    overrides = {
+        "LLM_PROVIDER": "openai", "LLM_API_BASE": f"{base}/fail", "LLM_MODEL": "stand-in",
+        "CLASSIFICATION_CACHE_ENABLED": False, "COLUMNAR_BACKEND": False,
+        "REVIEW_STORE_FILE": os.path.join(tmp, "reviews.db"),
+        "DATA_DIR": os.path.join(tmp, "data"), "OUTPUT_DIR": os.path.join(tmp, "output"),
+    }
+    saved = {name: getattr(config, name) for name in overrides}
+    try:
+        for name, value in overrides.items():
+            setattr(config, name, value)
+        ctx = RunContext.default()
+        date = ctx.window_start(datetime.now() + timedelta(weeks=ctx.weeks_back, days=-1))
+        with ReviewStore() as store:
+            store.upsert_reviews([{"app_name": ctx.app_id, "locale": ctx.locale, "review_id": f"r{i}",
+                                   "date": date, "rating": 3, "text": t} for i, t in enumerate(REVIEWS)])
+        result = api.categorize_reviews_action(ctx)
+    finally:
+        for name, value in saved.items():
+            setattr(config, name, value)
+    assert result["status"] == "error" and "Categorizing reviews failed" in result["message"], result
+    print(f"categorize action: {result['message'][:60]}...")
+
+def main():
+    for test in (test_batch_answers_are_parsed, test_unparsable_batch_falls_back_per_review,
+                 test_unusable_answer_falls_back_to_keywords, test_failing_provider_raises_fetch_error,
+                 test_categorize_action_reports_provider_failure):
+        with fake_llm() as base:
+            test(base)
+    print("\n✅ LLM client checks passed.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+import sys
+import os
+import argparse
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app_review_insights.processing.tfidf_classifier import train_from_history
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the tfidf theme classifier from tagged reviews.")
+    parser.add_argument("--source", help="reviews_tagged.json style file (default: the review store)")
+    parser.add_argument("--holdout", type=float, default=0.2, help="Fraction held out for evaluation")
+    args = parser.parse_args()
+
+    _, report = train_from_history(args.source, holdout=args.holdout)
+    if report:
+        print(f"\nHoldout accuracy: {report.pop('accuracy')}")
+        print(f"{'Theme':<26} {'Precision':>9} {'Recall':>7} {'Support':>8}")
+        for theme, m in report.items():
+            print(f"{theme:<26} {m['precision']:>9.3f} {m['recall']:>7.3f} {m['support']:>8}")
+    print("Set LLM_PROVIDER = \"tfidf\" in config.py to use it.")
+
+if __name__ == "__main__":
+    main()